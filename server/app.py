@@ -1,25 +1,65 @@
 # Existing imports
 import os
 import sys
+import time
 from dotenv import load_dotenv
 import logging
 from pathlib import Path
 from fastapi import FastAPI, Query, HTTPException, Request, Depends, APIRouter, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from psycopg2.extras import RealDictCursor
 import psycopg2
 import requests
 from supabase import create_client
-from utils.recommendation_engine import calculate_recommendation_score
+from utils.recommendation_engine import (
+    recommendation_score_sql,
+    required_feature_mask,
+    scoring_diagnostics,
+    top_scored_courses,
+)
+from utils.db_pool import ConnectionPool
+from utils.geocode_cache import geocode_cache
+from utils.zip_index import ZipCentroidIndex
+from utils.single_flight import SingleFlight
+from utils.club_snapshot import ClubSnapshot
+from utils.pagination import decode_cursor, next_cursor
+from utils.prepared_statements import PreparedStatementCache
+from utils.find_clubs_query import find_clubs_statement
+from utils.club_queries import (
+    CANDIDATE_CLUBS_QUERY,
+    CLUB_DETAIL_LAYOUT,
+    FIND_CLUBS_LAYOUT,
+    SEARCH_CLUBS_AFTER,
+    SEARCH_CLUBS_LAYOUT,
+    SEARCH_CLUBS_QUERY,
+    scored_clubs_query,
+)
+from utils.serialization import FastJSONResponse, dumps
+from utils.metrics import (
+    CONTENT_TYPE,
+    REQUEST_DURATION,
+    REQUESTS_IN_FLIGHT,
+    current_route,
+    finish_after_body,
+    metrics,
+    route_template,
+    stage,
+)
+from utils.result_cache import QueryResultCache, bucket_radius
+from utils.auth import InvalidToken, TokenVerifier
+from utils.profile_cache import SCORING_PROFILE_COLUMNS, SCORING_PROFILE_QUERY, ProfileCache
+from utils.batch_recommendations import stream_batch_recommendations
+from utils.materialized_recommendations import MaterializedRecommendations
 from datetime import datetime
 import json
+import hmac
+import uuid
 import socket
 import asyncio
 from typing import Optional, List, Dict, Any
-from contextlib import contextmanager
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -54,6 +94,7 @@ app = FastAPI(
     title="Golf Course API",
     version="1.0.0",
     description="API for managing golf clubs, courses, reviews, and more.",
+    default_response_class=FastJSONResponse,
 )
 
 # Get CORS origins from environment variable
@@ -108,19 +149,44 @@ except Exception as e:
     logger.error(f"Failed to initialize Supabase client: {str(e)}")
     raise
 
-@contextmanager
-def get_db_connection():
-    conn = psycopg2.connect(
-        dbname=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT")
+# Shared Postgres connection pool (sized via DB_POOL_* env vars)
+db_pool = ConnectionPool.from_env()
+
+# Bundled ZIP centroids; get_lat_lng only calls Azure for ZIPs missing here
+zip_index = ZipCentroidIndex.load_if_exists(os.getenv("ZIP_INDEX_PATH", BASE_DIR / "data" / "zip_centroids.bin"))
+
+# Concurrent identical geocodes and radius queries share one upstream call
+geocode_flight = SingleFlight("geocode")
+club_query_flight = SingleFlight("club_query")
+
+# find_clubs results keyed on the normalized query, per worker; club writes invalidate it
+find_clubs_cache = QueryResultCache.from_env()
+
+# Optional precomputed per-user recommendations (migrations/002_user_recommendations.sql)
+materialized_recommendations = None
+if os.getenv("MATERIALIZED_RECOMMENDATIONS_ENABLED", "false").lower() == "true":
+    materialized_recommendations = MaterializedRecommendations.from_env()
+
+def invalidate_club_caches(club_ids, lat=None, lng=None):
+    """
+    Call after any club write. This drops the entries in this worker's
+    find_clubs cache; other workers catch up within RESULT_CACHE_TTL_SECONDS.
+    """
+    club_ids = [club_id for club_id in club_ids if club_id]
+    for club_id in club_ids:
+        find_clubs_cache.invalidate_club(club_id)
+    if lat is not None and lng is not None:
+        find_clubs_cache.invalidate_location(lat, lng)
+    if materialized_recommendations is not None:
+        materialized_recommendations.mark_clubs_stale(db_pool, club_ids, lat=lat, lng=lng)
+
+# Optional in-memory golfclub snapshot for radius search without a DB round trip
+club_snapshot = None
+if os.getenv("CLUB_SNAPSHOT_ENABLED", "false").lower() == "true":
+    club_snapshot = ClubSnapshot(
+        refresh_seconds=int(os.getenv("CLUB_SNAPSHOT_REFRESH_SECONDS", "300")),
+        overlap_seconds=int(os.getenv("CLUB_SNAPSHOT_OVERLAP_SECONDS", "60")),
     )
-    try:
-        yield conn
-    finally:
-        conn.close()
 
 # Middleware to log requests
 @app.middleware("http")
@@ -146,6 +212,28 @@ async def timeout_middleware(request: Request, call_next):
             }
         )
 
+# Per-route latency, in-flight requests, and the route label for stage timings
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    route = route_template(app, request.scope)
+    token = current_route.set(route)
+    REQUESTS_IN_FLIGHT.inc(request.method, route)
+    start = time.perf_counter()
+
+    def finish(status_code):
+        REQUEST_DURATION.observe(time.perf_counter() - start, request.method, route, str(status_code))
+        REQUESTS_IN_FLIGHT.dec(request.method, route)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        finish(500)
+        raise
+    finally:
+        current_route.reset(token)
+
+    return finish_after_body(response, finish)
+
 # Exception Handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -170,9 +258,19 @@ async def test_connection():
 # Geocode ZIP Code
 @api_router.get("/geocode_zip/", tags=["Utilities"])
 def get_lat_lng(zip_code: str):
+    zip_code = zip_code.strip()
+    if zip_index is not None:
+        centroid = zip_index.lookup(zip_code)
+        if centroid:
+            return centroid
+
+    cached = geocode_cache.get(f"zip:{zip_code}")
+    if cached:
+        return cached[0], cached[1]
+
     try:
         # Use Azure Maps Search API with specific parameters for ZIP codes
-        url = "https://atlas.microsoft.com/search/address/json"
+        url = os.getenv("AZURE_MAPS_SEARCH_URL", "https://atlas.microsoft.com/search/address/json")
         params = {
             "api-version": "1.0",
             "subscription-key": os.getenv("AZURE_MAPS_API_KEY"),
@@ -209,6 +307,7 @@ def get_lat_lng(zip_code: str):
             raise ValueError(f"Invalid coordinates in response: {position}")
 
         logger.info(f"Successfully geocoded {zip_code} to lat={lat}, lng={lng}")
+        geocode_cache.set(f"zip:{zip_code}", [lat, lng])
         return lat, lng
 
     except requests.exceptions.RequestException as e:
@@ -221,6 +320,82 @@ def get_lat_lng(zip_code: str):
         logger.error(f"Unexpected geocoding error: {e}")
         raise HTTPException(status_code=500, detail="Internal geocoding error")
 
+async def resolve_lat_lng(zip_code: str):
+    """Geocode off the event loop, coalescing concurrent lookups of the same ZIP."""
+    zip_code = zip_code.strip()
+    with stage("geocode"):
+        return await geocode_flight.do(zip_code, run_in_threadpool, get_lat_lng, zip_code)
+
+async def fetch_clubs(query: str, params):
+    """Run a radius query, coalescing concurrent identical queries."""
+    with stage("sql"):
+        return await club_query_flight.do((query, tuple(params)), db_pool.run, db_pool.fetchall, query, params)
+
+# find_clubs shapes are prepared once per pooled connection
+prepared_statements = PreparedStatementCache()
+
+async def fetch_prepared(statement, params):
+    """Run a prepared statement, coalescing concurrent identical executions."""
+    with stage("sql"):
+        return await club_query_flight.do(
+            (statement.name, tuple(params)), db_pool.run, prepared_statements.fetchall, db_pool, statement, params
+        )
+
+# Scoring fields of user profiles; update_current_profile writes through
+profile_cache = ProfileCache.from_env()
+
+async def get_scoring_profile(user_id):
+    """The user's scoring preferences (with a version), or None if there is no profile."""
+    with stage("profile"):
+        profile = profile_cache.get(user_id)
+        if profile is None:
+            row = await db_pool.run(db_pool.fetchone, SCORING_PROFILE_QUERY, (user_id,))
+            if row is None:
+                return None
+            profile = profile_cache.fill(row)
+        return profile
+
+async def get_scoring_profiles(user_ids):
+    """Scoring preferences for many users: cached ones plus one query for the rest."""
+    profiles = {}
+    missing = []
+    for user_id in user_ids:
+        profile = profile_cache.get(user_id)
+        if profile is None:
+            missing.append(user_id)
+        else:
+            profiles[user_id] = profile
+    if missing:
+        with stage("profile"):
+            rows = await db_pool.run(
+                db_pool.fetchall,
+                f"SELECT {', '.join(SCORING_PROFILE_COLUMNS)} FROM profiles WHERE id = ANY(%s::uuid[])",
+                (missing,)
+            )
+        for row in rows:
+            profiles[str(row['id'])] = profile_cache.fill(row)
+    return profiles
+
+async def fetch_candidate_clubs(lat: float, lng: float, radius: int):
+    """Every club within radius with the fields the scorer reads, nearest first."""
+    if club_snapshot is not None and club_snapshot.ready:
+        return club_snapshot.query(lat, lng, radius)
+    return await fetch_clubs(CANDIDATE_CLUBS_QUERY, (lng, lat, lng, lat, radius))
+
+async def fetch_scored_clubs(lat: float, lng: float, radius: int, limit: int, profile: Dict[str, Any]):
+    """Score clubs in SQL and return the top `limit` plus the number in the radius."""
+    score_sql, score_params = recommendation_score_sql(profile)
+    query = scored_clubs_query(score_sql)
+    params = score_params + [lng, lat, lng, lat, radius, limit]
+    rows = await fetch_clubs(query, params)
+    total = rows[0]['total_candidates'] if rows else 0
+    courses = []
+    for row in rows:
+        course = {key: value for key, value in row.items() if key != 'total_candidates'}
+        course['score'] = round(course['score'], 2)
+        courses.append(course)
+    return courses, total
+
 @api_router.get("/geocode_zip/", tags=["Utilities"])
 def geocode_zip(zip_code: str):
     try:
@@ -230,6 +405,12 @@ def geocode_zip(zip_code: str):
         logger.error(f"Error in geocode_zip: {e}")
         raise HTTPException(status_code=400, detail="Failed to geocode ZIP code")
 
+def clubs_response(key, rows, next_page, layout=None):
+    """A page of club rows, projected onto `layout` when the caller passed fields=."""
+    if layout is not None:
+        rows = layout.pick(rows)
+    return FastJSONResponse({key: rows, "next_cursor": next_page})
+
 @api_router.get("/find_clubs/", tags=["Clubs"], summary="Find Clubs", description="Find golf clubs based on various criteria.")
 async def find_clubs(
     zip_code: str,
@@ -250,66 +431,22 @@ async def find_clubs(
     pull_cart: bool | None = None,
     golf_clubs_rental: bool | None = None,
     club_fitting: bool | None = None,
-    golf_lessons: bool | None = None
+    golf_lessons: bool | None = None,
+    cursor: str | None = None,
+    fields: str | None = None
 ):
+    # Only the requested columns are serialized (comma-separated fields=)
     try:
-        # Get coordinates from ZIP code
-        lat, lng = get_lat_lng(zip_code)
-        params = [lng, lat, lng, lat, radius]
-        conditions = []
-
-        # Define base query first
-        base_query = """
-        SELECT DISTINCT
-            gc.global_id as id,
-            gc.club_name,
-            gc.address,
-            gc.city,
-            gc.state,
-            gc.zip_code,
-            gc.price_tier,
-            gc.difficulty,
-            gc.number_of_holes,
-            gc.club_membership,
-            gc.driving_range,
-            gc.putting_green,
-            gc.chipping_green,
-            gc.practice_bunker,
-            gc.restaurant,
-            gc.lodging_on_site,
-            gc.motor_cart,
-            gc.pull_cart,
-            gc.golf_clubs_rental,
-            gc.club_fitting,
-            gc.golf_lessons,
-            ST_Distance(
-                gc.geom::geography,
-                ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography
-            ) / 1609.34 as distance_miles
-        FROM golfclub gc
-        WHERE ST_DWithin(
-            gc.geom::geography,
-            ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-            %s * 1609.34
-        )
-        """
-
-        # Add filters if specified
-        if price_tier:
-            conditions.append("gc.price_tier = %s")
-            params.append(price_tier)
-        
-        if difficulty:
-            conditions.append("gc.difficulty = %s")
-            params.append(difficulty)
+        layout = FIND_CLUBS_LAYOUT.project(fields) if fields else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        if number_of_holes:
-            conditions.append("gc.number_of_holes = %s")
-            params.append(number_of_holes)
+    try:
+        # Keyset position from the previous page, if any
+        after = decode_cursor(cursor) if cursor else None
 
-        if club_membership:
-            conditions.append("gc.club_membership = %s")
-            params.append(club_membership)
+        # Get coordinates from ZIP code
+        lat, lng = await resolve_lat_lng(zip_code)
 
         # Boolean filters
         boolean_filters = {
@@ -326,25 +463,42 @@ async def find_clubs(
             'golf_lessons': golf_lessons
         }
 
-        for field, value in boolean_filters.items():
-            if value is True:
-                conditions.append(f"gc.{field} = TRUE")
-
-        # Add conditions to base query
-        if conditions:
-            base_query += " AND " + " AND ".join(conditions)
-
-        # Add ORDER BY and LIMIT
-        base_query += " ORDER BY distance_miles ASC LIMIT %s"
-        params.append(limit)
+        # Serve from the in-memory snapshot when it is enabled and loaded
+        if club_snapshot is not None and club_snapshot.ready:
+            results = club_snapshot.query(
+                lat, lng, radius, limit=limit + 1, after=after, price_tier=price_tier, difficulty=difficulty,
+                number_of_holes=number_of_holes, club_membership=club_membership, **boolean_filters
+            )
+            results, next_page = next_cursor(results, limit)
+            return clubs_response("results", results, next_page, layout)
+
+        # Serve repeated queries from the result cache. Entries are fetched at
+        # the bucketed radius; the nearest rows within `radius` are a prefix.
+        cache_key = find_clubs_cache.key(
+            zip_code, radius, limit, cursor=cursor, offset=offset, boolean_filters=boolean_filters,
+            price_tier=price_tier, difficulty=difficulty, number_of_holes=number_of_holes,
+            club_membership=club_membership
+        )
+        results = find_clubs_cache.get(cache_key)
+        if results is not None:
+            results = [row for row in results if row['distance_miles'] <= radius]
+            results, next_page = next_cursor(results, limit)
+            return clubs_response("results", results, next_page, layout)
+        fetch_radius = bucket_radius(radius)
+
+        # One of a fixed set of prepared shapes; one extra row detects a next page
+        statement, params = find_clubs_statement(
+            lng, lat, fetch_radius, limit + 1, offset=offset, after=after,
+            price_tier=price_tier, difficulty=difficulty, number_of_holes=number_of_holes,
+            club_membership=club_membership, required_mask=required_feature_mask(boolean_filters)
+        )
 
         # Execute query
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(base_query, params)
-                results = cursor.fetchall()
-                
-                return {"results": results}
+        results = await fetch_prepared(statement, params)
+        find_clubs_cache.set(cache_key, results, lat, lng, fetch_radius)
+        results = [row for row in results if row['distance_miles'] <= radius]
+        results, next_page = next_cursor(results, limit)
+        return clubs_response("results", results, next_page, layout)
 
     except Exception as e:
         logger.error(f"Error in find_clubs: {str(e)}")
@@ -367,18 +521,26 @@ def update_golf_course(course_id: str, course: UpdateGolfCourseRequest):
     """
     try:
         query = """
+        WITH previous AS (
+            SELECT club_id FROM golfcourse WHERE global_id = %(course_id)s
+        )
         UPDATE golfcourse
         SET club_id = %(club_id)s, course_name = %(course_name)s, num_holes = %(num_holes)s, 
             price_tier = %(price_tier)s, difficulty = %(difficulty)s, zip_code = %(zip_code)s, 
             geom = ST_SetSRID(ST_MakePoint(%(lng)s, %(lat)s), 4326)
         WHERE global_id = %(course_id)s
+        RETURNING (SELECT club_id FROM previous) AS previous_club_id
         """
         course_dict = course.dict()
         course_dict["course_id"] = course_id
-        with get_db_connection() as conn:
+        with db_pool.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, course_dict)
+                previous = cursor.fetchone()
                 conn.commit()
+        invalidate_club_caches(
+            [course.club_id, previous[0] if previous else None], lat=course.lat, lng=course.lng
+        )
         return {"message": "Course updated successfully"}
     except Exception as e:
         logger.error(f"Error in update_golf_course: {e}")
@@ -390,11 +552,13 @@ def delete_golf_course(course_id: str):
     Delete a golf course from the database.
     """
     try:
-        query = "DELETE FROM golfcourse WHERE global_id = %s"
-        with get_db_connection() as conn:
+        query = "DELETE FROM golfcourse WHERE global_id = %s RETURNING club_id"
+        with db_pool.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, (course_id,))
+                deleted = cursor.fetchall()
                 conn.commit()
+        invalidate_club_caches([row[0] for row in deleted])
         return {"message": "Course deleted successfully"}
     except Exception as e:
         logger.error(f"Error in delete_golf_course: {e}")
@@ -458,62 +622,65 @@ class UpdateGolferProfileResponse(BaseModel):
     club_id: str | None  # Allow club_id to be None
     preferred_tees: str | None  # Allow preferred_tees to be None
 
-# Add these near your other imports
-security = HTTPBearer()
+# Tokens are verified locally; Supabase is only asked when that is inconclusive
+auth_verifier = TokenVerifier.from_env(remote=lambda token: supabase.auth.get_user(token).user)
 
-# Add this function to handle auth
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> Dict[str, Any]:
+async def get_current_user(request: Request):
+    """Shared auth dependency: the user behind the request's Bearer token."""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing or invalid Authorization header"
+        )
+    token = auth_header.split(' ')[1]
     try:
-        user = supabase.auth.get_user(credentials.credentials)
-        return user.user
-    except Exception as e:
-                    raise HTTPException(
+        with stage("auth"):
+            # Cached users and known keys are checked on the event loop; a
+            # JWKS fetch or a call to Supabase runs in the threadpool
+            user = auth_verifier.verify_local(token, fetch_keys=False)
+            if user is None:
+                user = await run_in_threadpool(auth_verifier.verify, token)
+        return user
+    except InvalidToken as e:
+        logger.info(f"Rejected token: {e}")
+        raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
 
+def fetch_or_create_profile(user_id, email):
+    """The user's profile row, inserting an empty one on first access (blocking)."""
+    with db_pool.connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("""
+                SELECT * FROM profiles WHERE id = %s
+            """, (user_id,))
+            profile = cursor.fetchone()
+
+            if not profile:
+                logger.info(f"Creating new profile for user {user_id}")
+                cursor.execute("""
+                    INSERT INTO profiles (id, email)
+                    VALUES (%s, %s)
+                    RETURNING *
+                """, (user_id, email))
+                profile = cursor.fetchone()
+        conn.commit()
+        return profile
+
 @api_router.get("/profiles/current", tags=["Profiles"])
-async def get_current_profile(request: Request):
+async def get_current_profile(user=Depends(get_current_user)):
     """Get current user profile"""
     logger.info("Accessing /profiles/current endpoint")
-    logger.info(f"Request headers: {dict(request.headers)}")
     
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            logger.error("Missing or invalid Authorization header")
-            raise HTTPException(
-                status_code=401,
-                detail="Missing or invalid Authorization header"
-            )
-
-        token = auth_header.split(' ')[1]
-        logger.info("Token extracted from header")
-        
-        user = supabase.auth.get_user(token)
-        user_id = user.user.id
+        user_id = user.id
         logger.info(f"User authenticated: {user_id}")
-        with get_db_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                    cursor.execute("""
-                        SELECT * FROM profiles WHERE id = %s
-                    """, (user_id,))
-                    profile = cursor.fetchone()
-                    
-                    if not profile:
-                        logger.info(f"Creating new profile for user {user_id}")
-                        cursor.execute("""
-                            INSERT INTO profiles (id, email)
-                            VALUES (%s, %s)
-                            RETURNING *
-                        """, (user_id, user.user.email))
-                conn.commit()
-                profile = cursor.fetchone()
-                logger.info("Profile retrieved successfully")
-                return profile
-        
+        profile = await db_pool.run(fetch_or_create_profile, user_id, user.email)
+        logger.info("Profile retrieved successfully")
+        return profile
+
     except HTTPException:
         raise
     except Exception as e:
@@ -528,166 +695,145 @@ async def get_recommendations(
     request: Request,
     zip_code: str,
     radius: int = 25,
-    limit: int = 25
+    limit: int = 25,
+    scoring: str = Query(default="sql", pattern="^(sql|python)$"),
+    user=Depends(get_current_user)
 ):
     try:
-        # Get user profile from token
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            raise HTTPException(status_code=401, detail="Missing authentication token")
-        
-        token = auth_header.split(' ')[1]
-        user = supabase.auth.get_user(token)
-        user_id = user.user.id
+        user_id = user.id
 
-        # Get user profile preferences
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("SELECT * FROM profiles WHERE id = %s", (user_id,))
-                profile = cursor.fetchone()
-                
-                if not profile:
-                    raise HTTPException(status_code=404, detail="Profile not found")
+        # Serve the precomputed list when it is fresh for this ZIP and radius
+        if materialized_recommendations is not None:
+            with stage("sql"):
+                materialized = await db_pool.run(
+                    materialized_recommendations.lookup, db_pool, user_id, zip_code, radius, limit
+                )
+            if materialized is not None:
+                return materialized
 
-                # Get coordinates from ZIP code
-                lat, lng = get_lat_lng(zip_code)
+        # Get user profile preferences
+        profile = await get_scoring_profile(user_id)
 
-                # Get clubs within radius using same method as find_clubs
-                cursor.execute("""
-                    SELECT DISTINCT
-                        gc.global_id as id,
-                        gc.club_name,
-                        gc.address,
-                        gc.city,
-                        gc.state,
-                        gc.zip_code,
-                        gc.price_tier,
-                        gc.difficulty,
-                        gc.number_of_holes,
-                        gc.club_membership,
-                        gc.driving_range,
-                        gc.putting_green,
-                        gc.chipping_green,
-                        gc.practice_bunker,
-                        gc.restaurant,
-                        gc.lodging_on_site,
-                        gc.motor_cart,
-                        gc.pull_cart,
-                        gc.golf_clubs_rental,
-                        gc.club_fitting,
-                        gc.golf_lessons,
-                        ST_Distance(
-                            gc.geom::geography,
-                            ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography
-                        ) / 1609.34 as distance_miles
-                    FROM golfclub gc
-                    WHERE ST_DWithin(
-                        gc.geom::geography,
-                        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        %s * 1609.34
-                    )
-                    LIMIT %s
-                """, (lng, lat, lng, lat, radius, limit))
-                
-                courses = cursor.fetchall()
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
 
-                # Calculate recommendation scores
-                scored_courses = []
-                for course in courses:
-                    score = calculate_recommendation_score(course, profile)
-                    scored_courses.append({**course, 'score': score})
+        # Get coordinates from ZIP code
+        lat, lng = await resolve_lat_lng(zip_code)
+
+        # Get clubs within radius, from the club snapshot when it is loaded
+        if club_snapshot is not None and club_snapshot.ready:
+            with stage("snapshot"):
+                courses = club_snapshot.query(lat, lng, radius)
+        elif scoring == "sql":
+            # Rank inside Postgres so LIMIT keeps the best courses in the radius
+            top_courses, total = await fetch_scored_clubs(lat, lng, radius, limit, profile)
+            return {
+                "courses": top_courses,
+                "total": total
+            }
+        else:
+            # Same radius query as the batch path, nearest `limit` clubs
+            courses = await fetch_clubs(CANDIDATE_CLUBS_QUERY + " LIMIT %s", (lng, lat, lng, lat, radius, limit))
 
-                # Sort by score
-                scored_courses.sort(key=lambda x: x['score'], reverse=True)
+        # Score and keep the best `limit` courses
+        with stage("scoring"):
+            top_courses = top_scored_courses(courses, profile, limit)
 
-                return {
-                    "courses": scored_courses[:limit],
-                    "total": len(scored_courses)
-                }
+        return {
+            "courses": top_courses,
+            "total": len(courses)
+        }
 
     except Exception as e:
         logger.error(f"Error in get_recommendations: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.post("/recommend-courses", tags=["Courses"])
-async def recommend_courses(request: Request, data: dict):
+async def recommend_courses(request: Request, data: dict, user=Depends(get_current_user)):
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            raise HTTPException(status_code=401, detail="Missing authentication token")
-        
-        token = auth_header.split(' ')[1]
-        user = supabase.auth.get_user(token)
-        user_id = user.user.id
-
-        # Get user preferences and courses in radius
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                # Get user profile
-                cursor.execute("SELECT * FROM profiles WHERE id = %s", (user_id,))
-                profile = cursor.fetchone()
-                
-                if not profile:
-                    raise HTTPException(status_code=404, detail="Profile not found")
-
-                # Get courses within radius
-                cursor.execute("""
-                    SELECT c.*, 
-                        ST_Distance(
-                            c.location::geography,
-                            (SELECT ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography 
-                            FROM zip_codes WHERE zip_code = %s)
-                        ) / 1609.34 as distance_miles
-                    FROM courses c
-                    WHERE ST_DWithin(
-                        c.location::geography,
-                        (SELECT ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography 
-                        FROM zip_codes WHERE zip_code = %s),
-                        %s * 1609.34
-                    )
-                """, (data['zip_code'], data['zip_code'], data['radius']))
-                
-                courses = cursor.fetchall()
-                
-                # Calculate scores using updated recommendation engine
-                scored_courses = []
-                for course in courses:
-                    score = calculate_recommendation_score(course, profile)
-                    scored_courses.append({**course, 'score': score})
+        user_id = user.id
+
+        # Get user profile
+        profile = await get_scoring_profile(user_id)
+
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        # Get courses within radius
+        courses = await db_pool.run(db_pool.fetchall, """
+            SELECT c.*, 
+                ST_Distance(
+                    c.location::geography,
+                    (SELECT ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography 
+                    FROM zip_codes WHERE zip_code = %s)
+                ) / 1609.34 as distance_miles
+            FROM courses c
+            WHERE ST_DWithin(
+                c.location::geography,
+                (SELECT ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography 
+                FROM zip_codes WHERE zip_code = %s),
+                %s * 1609.34
+            )
+        """, (data['zip_code'], data['zip_code'], data['radius']))
 
-                # Sort by score
-                scored_courses.sort(key=lambda x: x['score'], reverse=True)
+        # Every course in the radius, best first, unless the caller passes a limit
+        limit = int(data['limit']) if data.get('limit') is not None else len(courses)
+        with stage("scoring"):
+            top_courses = top_scored_courses(courses, profile, limit)
 
-                return {
-                    "courses": scored_courses,
-                    "total": len(scored_courses)
-                }
+        return {
+            "courses": top_courses,
+            "total": len(courses)
+        }
 
     except Exception as e:
         logger.error(f"Error in recommend_courses: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def require_bearer_key(request: Request, key: Optional[str], detail: str):
+    """401 unless the Bearer token equals key; an unset key refuses every caller."""
+    auth_header = request.headers.get('Authorization') or ''
+    token = auth_header[len('Bearer '):] if auth_header.startswith('Bearer ') else ''
+    if not token or not key or not hmac.compare_digest(token, key):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
+
+def require_batch_key(request: Request):
+    """Batch callers (campaigns, partners) authenticate with BATCH_API_KEY."""
+    require_bearer_key(request, os.getenv("BATCH_API_KEY"), "Batch API key required")
+
+class BatchRecommendationItem(BaseModel):
+    user_id: uuid.UUID
+    zip_code: str
+    radius: int = 25
+
+class BatchRecommendationsRequest(BaseModel):
+    requests: List[BatchRecommendationItem]
+    limit: int = 25
+
+@api_router.post("/recommendations/batch", tags=["Recommendations"], dependencies=[Depends(require_batch_key)])
+async def batch_recommendations(batch: BatchRecommendationsRequest):
+    """
+    Recommendations for many (user, ZIP) pairs. Pairs are grouped by ZIP and
+    radius so each group is geocoded and queried once; the response is NDJSON
+    with one line per group, written as soon as the group is scored.
+    """
+    async def lines():
+        async for group in compute_recommendations([item.dict() for item in batch.requests], batch.limit):
+            yield dumps(group) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @api_router.get("/debug/profile", tags=["Debug"])
-async def debug_profile(request: Request):
+async def debug_profile(request: Request, user=Depends(get_current_user)):
     """Debug endpoint to check profile data"""
     try:
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            raise HTTPException(status_code=401, detail="Missing authentication token")
-        
-        token = auth_header.split(' ')[1]
-        user = supabase.auth.get_user(token)
-        user_id = user.user.id
+        user_id = user.id
 
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("SELECT * FROM profiles WHERE id = %s", (user_id,))
-                profile = cursor.fetchone()
-                
-                return {
-                    "profile": profile,
-                    "timestamp": datetime.now().isoformat()
-                }
+        profile = await db_pool.run(db_pool.fetchone, "SELECT * FROM profiles WHERE id = %s", (user_id,))
+        return {
+            "profile": profile,
+            "timestamp": datetime.now().isoformat()
+        }
 
     except Exception as e:
         logger.error(f"Profile debug error: {str(e)}")
@@ -742,6 +888,20 @@ async def get_debug_token(request: Request):
             detail=f"Server error: {str(e)}"
         )
 
+class ScoringSampleRequest(BaseModel):
+    sample_every: int = 0
+    user_ids: List[str] = []
+
+def require_admin_key(request: Request):
+    """Admin-only debug switches; disabled unless ADMIN_API_KEY is set."""
+    require_bearer_key(request, os.getenv("ADMIN_API_KEY"), "Admin key required")
+
+@api_router.put("/debug/scoring-sample", tags=["Debug"], dependencies=[Depends(require_admin_key)])
+async def set_scoring_sample(sample: ScoringSampleRequest):
+    """Turn per-club scoring diagnostics on (1 in N calls and/or specific users) or off"""
+    scoring_diagnostics.configure(sample.sample_every, sample.user_ids)
+    return scoring_diagnostics.stats()
+
 @api_router.get("/debug/routes", tags=["Debug"])
 async def list_routes():
     """List all registered routes"""
@@ -754,54 +914,62 @@ async def list_routes():
         })
     return {"routes": routes}
 
+def update_profile_row(user_id, assignments, params):
+    """Apply the SET assignments to the user's profile and return the new row (blocking)."""
+    with db_pool.connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(f"""
+                UPDATE profiles
+                SET {', '.join(assignments)}
+                WHERE id = %s
+                RETURNING *
+            """, params + [user_id])
+            updated_profile = cursor.fetchone()
+        conn.commit()
+        return updated_profile
+
 @api_router.put("/profiles/current", tags=["Profiles"])
-async def update_current_profile(request: Request):
+async def update_current_profile(request: Request, user=Depends(get_current_user)):
     try:
-        # Validate token
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            raise HTTPException(status_code=401, detail="Missing authentication token")
-        
-        token = auth_header.split(' ')[1]
-        user = supabase.auth.get_user(token)
-        user_id = user.user.id
+        user_id = user.id
 
         # Get request data
         data = await request.json()
         
+        assignments = [
+            "email = %s",
+            "first_name = %s",
+            "last_name = %s",
+            "handicap_index = %s",
+            "preferred_price_range = %s",
+            "preferred_difficulty = %s",
+            "skill_level = %s",
+            "play_frequency = %s",
+        ]
+        params = [
+            data.get('email'),
+            data.get('first_name'),
+            data.get('last_name'),
+            data.get('handicap_index'),
+            data.get('preferred_price_range'),
+            data.get('preferred_difficulty'),
+            data.get('skill_level'),
+            data.get('play_frequency'),
+        ]
+        # home_zip (migration 002) only exists with materialized recommendations;
+        # it is written only when sent, and null or "" clears it
+        if materialized_recommendations is not None and 'home_zip' in data:
+            assignments.append("home_zip = %s")
+            params.append(data['home_zip'] or None)
+
         # Update profile
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute("""
-                    UPDATE profiles 
-                    SET 
-                        email = %s,
-                        first_name = %s,
-                        last_name = %s,
-                        handicap_index = %s,
-                        preferred_price_range = %s,
-                        preferred_difficulty = %s,
-                        skill_level = %s,
-                        play_frequency = %s
-                    WHERE id = %s
-                    RETURNING *
-                """, (
-                    data.get('email'),
-                    data.get('first_name'),
-                    data.get('last_name'),
-                    data.get('handicap_index'),
-                    data.get('preferred_price_range'),
-                    data.get('preferred_difficulty'),
-                    data.get('skill_level'),
-                    data.get('play_frequency'),
-                    user_id
-                ))
-                conn.commit()
-                updated_profile = cursor.fetchone()
-                
-                if not updated_profile:
-                    raise HTTPException(status_code=404, detail="Profile not found")
-                    
+        updated_profile = await db_pool.run(update_profile_row, user_id, assignments, params)
+        if not updated_profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        profile_cache.put(updated_profile)
+        if materialized_recommendations is not None:
+            await db_pool.run(materialized_recommendations.mark_users_stale, db_pool, [user_id])
         return updated_profile
 
     except HTTPException:
@@ -810,6 +978,81 @@ async def update_current_profile(request: Request):
         logger.error(f"Error updating profile: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def ndjson_response(query: str, params, chunk_size: int = 1000, layout=None):
+    """
+    Stream query rows as NDJSON from a server-side cursor, chunk_size rows at
+    a time. The first chunk is fetched before responding so query errors
+    still produce an error status.
+    """
+    chunks = db_pool.stream(query, params, chunk_size)
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = []
+
+    def encode(rows):
+        if layout is not None:
+            rows = layout.pick(rows)
+        return b"".join(dumps(row) + b"\n" for row in rows)
+
+    async def lines():
+        try:
+            if first:
+                yield encode(first)
+            async for rows in chunks:
+                yield encode(rows)
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@api_router.get("/clubs/search", tags=["Clubs"])
+async def search_clubs(
+    center: str = Query(default='[0.0, 0.0]'),
+    radius: int = Query(default=10000),
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+    response_format: str = Query(default="json", alias="format", pattern="^(json|ndjson)$"),
+    fields: str | None = None
+):
+    try:
+        layout = SEARCH_CLUBS_LAYOUT.project(fields) if fields else None
+
+        # Parse center coordinates
+        center_coords = json.loads(center)
+        longitude, latitude = center_coords
+        params = [longitude, latitude, longitude, latitude, radius]
+        query = SEARCH_CLUBS_QUERY
+
+        # Keyset pagination in (distance, id) order when a page size is given
+        if cursor:
+            after_distance, after_id = decode_cursor(cursor)
+            query += SEARCH_CLUBS_AFTER
+            params.extend([longitude, latitude, after_distance, after_id])
+        query += " ORDER BY distance_miles ASC, id ASC"
+
+        # format=ndjson streams one club per line with flat memory use
+        if response_format == "ndjson":
+            if limit:
+                query += " LIMIT %s"
+                params.append(limit)
+            return await ndjson_response(query, params, layout=layout)
+
+        if limit:
+            query += " LIMIT %s"
+            params.append(limit + 1)
+
+        rows = await db_pool.run(db_pool.fetchall_tuples, query, params)
+        clubs, next_page = next_cursor(SEARCH_CLUBS_LAYOUT.to_dicts(rows), limit)
+        return clubs_response("clubs", clubs, next_page, layout)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid center coordinates format")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in search_clubs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # At the end of the file, include the router with the /api prefix
 app.include_router(api_router, prefix="/api")
 
@@ -818,10 +1061,8 @@ async def root():
     """Enhanced health check endpoint"""
     try:
         # Quick DB check
-        with get_db_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute('SELECT 1')
-        
+        await db_pool.run(db_pool.fetchone, 'SELECT 1')
+
         return JSONResponse(
             status_code=200,
             content={
@@ -860,14 +1101,20 @@ async def startup_event():
     logger.info(f"Host: {socket.gethostname()}")
     logger.info(f"Port: {os.getenv('PORT', '8000')}")
     
-    # Test database connection
+    # Warm the connection pool and test the database connection
     try:
-        with get_db_connection() as conn:
+        db_pool.warm()
+        with db_pool.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute('SELECT 1')
                 logger.info("Database connection successful")
     except Exception as e:
         logger.error(f"Database connection failed: {str(e)}")
+
+    if club_snapshot is not None:
+        asyncio.create_task(refresh_club_snapshot())
+    if materialized_recommendations is not None:
+        asyncio.create_task(refresh_materialized_recommendations())
     
     # Log all non-sensitive environment variables
     logger.info("Environment variables:")
@@ -875,6 +1122,42 @@ async def startup_event():
         if not any(secret in key.lower() for secret in ['password', 'key', 'secret']):
             logger.info(f"{key}: {value}")
 
+async def refresh_club_snapshot():
+    """Keep the in-memory club snapshot fresh in the background"""
+    while True:
+        try:
+            await db_pool.run(club_snapshot.refresh, db_pool)
+        except Exception as e:
+            logger.error(f"Club snapshot refresh failed: {str(e)}")
+        await asyncio.sleep(club_snapshot.refresh_seconds)
+
+def compute_recommendations(items, limit):
+    """Batch recommendation path used by the materialized recommendations worker."""
+    return stream_batch_recommendations(
+        items,
+        resolve_location=resolve_lat_lng,
+        fetch_candidates=fetch_candidate_clubs,
+        load_profiles=get_scoring_profiles,
+        limit=limit,
+    )
+
+async def refresh_materialized_recommendations():
+    """Recompute stale per-user recommendation lists in the background"""
+    while True:
+        try:
+            stored = await materialized_recommendations.refresh(db_pool, compute_recommendations)
+        except Exception as e:
+            logger.error(f"Materialized recommendations refresh failed: {str(e)}")
+            stored = 0
+        # Keep draining while there is a backlog
+        if stored < materialized_recommendations.batch_size:
+            await asyncio.sleep(materialized_recommendations.refresh_seconds)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled database connections"""
+    db_pool.dispose()
+
 @app.get("/api/debug")
 def debug_info():
     """Endpoint to check server configuration"""
@@ -893,6 +1176,19 @@ def debug_info():
             "port": os.environ.get("PORT", "8000"),
             "env_mode": os.environ.get("ENV", "unknown"),
             "database_configured": all(key in os.environ for key in ["DB_HOST", "DB_PORT", "DB_NAME"]),
+            "database_pool": db_pool.stats(),
+            "geocode_cache": geocode_cache.stats(),
+            "scoring": scoring_diagnostics.stats(),
+            "find_clubs_cache": find_clubs_cache.stats(),
+            "prepared_statements": prepared_statements.stats(),
+            "auth": auth_verifier.stats(),
+            "profile_cache": profile_cache.stats(),
+            "materialized_recommendations": materialized_recommendations.stats() if materialized_recommendations is not None else None,
+            "club_snapshot": club_snapshot.stats() if club_snapshot is not None else None,
+            "single_flight": {
+                "geocode": geocode_flight.stats(),
+                "club_query": club_query_flight.stats(),
+            },
             "cors_origins": cors_origins,
             "environment_vars": {
                 k: v for k, v in os.environ.items() 
@@ -907,6 +1203,56 @@ def debug_info():
             "timestamp": datetime.now().isoformat()
         }
 
+def collect_component_metrics():
+    """Scrape-time samples from the caches', pool's and coalescers' stats()."""
+    caches = {
+        "geocode": geocode_cache.stats(),
+        "find_clubs": find_clubs_cache.stats(),
+        "profile": profile_cache.stats(),
+    }
+    hits = {name: stats["hits"] + stats.get("disk_hits", 0) for name, stats in caches.items()}
+    misses = {name: stats["misses"] for name, stats in caches.items()}
+    auth = auth_verifier.stats()
+    hits["auth"] = auth["cache_hits"]
+    misses["auth"] = auth["local_verifications"] + auth["remote_verifications"]
+    prepared = prepared_statements.stats()
+    hits["prepared_statements"] = prepared["hits"]
+    misses["prepared_statements"] = prepared["prepares"]
+
+    def ratio(name):
+        lookups = hits[name] + misses[name]
+        return hits[name] / lookups if lookups else 0.0
+
+    pool = db_pool.stats()
+    flights = {"geocode": geocode_flight.stats(), "club_query": club_query_flight.stats()}
+    return [
+        ("cache_hits_total", "counter", "Cache lookups served from the cache.",
+         [({"cache": name}, value) for name, value in hits.items()]),
+        ("cache_misses_total", "counter", "Cache lookups that went upstream.",
+         [({"cache": name}, value) for name, value in misses.items()]),
+        ("cache_hit_ratio", "gauge", "Lifetime hit ratio per cache.",
+         [({"cache": name}, ratio(name)) for name in hits]),
+        ("db_pool_connections", "gauge", "Pooled connections by state.",
+         [({"state": "checked_out"}, pool["checked_out"]), ({"state": "idle"}, pool["idle"])]),
+        ("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.",
+         [({}, pool["checkout_timeouts"])]),
+        ("single_flight_in_flight", "gauge", "Upstream calls currently in flight.",
+         [({"flight": name}, stats["in_flight"]) for name, stats in flights.items()]),
+        ("single_flight_coalesced_total", "counter", "Calls that joined an in-flight upstream call.",
+         [({"flight": name}, stats["coalesced"]) for name, stats in flights.items()]),
+    ]
+
+metrics.add_collector(collect_component_metrics)
+
+def require_metrics_key(request: Request):
+    """Scrapers authenticate with METRICS_API_KEY; the endpoint is closed when it is unset."""
+    require_bearer_key(request, os.getenv("METRICS_API_KEY"), "Metrics key required")
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_key)])
+def prometheus_metrics():
+    """Prometheus scrape endpoint (per worker; see utils/metrics.py)"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
 @app.get("/api/test-cors")
 async def test_cors():
     return {
@@ -992,59 +1338,25 @@ async def test_connection(request: Request):
         "timestamp": datetime.now().isoformat()
     }
 
-@api_router.get("/clubs/search", tags=["Clubs"])
-async def search_clubs(
-    center: str = Query(default='[0.0, 0.0]'),
-    radius: int = Query(default=10000)
-):
+@app.get("/api/clubs/{club_id}")
+async def get_club_by_id(club_id: str, fields: str | None = None):
     try:
-        # Parse center coordinates
-        center_coords = json.loads(center)
-        longitude, latitude = center_coords
-
-        # Use your existing database connection
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                query = """
-                SELECT 
-                    id, club_name, address, latitude, longitude,
-                    ST_Distance(
-                        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                        ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
-                    ) / 1609.34 as distance_miles
-                FROM golfclub
-                WHERE ST_Distance(
-                    ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
-                    ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
-                ) <= %s * 1609.34
-                ORDER BY distance_miles ASC
-                """
-                cursor.execute(query, (longitude, latitude, longitude, latitude, radius))
-                clubs = cursor.fetchall()
-
-        return {
-            "clubs": clubs
-        }
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid center coordinates format")
-    except Exception as e:
-        logger.error(f"Error in search_clubs: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        layout = CLUB_DETAIL_LAYOUT.project(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/api/clubs/{club_id}")
-async def get_club_by_id(club_id: str):
     try:
-        with get_db_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-                query = "SELECT * FROM golfclub WHERE global_id = %s"
-                cursor.execute(query, (club_id,))
-                result = cursor.fetchone()
+        # Columns come from the fixed layout, never from the request as-is
+        query = f"SELECT {layout.select_sql()} FROM golfclub WHERE global_id = %s"
+        rows = await db_pool.run(db_pool.fetchall_tuples, query, (club_id,))
 
-                if not result:
-                    raise HTTPException(status_code=404, detail="Club not found")
+        if not rows:
+            raise HTTPException(status_code=404, detail="Club not found")
 
-                return result
+        return FastJSONResponse(layout.to_dicts(rows[:1])[0])
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching club details: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch club details")
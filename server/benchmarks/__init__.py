@@ -0,0 +1 @@
+# Benchmarks are standalone scripts; run them from the server directory.
@@ -0,0 +1,80 @@
+"""
+Compare the scalar calculate_recommendation_score loop with the vectorized
+calculate_recommendation_scores for 1k to 1M synthetic clubs.
+
+    python -m benchmarks.bench_batch_scoring --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.recommendation_engine import (
+    AMENITY_FIELDS,
+    SERVICE_FIELDS,
+    CodeTable,
+    calculate_recommendation_score,
+    calculate_recommendation_scores,
+    encode_clubs,
+)
+
+PREFERENCES = {'preferred_price_range': '$$', 'preferred_difficulty': 'Medium'}
+
+
+def make_clubs(count, seed=0, density=0.5):
+    """Synthetic clubs; each amenity/service flag is set with probability density."""
+    rng = random.Random(seed)
+    clubs = []
+    for i in range(count):
+        club = {
+            'name': f'Club {i}',
+            'distance_miles': rng.uniform(0, 120),
+            'price_tier': rng.choice(['$', '$$', '$$$']),
+            'difficulty': rng.choice(['Easy', 'Medium', 'Hard']),
+        }
+        for field in AMENITY_FIELDS + SERVICE_FIELDS:
+            club[field] = rng.random() < density
+        clubs.append(club)
+    return clubs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--scalar-max", type=int, default=100000, help="Skip the scalar loop above this size")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    for size in args.sizes:
+        clubs = make_clubs(size)
+        price_codes, difficulty_codes = CodeTable(), CodeTable(case_insensitive=True)
+        preferred_price = price_codes.code(PREFERENCES['preferred_price_range'])
+        preferred_difficulty = difficulty_codes.code(PREFERENCES['preferred_difficulty'])
+
+        start = time.perf_counter()
+        columns = encode_clubs(clubs, price_codes, difficulty_codes)
+        encode_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        calculate_recommendation_scores(preferred_price=preferred_price,
+                                        preferred_difficulty=preferred_difficulty, **columns)
+        batch_time = time.perf_counter() - start
+
+        if size <= args.scalar_max:
+            start = time.perf_counter()
+            for club in clubs:
+                calculate_recommendation_score(club, PREFERENCES)
+            scalar = f"{(time.perf_counter() - start) * 1000:10.2f} ms"
+        else:
+            scalar = "   skipped"
+
+        print(f"n={size:<8} scalar={scalar}  batch={batch_time * 1000:8.2f} ms  "
+              f"(encode {encode_time * 1000:8.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Filter-heavy find_clubs queries: one `gc.<field> = TRUE` predicate per filter
+against the packed feature_mask check, plus per-field vs popcount scoring.
+
+Needs a PostGIS database with golfclub data and
+migrations 003 and 004 applied. From the server directory:
+
+    python -m benchmarks.bench_feature_mask --host localhost --port 5433 --repeat 50
+    python -m benchmarks.bench_feature_mask --scoring-only
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.db_pool import ConnectionPool
+from utils.recommendation_engine import (
+    FEATURE_FIELDS,
+    calculate_recommendation_score,
+    feature_mask,
+    required_feature_mask,
+)
+from benchmarks.bench_batch_scoring import PREFERENCES, make_clubs
+
+QUERY = """
+SELECT gc.global_id
+FROM golfclub gc
+WHERE ST_DWithin(gc.geog, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s * 1609.34)
+"""
+
+# (label, filters set to True)
+FILTER_SETS = [
+    ("1 filter", FEATURE_FIELDS[:1]),
+    ("3 filters", FEATURE_FIELDS[:3]),
+    ("6 filters", FEATURE_FIELDS[:6]),
+    ("9 filters", FEATURE_FIELDS[:9]),
+    ("all 11", FEATURE_FIELDS),
+]
+
+
+def per_field_query(fields):
+    return QUERY + "".join(f" AND gc.{field} = TRUE" for field in fields), []
+
+
+def mask_query(fields):
+    required = required_feature_mask({field: True for field in fields})
+    return QUERY + " AND (gc.feature_mask & %s) = %s", [required, required]
+
+
+def time_query(pool, sql, params, repeat):
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len(pool.fetchall(sql, params))
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], rows
+
+
+def bench_queries(pool, lng, lat, radius, repeat):
+    print(f"{'filters':<10} {'per-field p50':>14} {'mask p50':>10} {'rows':>6}")
+    for label, fields in FILTER_SETS:
+        base = [lng, lat, radius]
+        field_sql, field_params = per_field_query(fields)
+        mask_sql, mask_params = mask_query(fields)
+        field_time, field_rows = time_query(pool, field_sql, base + field_params, repeat)
+        mask_time, mask_rows = time_query(pool, mask_sql, base + mask_params, repeat)
+        assert field_rows == mask_rows, f"{label}: {field_rows} != {mask_rows} rows"
+        print(f"{label:<10} {field_time * 1000:11.2f} ms {mask_time * 1000:7.2f} ms {mask_rows:6d}")
+
+
+def bench_scoring(count):
+    clubs = make_clubs(count)
+    with_masks = [{**club, 'feature_mask': feature_mask(club)} for club in clubs]
+    for label, rows in (("booleans", clubs), ("stored mask", with_masks)):
+        start = time.perf_counter()
+        for club in rows:
+            calculate_recommendation_score(club, PREFERENCES)
+        print(f"score {label:<12} {count} clubs: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--port", default=os.getenv("DB_PORT", "5433"))
+    parser.add_argument("--dbname", default=os.getenv("DB_NAME", "postgres"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "postgres"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", "postgres"))
+    parser.add_argument("--lng", type=float, default=-84.38)
+    parser.add_argument("--lat", type=float, default=33.93)
+    parser.add_argument("--radius", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--clubs", type=int, default=100000, help="Synthetic clubs for the scoring comparison")
+    parser.add_argument("--scoring-only", action="store_true", help="Skip the database queries")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    bench_scoring(args.clubs)
+    if args.scoring_only:
+        return
+
+    pool = ConnectionPool({
+        "host": args.host,
+        "port": args.port,
+        "dbname": args.dbname,
+        "user": args.user,
+        "password": args.password,
+    }, min_size=1, max_size=1)
+    bench_queries(pool, args.lng, args.lat, args.radius, args.repeat)
+    pool.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare per-request psycopg2.connect against the shared ConnectionPool.
+
+Start a local PostGIS container first:
+
+    docker run --rm -d -p 5433:5432 -e POSTGRES_PASSWORD=postgres postgis/postgis:16-3.4
+
+Then, from the server directory:
+
+    python -m benchmarks.bench_pool --host localhost --port 5433 --requests 2000 --concurrency 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import psycopg2
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.db_pool import ConnectionPool
+
+QUERY = """
+SELECT ST_Distance(
+    ST_SetSRID(ST_MakePoint(-84.38, 33.75), 4326)::geography,
+    ST_SetSRID(ST_MakePoint(-84.39, 33.91), 4326)::geography
+) / 1609.34
+"""
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_direct(connect_kwargs):
+    start = time.perf_counter()
+    conn = psycopg2.connect(**connect_kwargs)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(QUERY)
+            cursor.fetchall()
+    finally:
+        conn.close()
+    return time.perf_counter() - start
+
+
+def run_pooled(pool):
+    start = time.perf_counter()
+    with pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(QUERY)
+            cursor.fetchall()
+    return time.perf_counter() - start
+
+
+def measure(label, fn, requests, concurrency):
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(lambda _: fn(), range(requests)))
+    print(f"{label:<8} p50={percentile(samples, 50) * 1000:8.2f} ms  "
+          f"p99={percentile(samples, 99) * 1000:8.2f} ms  n={len(samples)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--port", default=os.getenv("DB_PORT", "5433"))
+    parser.add_argument("--dbname", default=os.getenv("DB_NAME", "postgres"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "postgres"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", "postgres"))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    connect_kwargs = {
+        "host": args.host,
+        "port": args.port,
+        "dbname": args.dbname,
+        "user": args.user,
+        "password": args.password,
+    }
+    pool = ConnectionPool(connect_kwargs, min_size=args.concurrency, max_size=args.concurrency)
+    pool.warm()
+
+    measure("direct", lambda: run_direct(connect_kwargs), args.requests, args.concurrency)
+    measure("pooled", lambda: run_pooled(pool), args.requests, args.concurrency)
+    print(f"pool stats: {pool.stats()}")
+    pool.dispose()
+
+
+if __name__ == "__main__":
+    main()
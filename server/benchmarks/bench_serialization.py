@@ -0,0 +1,107 @@
+"""
+Encode a find_clubs-sized response the old way (RealDictCursor rows through
+jsonable_encoder + JSONResponse) against tuple rows mapped by RowLayout and
+rendered by FastJSONResponse, with and without a `fields=` projection.
+
+    python -m benchmarks.bench_serialization --sizes 25 500 10000
+"""
+import argparse
+import decimal
+import logging
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from utils.club_queries import FIND_CLUBS_LAYOUT
+from utils.serialization import FastJSONResponse
+
+PROJECTION = "id,club_name,distance_miles"
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = []
+        for field in FIND_CLUBS_LAYOUT.fields:
+            if field == "id":
+                row.append(uuid.UUID(int=rng.getrandbits(128)))
+            elif field == "distance_miles":
+                row.append(rng.uniform(0, 120))
+            elif field == "number_of_holes":
+                row.append(decimal.Decimal(rng.choice([9, 18, 27])))
+            elif field in ("club_name", "address", "city"):
+                row.append(f"{field} {i}")
+            elif field in ("state", "zip_code", "price_tier", "difficulty", "club_membership"):
+                row.append(rng.choice(["GA", "30301", "$$", "Medium", "Public"]))
+            else:
+                row.append(rng.random() < 0.5)
+        rows.append(tuple(row))
+    return rows
+
+
+def default_path(rows):
+    dict_rows = FIND_CLUBS_LAYOUT.to_dicts(rows)
+    return JSONResponse(jsonable_encoder({"results": dict_rows, "next_cursor": None})).body
+
+
+def fast_path(rows, layout=FIND_CLUBS_LAYOUT):
+    return FastJSONResponse({"results": layout.to_dicts(rows), "next_cursor": None}).body
+
+
+def projected_path(rows):
+    # Projection happens in SQL, so the rows only carry the selected columns
+    layout = FIND_CLUBS_LAYOUT.project(PROJECTION)
+    positions = [FIND_CLUBS_LAYOUT.fields.index(field) for field in layout.fields]
+    narrow = [tuple(row[i] for i in positions) for row in rows]
+    start = time.perf_counter()
+    body = fast_path(narrow, layout)
+    return body, time.perf_counter() - start
+
+
+def time_call(fn, rows, repeat):
+    samples = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = len(fn(rows))
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25, 500, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'rows':>7} {'default p50':>12} {'orjson p50':>11} {'projected p50':>14} {'bytes':>9} {'projected':>9}")
+    for size in args.sizes:
+        rows = make_rows(size)
+        default_time, default_bytes = time_call(default_path, rows, args.repeat)
+        fast_time, fast_bytes = time_call(fast_path, rows, args.repeat)
+        samples = []
+        projected_bytes = 0
+        for _ in range(args.repeat):
+            body, elapsed = projected_path(rows)
+            samples.append(elapsed)
+            projected_bytes = len(body)
+        samples.sort()
+        projected_time = samples[len(samples) // 2]
+        print(
+            f"{size:7d} {default_time * 1000:9.2f} ms {fast_time * 1000:8.2f} ms "
+            f"{projected_time * 1000:11.2f} ms {fast_bytes:9d} {projected_bytes:9d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
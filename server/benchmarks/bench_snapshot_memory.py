@@ -0,0 +1,67 @@
+"""
+Memory footprint of the club catalog held as RealDictCursor-style dict rows
+versus the compact ClubColumns snapshot, per 100k clubs.
+
+    python -m benchmarks.bench_snapshot_memory --clubs 100000
+"""
+import argparse
+import random
+import sys
+import tracemalloc
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from psycopg2.extras import RealDictRow
+
+from utils.club_snapshot import BOOLEAN_FILTERS, ClubSnapshot
+
+
+def make_row(rng):
+    row = RealDictRow()
+    row['id'] = str(uuid.UUID(int=rng.getrandbits(128)))
+    row['club_name'] = f"{rng.choice(['Pine', 'Oak', 'Lake', 'River'])} {rng.choice(['Valley', 'Hills', 'Creek'])} Golf Club"
+    row['address'] = f"{rng.randint(1, 9999)} {rng.choice(['Main', 'Country Club', 'Fairway'])} Rd"
+    row['city'] = rng.choice(['Atlanta', 'Austin', 'Denver', 'Phoenix'])
+    row['state'] = rng.choice(['GA', 'TX', 'CO', 'AZ'])
+    row['zip_code'] = f"{rng.randint(10000, 99999)}"
+    row['price_tier'] = rng.choice(['$', '$$', '$$$'])
+    row['difficulty'] = rng.choice(['Easy', 'Medium', 'Hard'])
+    row['number_of_holes'] = rng.choice(['9', '18', '27'])
+    row['club_membership'] = rng.choice(['Public', 'Private', 'Semi-Private'])
+    for field in BOOLEAN_FILTERS:
+        row[field] = rng.random() < 0.5
+    row['lat'] = rng.uniform(25, 49)
+    row['lng'] = rng.uniform(-124, -67)
+    return row
+
+
+def traced(build):
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clubs", type=int, default=100000)
+    args = parser.parse_args()
+
+    rows, rows_bytes = traced(lambda: [make_row(random.Random(i)) for i in range(args.clubs)])
+
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    # Counts the arrays plus the id and text strings the snapshot keeps
+    columns_bytes = snapshot.stats()["memory_bytes"]
+
+    scale = 100000 / args.clubs
+    print(f"dict rows:        {rows_bytes * scale / 1e6:8.1f} MB per 100k clubs")
+    print(f"columnar snapshot:{columns_bytes * scale / 1e6:8.1f} MB per 100k clubs "
+          f"(grid index not included)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure what score_upper_bound pruning saves in top_scored_courses: the
+same top-k ranking with pruning forced on and forced off, for several
+candidate list sizes, in random and nearest-first order (the SQL paths
+return nearest first). PRUNE_MIN_COURSES should sit where pruning starts
+to win.
+
+    python -m benchmarks.bench_top_scored --sizes 50 100 200 500 1000 10000 --limit 25
+"""
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import utils.recommendation_engine as recommendation_engine
+from utils.recommendation_engine import top_scored_courses
+from benchmarks.bench_batch_scoring import PREFERENCES, make_clubs
+
+
+def fastest(clubs, limit, prune_min, repeat):
+    """Fastest of `repeat` top_scored_courses runs with PRUNE_MIN_COURSES set to prune_min."""
+    saved = recommendation_engine.PRUNE_MIN_COURSES
+    recommendation_engine.PRUNE_MIN_COURSES = prune_min
+    try:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            top_scored_courses(clubs, PREFERENCES, limit)
+            best = min(best, time.perf_counter() - start)
+        return best
+    finally:
+        recommendation_engine.PRUNE_MIN_COURSES = saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 500, 1000, 10000])
+    parser.add_argument("--limit", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    print(f"{'clubs':>7} {'order':<14} {'pruned':>10} {'unpruned':>10} {'saving':>8}")
+    for size in args.sizes:
+        clubs = make_clubs(size)
+        nearest_first = sorted(clubs, key=lambda club: club['distance_miles'])
+        for order, candidates in (("random", clubs), ("nearest-first", nearest_first)):
+            with_bound = fastest(candidates, args.limit, 0, args.repeat)
+            without_bound = fastest(candidates, args.limit, sys.maxsize, args.repeat)
+            print(f"{size:7d} {order:<14} {with_bound * 1000:7.3f} ms {without_bound * 1000:7.3f} ms "
+                  f"{1 - with_bound / without_bound:+7.1%}")
+
+
+if __name__ == "__main__":
+    main()
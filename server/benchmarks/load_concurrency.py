@@ -0,0 +1,65 @@
+"""
+Show that async endpoints scale with concurrent clients instead of serializing
+on the event loop.
+
+Run the API against a local database, then from the server directory:
+
+    python -m benchmarks.load_concurrency --base-url http://localhost:8000 \
+        --path "/api/find_clubs/?zip_code=30328&radius=25" --levels 1 2 4 8 16
+
+Throughput should grow with the concurrency level until the DB pool
+(DB_POOL_MAX_SIZE) saturates; if every level reports the same req/s the
+handlers are blocking the loop.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+async def worker(client, path, headers, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(str(e))
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_level(base_url, path, headers, concurrency, duration):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(
+            worker(client, path, headers, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ))
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0.0
+    print(f"clients={concurrency:<4} req/s={len(latencies) / duration:8.1f}  "
+          f"p50={p50:8.2f} ms  errors={len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/find_clubs/?zip_code=30328&radius=25")
+    parser.add_argument("--token", help="Bearer token for authenticated endpoints")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    for level in args.levels:
+        asyncio.run(run_level(args.base_url, args.path, headers, level, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Local stand-ins for the external services the API calls, so load runs do not
+depend on (or bill) Azure Maps and Supabase:
+
+- FakeAzureMaps answers /search/address/json for the seeded ZIP centroids
+  after a configurable delay (point AZURE_MAPS_SEARCH_URL at .search_url).
+- FakeSupabaseAuth publishes an RS256 JWKS at /auth/v1/.well-known/jwks.json
+  and serves /auth/v1/user for remote verification (point SUPABASE_URL at
+  .url). mint_token() signs access tokens the API verifies locally.
+
+Both run on a ThreadingHTTPServer in a daemon thread.
+"""
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        self.server.fake.handle_get(self)
+
+
+class FakeService:
+    """A fake HTTP service on 127.0.0.1; start() picks a free port unless one is given."""
+
+    def __init__(self, port=0):
+        self.port = port
+        self._server = None
+        self._thread = None
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle_get(self, handler):
+        with self._lock:
+            self.requests += 1
+        self.get(handler, urlparse(handler.path))
+
+    def get(self, handler, url):
+        raise NotImplementedError
+
+
+class FakeAzureMaps(FakeService):
+    """Azure Maps address search for a fixed ZIP table, with latency_ms +/- jitter_ms per call."""
+
+    def __init__(self, centroids, latency_ms=50.0, jitter_ms=0.0, port=0):
+        super().__init__(port)
+        self.centroids = dict(centroids)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    @property
+    def search_url(self):
+        return f"{self.url}/search/address/json"
+
+    def get(self, handler, url):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if url.path != "/search/address/json":
+            handler.send_json(404, {"error": "not found"})
+            return
+        query = parse_qs(url.query).get("query", [""])[0].strip()
+        centroid = self.centroids.get(query)
+        if centroid is None:
+            handler.send_json(200, {"results": []})
+            return
+        lat, lng = centroid
+        handler.send_json(200, {
+            "results": [{
+                "type": "Geography",
+                "address": {"countryCode": "US", "postalCode": query},
+                "position": {"lat": lat, "lon": lng},
+            }]
+        })
+
+
+class FakeSupabaseAuth(FakeService):
+    """Supabase auth endpoints backed by a throwaway RSA key."""
+
+    def __init__(self, audience="authenticated", port=0):
+        super().__init__(port)
+        self.audience = audience
+        self.kid = uuid.uuid4().hex
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ).decode()
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+        self.jwks = {"keys": [{**public_jwk, "kid": self.kid, "use": "sig", "alg": "RS256"}]}
+
+    def mint_token(self, user_id, email=None, ttl_seconds=3600, kid=None):
+        """An RS256 access token for user_id, valid for ttl_seconds (signed as key id kid)."""
+        now = int(time.time())
+        claims = {
+            "sub": user_id,
+            "email": email,
+            "aud": self.audience,
+            "role": "authenticated",
+            "iat": now,
+            "exp": now + ttl_seconds,
+        }
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": kid or self.kid})
+
+    def get(self, handler, url):
+        if url.path == "/auth/v1/.well-known/jwks.json":
+            handler.send_json(200, self.jwks)
+        elif url.path == "/auth/v1/user":
+            self._user(handler)
+        else:
+            handler.send_json(404, {"error": "not found"})
+
+    def _user(self, handler):
+        token = handler.headers.get("Authorization", "").replace("Bearer ", "", 1)
+        try:
+            claims = jwt.decode(token, self.jwks["keys"][0], algorithms=["RS256"], audience=self.audience)
+        except Exception as e:
+            handler.send_json(401, {"msg": str(e)})
+            return
+        handler.send_json(200, {
+            "id": claims["sub"],
+            "aud": self.audience,
+            "role": "authenticated",
+            "email": claims.get("email"),
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": "2024-01-01T00:00:00Z",
+        })
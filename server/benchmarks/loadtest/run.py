@@ -0,0 +1,260 @@
+"""
+End-to-end load run against a local API process.
+
+Starts the fake Azure Maps geocoder and Supabase auth server (fakes.py),
+launches uvicorn with the API pointed at them and at a seeded PostGIS
+database (seed.py, or --seed to seed first), drives a scripted traffic mix
+from concurrent clients, and writes throughput plus p50/p95/p99 per endpoint
+as JSON. From the server directory:
+
+    python -m benchmarks.loadtest.run --seed --mix mixed --concurrency 16 \\
+        --duration 60 --geocoder-latency-ms 80 --output loadtest-baseline.json
+
+Pass --env KEY=VALUE to switch features on for a run, e.g.
+--env CLUB_SNAPSHOT_ENABLED=true.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import psycopg2
+from jose import jwt
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from benchmarks.loadtest.fakes import FakeAzureMaps, FakeSupabaseAuth
+from benchmarks.loadtest.seed import ZIP_CENTROIDS, seed, user_id
+
+SERVER_DIR = Path(__file__).resolve().parents[2]
+
+
+def find_clubs(rng, users):
+    params = {"zip_code": rng.choice(list(ZIP_CENTROIDS)), "radius": rng.choice([10, 25, 50]), "limit": 25}
+    if rng.random() < 0.3:
+        params["driving_range"] = "true"
+    return "/api/find_clubs/", params, {}
+
+
+def get_recommendations(rng, users):
+    token = rng.choice(users)
+    params = {"zip_code": rng.choice(list(ZIP_CENTROIDS)), "radius": 25, "limit": 25}
+    return "/api/get_recommendations/", params, {"Authorization": f"Bearer {token}"}
+
+
+def search_clubs(rng, users):
+    lat, lng = ZIP_CENTROIDS[rng.choice(list(ZIP_CENTROIDS))]
+    params = {"center": json.dumps([lng, lat]), "radius": rng.choice([10, 25]), "limit": 50}
+    return "/api/clubs/search", params, {}
+
+
+def current_profile(rng, users):
+    return "/api/profiles/current", {}, {"Authorization": f"Bearer {rng.choice(users)}"}
+
+
+ENDPOINTS = {
+    "find_clubs": find_clubs,
+    "get_recommendations": get_recommendations,
+    "search_clubs": search_clubs,
+    "profiles_current": current_profile,
+}
+
+# Mix name -> endpoint weights
+MIXES = {
+    "browse": {"find_clubs": 6, "search_clubs": 3, "profiles_current": 1},
+    "recommend": {"get_recommendations": 6, "find_clubs": 2, "profiles_current": 2},
+    "mixed": {"find_clubs": 4, "get_recommendations": 3, "search_clubs": 2, "profiles_current": 1},
+}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, duration):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def client_loop(client, rng, weights, users, deadline, record_after, latencies, errors):
+    names = list(weights)
+    counts = list(weights.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, counts)[0]
+        path, params, headers = ENDPOINTS[name](rng, users)
+        start = time.perf_counter()
+        try:
+            response = await client.get(path, params=params, headers=headers)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if start < record_after:
+            continue
+        if ok:
+            latencies[name].append(time.perf_counter() - start)
+        else:
+            errors[name] += 1
+
+
+async def drive(base_url, weights, users, concurrency, duration, warmup, seed_value):
+    latencies = {name: [] for name in weights}
+    errors = {name: 0 for name in weights}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        now = time.perf_counter()
+        record_after = now + warmup
+        deadline = record_after + duration
+        await asyncio.gather(*(
+            client_loop(client, random.Random(seed_value + i), weights, users, deadline, record_after,
+                        latencies, errors)
+            for i in range(concurrency)
+        ))
+    return latencies, errors
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API exited with code {process.returncode} during startup")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError("API did not become ready in time")
+
+
+def api_env(args, azure, auth):
+    env = {key: value for key, value in os.environ.items() if key != "SUPABASE_JWT_SECRET"}
+    env.update({
+        "DB_HOST": args.host,
+        "DB_PORT": str(args.port),
+        "DB_NAME": args.dbname,
+        "DB_USER": args.user,
+        "DB_PASSWORD": args.password,
+        "SUPABASE_URL": auth.url,
+        "SUPABASE_SERVICE_ROLE_KEY": jwt.encode({"role": "service_role"}, "loadtest", algorithm="HS256"),
+        "AZURE_MAPS_SEARCH_URL": azure.search_url,
+        "AZURE_MAPS_API_KEY": "loadtest",
+        # Force geocodes through the fake so its latency is part of the run
+        "ZIP_INDEX_PATH": str(SERVER_DIR / "data" / "loadtest-no-zip-index.bin"),
+        "GEOCODE_CACHE_PATH": "",
+    })
+    for item in args.env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--port", default=os.getenv("DB_PORT", "5433"))
+    parser.add_argument("--dbname", default=os.getenv("DB_NAME", "postgres"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "postgres"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", "postgres"))
+    parser.add_argument("--seed", action="store_true", help="Recreate and seed the database first")
+    parser.add_argument("--clubs", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before the run")
+    parser.add_argument("--geocoder-latency-ms", type=float, default=80.0)
+    parser.add_argument("--geocoder-jitter-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE")
+    parser.add_argument("--output", default="loadtest-baseline.json")
+    args = parser.parse_args()
+
+    if args.seed:
+        conn = psycopg2.connect(
+            host=args.host, port=args.port, dbname=args.dbname, user=args.user, password=args.password
+        )
+        try:
+            seed(conn, args.clubs, args.users, seed_value=args.random_seed)
+        finally:
+            conn.close()
+
+    azure = FakeAzureMaps(ZIP_CENTROIDS, args.geocoder_latency_ms, args.geocoder_jitter_ms)
+    auth = FakeSupabaseAuth()
+    with azure, auth:
+        users = [auth.mint_token(user_id(i), f"golfer{i}@loadtest.local") for i in range(args.users)]
+        api_port = free_port()
+        base_url = f"http://127.0.0.1:{api_port}"
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(api_port),
+             "--workers", str(args.workers), "--log-level", "warning"],
+            cwd=SERVER_DIR,
+            env=api_env(args, azure, auth),
+        )
+        try:
+            wait_until_ready(base_url, process)
+            weights = MIXES[args.mix]
+            latencies, errors = asyncio.run(drive(
+                base_url, weights, users, args.concurrency, args.duration, args.warmup, args.random_seed
+            ))
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+        result = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "mix": args.mix,
+            "weights": weights,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers,
+            "geocoder_latency_ms": args.geocoder_latency_ms,
+            "env": args.env,
+            "endpoints": {
+                name: summarize(latencies[name], errors[name], args.duration) for name in weights
+            },
+            "total": summarize(
+                [value for values in latencies.values() for value in values],
+                sum(errors.values()),
+                args.duration,
+            ),
+            "upstream_requests": {"azure_maps": azure.requests, "supabase_auth": auth.requests},
+        }
+
+    Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+    print(f"{'endpoint':<20} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for name, row in list(result["endpoints"].items()) + [("total", result["total"])]:
+        print(f"{name:<20} {row['throughput_rps']:8.1f} {row['p50_ms']:6.1f} ms {row['p95_ms']:6.1f} ms "
+              f"{row['p99_ms']:6.1f} ms {row['errors']:7d}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
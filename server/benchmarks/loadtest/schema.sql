@@ -0,0 +1,47 @@
+-- Base tables for the load-test database, with only the columns the API reads.
+-- seed.py applies this, then migrations/*.sql in order, then inserts the
+-- synthetic data. Production tables are managed in Supabase.
+
+CREATE EXTENSION IF NOT EXISTS postgis;
+
+CREATE TABLE IF NOT EXISTS golfclub (
+    id serial UNIQUE,
+    global_id uuid PRIMARY KEY,
+    club_name text NOT NULL,
+    address text,
+    city text,
+    state text,
+    zip_code text,
+    price_tier text,
+    difficulty text,
+    number_of_holes text,
+    club_membership text,
+    driving_range boolean,
+    putting_green boolean,
+    chipping_green boolean,
+    practice_bunker boolean,
+    restaurant boolean,
+    lodging_on_site boolean,
+    motor_cart boolean,
+    pull_cart boolean,
+    golf_clubs_rental boolean,
+    club_fitting boolean,
+    golf_lessons boolean,
+    latitude double precision,
+    longitude double precision,
+    geom geometry(Point, 4326)
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id uuid PRIMARY KEY,
+    email text,
+    first_name text,
+    last_name text,
+    handicap_index double precision,
+    preferred_price_range text,
+    preferred_difficulty text,
+    skill_level text,
+    play_frequency text,
+    club_id text,
+    preferred_tees text
+);
@@ -0,0 +1,151 @@
+"""
+Create and seed a local PostGIS database for the load harness: the base
+tables from schema.sql, every migration in migrations/, then synthetic clubs
+scattered around a fixed set of ZIP centroids and golfer profiles with
+deterministic ids (so run.py can mint tokens for them without a query).
+
+    python -m benchmarks.loadtest.seed --host localhost --port 5433 --clubs 20000 --users 1000
+"""
+import argparse
+import os
+import random
+import sys
+import uuid
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from utils.recommendation_engine import FEATURE_FIELDS
+
+SCHEMA_PATH = Path(__file__).resolve().parent / "schema.sql"
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# ZIP -> (lat, lng); the fake geocoder answers for these ZIPs only
+ZIP_CENTROIDS = {
+    "30328": (33.93, -84.38),
+    "10001": (40.75, -73.99),
+    "60601": (41.88, -87.62),
+    "94103": (37.77, -122.41),
+    "75201": (32.79, -96.80),
+    "85004": (33.45, -112.07),
+    "98101": (47.61, -122.33),
+    "33101": (25.78, -80.19),
+}
+
+USER_NAMESPACE = uuid.UUID("6f1c2b1e-3d5a-4f7e-9b0c-2a8d4e6f1a3b")
+
+PRICE_TIERS = ["$", "$$", "$$$"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+def user_id(index):
+    """Deterministic profile id for synthetic user `index`."""
+    return str(uuid.uuid5(USER_NAMESPACE, f"loadtest-user-{index}"))
+
+
+def club_rows(count, spread_degrees, seed):
+    rng = random.Random(seed)
+    zips = list(ZIP_CENTROIDS.items())
+    for i in range(count):
+        zip_code, (lat, lng) = zips[i % len(zips)]
+        club_lat = lat + rng.uniform(-spread_degrees, spread_degrees)
+        club_lng = lng + rng.uniform(-spread_degrees, spread_degrees)
+        yield (
+            str(uuid.UUID(int=rng.getrandbits(128))),
+            f"Load Test Club {i}",
+            f"{i} Fairway Dr",
+            "Testville",
+            "GA",
+            zip_code,
+            rng.choice(PRICE_TIERS),
+            rng.choice(DIFFICULTIES),
+            rng.choice(["9", "18", "27"]),
+            rng.choice(["Public", "Private", "Semi-Private"]),
+            *(rng.random() < 0.5 for _ in FEATURE_FIELDS),
+            club_lat,
+            club_lng,
+        )
+
+
+def profile_rows(count, seed):
+    rng = random.Random(seed + 1)
+    zips = list(ZIP_CENTROIDS)
+    for i in range(count):
+        yield (
+            user_id(i),
+            f"golfer{i}@loadtest.local",
+            "Load",
+            f"Tester {i}",
+            round(rng.uniform(0, 30), 1),
+            rng.choice(PRICE_TIERS),
+            rng.choice(DIFFICULTIES),
+            rng.choice(["Beginner", "Intermediate", "Advanced"]),
+            rng.choice(["Weekly", "Monthly"]),
+            zips[i % len(zips)],
+        )
+
+
+def seed(conn, clubs, users, spread_degrees=0.8, seed_value=0):
+    with conn.cursor() as cursor:
+        cursor.execute(SCHEMA_PATH.read_text())
+        for migration in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            cursor.execute(migration.read_text())
+
+        cursor.execute("TRUNCATE user_recommendations, profiles, golfclub, golfclub_deleted RESTART IDENTITY")
+
+        columns = [
+            "global_id", "club_name", "address", "city", "state", "zip_code",
+            "price_tier", "difficulty", "number_of_holes", "club_membership",
+            *FEATURE_FIELDS, "latitude", "longitude",
+        ]
+        execute_values(
+            cursor,
+            f"INSERT INTO golfclub ({', '.join(columns)}) VALUES %s",
+            club_rows(clubs, spread_degrees, seed_value),
+            page_size=1000,
+        )
+        cursor.execute("UPDATE golfclub SET geom = ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)")
+
+        execute_values(
+            cursor,
+            """
+            INSERT INTO profiles (id, email, first_name, last_name, handicap_index,
+                preferred_price_range, preferred_difficulty, skill_level, play_frequency, home_zip)
+            VALUES %s
+            """,
+            profile_rows(users, seed_value),
+            page_size=1000,
+        )
+        cursor.execute("ANALYZE golfclub")
+        cursor.execute("ANALYZE profiles")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--port", default=os.getenv("DB_PORT", "5433"))
+    parser.add_argument("--dbname", default=os.getenv("DB_NAME", "postgres"))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "postgres"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", "postgres"))
+    parser.add_argument("--clubs", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--spread", type=float, default=0.8, help="Degrees of lat/lng around each ZIP centroid")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=args.host, port=args.port, dbname=args.dbname, user=args.user, password=args.password
+    )
+    try:
+        seed(conn, args.clubs, args.users, args.spread, args.seed)
+    finally:
+        conn.close()
+    print(f"Seeded {args.clubs} clubs and {args.users} profiles")
+
+
+if __name__ == "__main__":
+    main()
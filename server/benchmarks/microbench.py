@@ -0,0 +1,179 @@
+"""
+Microbenchmarks for the recommendation and find_clubs hot paths, checked
+against stored baselines.
+
+Cases:
+- score[n=..,density=..]: calculate_recommendation_score over synthetic
+  clubs of several sizes and amenity densities
+- find_clubs_params[..]: the find_clubs statement/params builder, including
+  the feature mask and cursor decoding the endpoint does per request
+- recommend_top25[n=..]: the score, sort and slice step of
+  get_recommendations (top_scored_courses with limit 25)
+
+Each case reports the fastest and median time per call over --repeat
+samples. A case regresses when its fastest time (less sensitive to
+scheduler noise than the median) exceeds the baseline's by more than
+--threshold (default 20%); the run then exits with status 1. From the server directory:
+
+    python -m benchmarks.microbench                     # compare with the baseline
+    python -m benchmarks.microbench --update-baseline   # record a new baseline
+    python -m benchmarks.microbench --filter score --threshold 0.1
+
+Baselines are machine-specific: record one on the machine you compare on.
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.find_clubs_query import find_clubs_statement
+from utils.pagination import decode_cursor, encode_cursor
+from utils.recommendation_engine import (
+    FEATURE_FIELDS,
+    calculate_recommendation_score,
+    required_feature_mask,
+    top_scored_courses,
+)
+from benchmarks.bench_batch_scoring import PREFERENCES, make_clubs
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "microbench.json"
+
+
+def score_case(count, density):
+    clubs = make_clubs(count, density=density)
+
+    def run():
+        for club in clubs:
+            calculate_recommendation_score(club, PREFERENCES)
+    return run
+
+
+def find_clubs_params_case(filters, keyset):
+    boolean_filters = {field: (True if field in filters else None) for field in FEATURE_FIELDS}
+    cursor = encode_cursor(12.5, "6f1c2b1e-3d5a-4f7e-9b0c-2a8d4e6f1a3b") if keyset else None
+
+    def run():
+        after = decode_cursor(cursor) if cursor else None
+        find_clubs_statement(
+            -84.38, 33.93, 50, 26, after=after, price_tier="$$", difficulty=None,
+            number_of_holes="18", club_membership=None, required_mask=required_feature_mask(boolean_filters)
+        )
+    return run
+
+
+def recommend_case(count):
+    courses = make_clubs(count)
+
+    def run():
+        top_scored_courses(courses, PREFERENCES, 25)
+    return run
+
+
+# name -> factory returning the callable to time
+CASES = {}
+for _count in (100, 1000, 10000):
+    for _density in (0.1, 0.5, 0.9):
+        CASES[f"score[n={_count},density={_density}]"] = (score_case, (_count, _density))
+CASES["find_clubs_params[no filters]"] = (find_clubs_params_case, ((), False))
+CASES["find_clubs_params[3 filters]"] = (find_clubs_params_case, (FEATURE_FIELDS[:3], False))
+CASES["find_clubs_params[3 filters,keyset]"] = (find_clubs_params_case, (FEATURE_FIELDS[:3], True))
+for _count in (100, 1000, 10000):
+    CASES[f"recommend_top25[n={_count}]"] = (recommend_case, (_count,))
+
+
+def time_case(run, repeat, min_time):
+    """Median and min seconds per call; each sample loops until it lasts at least min_time."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= max(2, min(10, int(min_time / max(elapsed, 1e-9)) + 1))
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            run()
+        samples.append((time.perf_counter() - start) / loops)
+    return statistics.median(samples), min(samples)
+
+
+def run_cases(names, repeat, min_time):
+    results = {}
+    for name in names:
+        factory, args = CASES[name]
+        median, fastest = time_case(factory(*args), repeat, min_time)
+        results[name] = {"median_us": round(median * 1e6, 3), "min_us": round(fastest * 1e6, 3)}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Rows of (name, current_us, baseline_us, change, regressed) for every
+    result; baseline_us and change are None for cases without a baseline.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, result["min_us"], None, None, False))
+            continue
+        change = result["min_us"] / base["min_us"] - 1
+        rows.append((name, result["min_us"], base["min_us"], change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Allowed slowdown as a fraction")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--min-time", type=float, default=0.02, help="Minimum seconds per sample")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    names = [name for name in CASES if args.filter in name]
+    results = run_cases(names, args.repeat, args.min_time)
+    baseline_path = Path(args.baseline)
+
+    if args.update_baseline:
+        stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        cases = {**stored.get("cases", {}), **results}
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cases": cases,
+        }, indent=2) + "\n")
+        print(f"Wrote {len(results)} cases to {baseline_path}")
+
+    baseline = json.loads(baseline_path.read_text())["cases"] if baseline_path.exists() else {}
+    rows = compare(results, baseline, args.threshold)
+    print(f"{'case':<40} {'fastest':>12} {'baseline':>12} {'change':>8} {'median':>12}")
+    for name, current, base, change, regressed in rows:
+        base_text = f"{base:9.1f} us" if base is not None else "           -"
+        change_text = f"{change:+7.1%}" if change is not None else "       -"
+        median = results[name]["median_us"]
+        print(f"{name:<40} {current:9.1f} us {base_text} {change_text} {median:9.1f} us"
+              f"{'  REGRESSED' if regressed else ''}")
+
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 import requests
+from utils.geocode_cache import geocode_cache
 
 # Load environment variables
 BASE_DIR = Path(__file__).resolve().parent
@@ -10,6 +11,10 @@ load_dotenv(os.path.join(BASE_DIR, '.env'))
 AZURE_MAPS_API_KEY = os.getenv("AZURE_MAPS_API_KEY")
 
 def geocode_address(zip_code):
+    cached = geocode_cache.get(f"address:{zip_code}")
+    if cached is not None:
+        return cached
+
     url = "https://atlas.microsoft.com/search/address/json"
     params = {
         "api-version": "1.0",
@@ -18,7 +23,9 @@ def geocode_address(zip_code):
     }
     response = requests.get(url, params=params)
     response.raise_for_status()
-    return response.json()
+    data = response.json()
+    geocode_cache.set(f"address:{zip_code}", data)
+    return data
 
 def validate_address(address: str, city: str, state: str):
     """
@@ -0,0 +1,39 @@
+-- Change tracking for golfclub so the in-process club snapshot
+-- (utils/club_snapshot.py) can refresh from changed rows only.
+-- Apply with: psql "$DATABASE_URL" -f migrations/001_golfclub_change_tracking.sql
+
+ALTER TABLE golfclub ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS golfclub_updated_at_idx ON golfclub (updated_at);
+
+CREATE OR REPLACE FUNCTION golfclub_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS golfclub_touch_updated_at ON golfclub;
+CREATE TRIGGER golfclub_touch_updated_at
+    BEFORE UPDATE ON golfclub
+    FOR EACH ROW EXECUTE FUNCTION golfclub_touch_updated_at();
+
+-- Tombstones for deleted clubs
+CREATE TABLE IF NOT EXISTS golfclub_deleted (
+    global_id uuid PRIMARY KEY,
+    deleted_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS golfclub_deleted_deleted_at_idx ON golfclub_deleted (deleted_at);
+
+CREATE OR REPLACE FUNCTION golfclub_record_delete() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO golfclub_deleted (global_id, deleted_at)
+    VALUES (OLD.global_id, now())
+    ON CONFLICT (global_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS golfclub_record_delete ON golfclub;
+CREATE TRIGGER golfclub_record_delete
+    AFTER DELETE ON golfclub
+    FOR EACH ROW EXECUTE FUNCTION golfclub_record_delete();
@@ -0,0 +1,32 @@
+-- Materialized per-user top-N recommendations (utils/materialized_recommendations.py).
+-- A row is fresh when computed_version = dirty_version; profile and club writes
+-- bump dirty_version and the background worker recomputes only those users.
+-- Apply with: psql "$DATABASE_URL" -f migrations/002_user_recommendations.sql
+
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS home_zip text;
+
+CREATE TABLE IF NOT EXISTS user_recommendations (
+    user_id uuid PRIMARY KEY REFERENCES profiles (id) ON DELETE CASCADE,
+    zip_code text,
+    radius integer NOT NULL,
+    lat double precision,
+    lng double precision,
+    courses jsonb NOT NULL DEFAULT '[]',
+    club_ids text[] NOT NULL DEFAULT '{}',
+    total integer NOT NULL DEFAULT 0,
+    dirty_version bigint NOT NULL DEFAULT 1,
+    computed_version bigint NOT NULL DEFAULT 0,
+    computed_at timestamptz
+);
+
+-- Users whose list contains a changed club
+CREATE INDEX IF NOT EXISTS user_recommendations_club_ids_idx
+    ON user_recommendations USING gin (club_ids);
+
+-- Users whose search area covers a changed club's location
+CREATE INDEX IF NOT EXISTS user_recommendations_location_idx
+    ON user_recommendations USING gist ((ST_SetSRID(ST_MakePoint(lng, lat), 4326)::geography));
+
+-- Rows the worker still has to (re)compute
+CREATE INDEX IF NOT EXISTS user_recommendations_stale_idx
+    ON user_recommendations (user_id) WHERE computed_version < dirty_version;
@@ -0,0 +1,20 @@
+-- Packed amenity/service bitmask for golfclub, computed on write.
+-- Bit i is FEATURE_FIELDS[i] in utils/recommendation_engine.py
+-- (amenities in bits 0-5, services in bits 6-10); NULL flags count as unset.
+-- Boolean filters become one (feature_mask & required) = required check on
+-- the rows the radius index returns; no index on the mask can serve it.
+-- Apply with: psql "$DATABASE_URL" -f migrations/003_golfclub_feature_mask.sql
+
+ALTER TABLE golfclub ADD COLUMN IF NOT EXISTS feature_mask integer GENERATED ALWAYS AS (
+      (CASE WHEN driving_range THEN 1 ELSE 0 END)
+    | (CASE WHEN putting_green THEN 2 ELSE 0 END)
+    | (CASE WHEN chipping_green THEN 4 ELSE 0 END)
+    | (CASE WHEN practice_bunker THEN 8 ELSE 0 END)
+    | (CASE WHEN restaurant THEN 16 ELSE 0 END)
+    | (CASE WHEN lodging_on_site THEN 32 ELSE 0 END)
+    | (CASE WHEN motor_cart THEN 64 ELSE 0 END)
+    | (CASE WHEN pull_cart THEN 128 ELSE 0 END)
+    | (CASE WHEN golf_clubs_rental THEN 256 ELSE 0 END)
+    | (CASE WHEN club_fitting THEN 512 ELSE 0 END)
+    | (CASE WHEN golf_lessons THEN 1024 ELSE 0 END)
+) STORED;
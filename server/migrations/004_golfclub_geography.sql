@@ -0,0 +1,16 @@
+-- Stored geography point for golfclub, kept in sync with geom (or the
+-- latitude/longitude columns when geom is missing) on every write, plus the
+-- GiST index every radius query filters through with ST_DWithin
+-- (utils/club_queries.py, utils/find_clubs_query.py).
+-- Apply with: psql "$DATABASE_URL" -f migrations/004_golfclub_geography.sql
+
+ALTER TABLE golfclub ADD COLUMN IF NOT EXISTS geog geography(Point, 4326) GENERATED ALWAYS AS (
+    COALESCE(
+        geom::geography,
+        ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+    )
+) STORED;
+
+CREATE INDEX IF NOT EXISTS golfclub_geog_idx ON golfclub USING gist (geog);
+
+ANALYZE golfclub;
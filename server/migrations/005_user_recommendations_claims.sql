@@ -0,0 +1,8 @@
+-- Lease column for the materialized recommendations refresh
+-- (utils/materialized_recommendations.py). Every uvicorn worker runs the
+-- refresh loop; each claims pending rows with FOR UPDATE SKIP LOCKED and sets
+-- claimed_until, so workers never recompute the same users. A worker that
+-- dies mid-batch only delays its rows until the lease expires.
+-- Apply with: psql "$DATABASE_URL" -f migrations/005_user_recommendations_claims.sql
+
+ALTER TABLE user_recommendations ADD COLUMN IF NOT EXISTS claimed_until timestamptz;
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the server modules (utils, maps, ...) importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.recommendation_engine import AMENITY_FIELDS, SERVICE_FIELDS
+
+PRICE_TIERS = ['$', '$$', '$$$', None, '']
+DIFFICULTIES = ['Easy', 'medium', 'Hard', 'HARD', None]
+
+
+@pytest.fixture
+def make_clubs():
+    """make_clubs(count, seed=0): synthetic clubs covering the scorer's edge-case values."""
+    def make(count, seed=0):
+        rng = random.Random(seed)
+        clubs = []
+        for i in range(count):
+            club = {
+                'name': f'Club {i}',
+                'distance_miles': rng.choice([rng.uniform(0, 150), rng.randint(0, 120), 100.0, 0.0]),
+                'price_tier': rng.choice(PRICE_TIERS),
+                'difficulty': rng.choice(DIFFICULTIES),
+            }
+            for field in AMENITY_FIELDS + SERVICE_FIELDS:
+                club[field] = rng.choice([True, False, None])
+            clubs.append(club)
+        return clubs
+    return make
+
+
+@pytest.fixture(scope="session")
+def test_db_pool():
+    """Pool against a PostGIS database with golfclub data; skips when TEST_DATABASE_HOST is unset."""
+    if not os.getenv("TEST_DATABASE_HOST"):
+        pytest.skip("needs a PostGIS database with golfclub data (set TEST_DATABASE_HOST)")
+    from utils.db_pool import ConnectionPool
+
+    pool = ConnectionPool({
+        "host": os.getenv("TEST_DATABASE_HOST"),
+        "port": os.getenv("TEST_DATABASE_PORT", "5432"),
+        "dbname": os.getenv("TEST_DATABASE_NAME", "postgres"),
+        "user": os.getenv("TEST_DATABASE_USER", "postgres"),
+        "password": os.getenv("TEST_DATABASE_PASSWORD", "postgres"),
+    })
+    yield pool
+    pool.dispose()
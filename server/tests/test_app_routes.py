@@ -0,0 +1,96 @@
+import json
+import os
+
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.routing import Match
+
+# app.py builds its Supabase client at import time; no request here reaches it
+os.environ.setdefault("SUPABASE_URL", "http://localhost:1")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "header.payload.signature")
+
+import app as server  # noqa: E402
+from benchmarks.loadtest.run import ENDPOINTS  # noqa: E402
+from utils.club_queries import SEARCH_CLUBS_LAYOUT  # noqa: E402
+
+SEARCH_ROWS = [
+    ("club-a", "Alpha Golf Club", "1 Fairway Dr", 33.93, -84.38, 1.5),
+    ("club-b", "Bravo Links", "2 Green St", 33.95, -84.40, 3.25),
+]
+
+
+class FakePool:
+    """Answers the queries the routes send with canned rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def fetchall_tuples(self, query, params=None):
+        self.queries.append((query, params))
+        return list(self.rows)
+
+    async def stream(self, query, params=None, chunk_size=1000):
+        self.queries.append((query, params))
+        yield SEARCH_CLUBS_LAYOUT.to_dicts(self.rows)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    pool = FakePool(SEARCH_ROWS)
+    monkeypatch.setattr(server, "db_pool", pool)
+    # Not entered as a context manager, so the startup hooks (pool warm-up,
+    # background refresh loops) do not run
+    test_client = TestClient(server.app)
+    test_client.pool = pool
+    return test_client
+
+
+def test_search_route_is_registered_before_club_by_id():
+    paths = [route.path for route in server.app.routes]
+    assert "/api/clubs/search" in paths
+    assert paths.index("/api/clubs/search") < paths.index("/api/clubs/{club_id}")
+
+
+@pytest.mark.parametrize("name", sorted(ENDPOINTS))
+def test_loadtest_endpoints_hit_their_own_routes(name):
+    path, _, _ = ENDPOINTS[name](random.Random(0), ["token"])
+    scope = {"type": "http", "method": "GET", "path": path}
+    matched = next(route for route in server.app.routes if route.matches(scope)[0] == Match.FULL)
+    # A literal path, not captured by a parameterized route registered earlier
+    assert "{" not in matched.path
+
+
+def test_search_clubs_json(client):
+    response = client.get("/api/clubs/search", params={"center": "[-84.38, 33.93]", "radius": 25})
+    assert response.status_code == 200
+    body = response.json()
+    assert [club["id"] for club in body["clubs"]] == ["club-a", "club-b"]
+    assert body["clubs"][0]["distance_miles"] == 1.5
+    assert "golfclub" in client.pool.queries[0][0]
+
+
+def test_search_clubs_ndjson_with_fields(client):
+    response = client.get(
+        "/api/clubs/search",
+        params={"center": "[-84.38, 33.93]", "format": "ndjson", "fields": "id,distance_miles"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"id": "club-a", "distance_miles": 1.5}, {"id": "club-b", "distance_miles": 3.25}]
+
+
+def test_batch_rejects_malformed_user_ids(client, monkeypatch):
+    monkeypatch.setenv("BATCH_API_KEY", "batch-key")
+    response = client.post(
+        "/api/recommendations/batch",
+        json={"requests": [{"user_id": "not-a-uuid", "zip_code": "30328"}]},
+        headers={"Authorization": "Bearer batch-key"},
+    )
+    assert response.status_code == 422
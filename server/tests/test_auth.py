@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from jose import jwt
+
+from benchmarks.loadtest.fakes import FakeSupabaseAuth
+from utils.auth import AuthenticatedUser, InvalidToken, TokenVerifier
+
+SECRET = "test-jwt-secret"
+
+
+def make_token(secret=SECRET, expires_in=3600, **claims):
+    payload = {"sub": "user-1", "email": "golfer@example.com", "aud": "authenticated",
+               "exp": int(time.time()) + expires_in}
+    payload.update(claims)
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def test_verifies_locally_and_caches():
+    verifier = TokenVerifier(jwt_secret=SECRET)
+    token = make_token()
+    user = verifier.verify(token)
+    assert user == AuthenticatedUser(id="user-1", email="golfer@example.com")
+    assert verifier.verify(token) is user
+    stats = verifier.stats()
+    assert stats["local_verifications"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["remote_verifications"] == 0
+
+
+def test_rejects_bad_signature_without_remote_call():
+    calls = []
+    verifier = TokenVerifier(jwt_secret=SECRET, remote=calls.append)
+    with pytest.raises(InvalidToken):
+        verifier.verify(make_token(secret="someone-elses-secret"))
+    assert calls == []
+
+
+def test_rejects_expired_and_wrong_audience():
+    verifier = TokenVerifier(jwt_secret=SECRET)
+    with pytest.raises(InvalidToken):
+        verifier.verify(make_token(expires_in=-60))
+    with pytest.raises(InvalidToken):
+        verifier.verify(make_token(aud="anon"))
+    assert verifier.stats()["rejected"] == 2
+
+
+def test_cached_user_expires_with_token():
+    verifier = TokenVerifier(jwt_secret=SECRET, leeway_seconds=10)
+    token = make_token(expires_in=-5)
+    verifier.verify(token)
+    with pytest.raises(InvalidToken):
+        TokenVerifier(jwt_secret=SECRET).verify(token)
+    # The cache entry is already past exp, so the token is checked again
+    verifier.verify(token)
+    assert verifier.stats()["cache_hits"] == 0
+
+
+def test_falls_back_to_remote_without_local_key():
+    remote_user = AuthenticatedUser(id="user-2")
+    verifier = TokenVerifier(remote=lambda token: remote_user)
+    assert verifier.verify_local(make_token()) is None
+    assert verifier.verify(make_token()) is remote_user
+    assert verifier.stats()["remote_verifications"] == 1
+
+
+def test_malformed_token_is_rejected():
+    verifier = TokenVerifier(jwt_secret=SECRET)
+    with pytest.raises(InvalidToken):
+        verifier.verify("not-a-jwt")
+
+
+def test_unknown_key_ids_refresh_the_jwks_at_most_once_per_interval():
+    with FakeSupabaseAuth() as auth:
+        verifier = TokenVerifier(jwks_url=f"{auth.url}/auth/v1/.well-known/jwks.json")
+        token = auth.mint_token("user-1")
+        # The first token needs a fetch, which the async path leaves to verify()
+        assert verifier.verify_local(token, fetch_keys=False) is None
+        assert auth.requests == 0
+        assert verifier.verify_local(token).id == "user-1"
+        assert auth.requests == 1
+
+        for i in range(20):
+            assert verifier.verify_local(auth.mint_token("user-3", kid=f"forged-{i}")) is None
+        assert auth.requests == 1
+        assert verifier.verify_local(token, fetch_keys=False).id == "user-1"
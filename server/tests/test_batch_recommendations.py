@@ -0,0 +1,105 @@
+import asyncio
+
+from utils.batch_recommendations import group_requests, stream_batch_recommendations
+from utils.recommendation_engine import top_scored_courses, top_scored_for_profiles
+
+PROFILES = {
+    "u1": {"id": "u1", "preferred_price_range": "$$", "preferred_difficulty": "hard"},
+    "u2": {"id": "u2", "preferred_price_range": None, "preferred_difficulty": "Easy"},
+    "u3": {"id": "u3", "preferred_price_range": "$", "preferred_difficulty": None},
+}
+
+
+def test_group_requests_by_zip_and_radius():
+    groups = group_requests([
+        {"user_id": "u1", "zip_code": "30328", "radius": 25},
+        {"user_id": "u2", "zip_code": "30328-1234", "radius": 25},
+        {"user_id": "u3", "zip_code": "30328", "radius": 50},
+        {"user_id": "u1", "zip_code": "98101"},
+    ])
+    assert groups == {("30328", 25): ["u1", "u2"], ("30328", 50): ["u3"], ("98101", 25): ["u1"]}
+
+
+def test_free_text_locations_are_grouped_separately():
+    groups = group_requests([
+        {"user_id": "u1", "zip_code": "Atlanta, GA"},
+        {"user_id": "u2", "zip_code": "Atlantic City, NJ"},
+        {"user_id": "u3", "zip_code": " atlanta,  GA "},
+    ])
+    assert groups == {("atlanta, ga", 25): ["u1", "u3"], ("atlantic city, nj", 25): ["u2"]}
+
+
+def test_shared_candidates_match_per_user_ranking(make_clubs):
+    clubs = make_clubs(300, seed=7)
+    ranked = top_scored_for_profiles(clubs, list(PROFILES.values()), 20)
+    for profile, courses in zip(PROFILES.values(), ranked):
+        assert courses == top_scored_courses(clubs, profile, 20)
+
+
+def test_stream_fetches_once_per_group(make_clubs):
+    clubs = make_clubs(50, seed=3)
+    fetches = []
+
+    async def resolve_location(zip_code):
+        return (33.9, -84.4) if zip_code == "30328" else (47.6, -122.3)
+
+    async def fetch_candidates(lat, lng, radius):
+        fetches.append((lat, lng, radius))
+        return clubs
+
+    async def load_profiles(user_ids):
+        return {user_id: PROFILES[user_id] for user_id in user_ids if user_id in PROFILES}
+
+    items = [
+        {"user_id": "u1", "zip_code": "30328", "radius": 25},
+        {"user_id": "u2", "zip_code": "30328", "radius": 25},
+        {"user_id": "missing", "zip_code": "30328", "radius": 25},
+        {"user_id": "u3", "zip_code": "98101", "radius": 25},
+    ]
+
+    async def main():
+        return [group async for group in stream_batch_recommendations(
+            items, resolve_location, fetch_candidates, load_profiles, limit=5)]
+
+    groups = {group["zip_code"]: group for group in asyncio.run(main())}
+    assert len(fetches) == 2
+    atlanta = groups["30328"]["results"]
+    assert [result["user_id"] for result in atlanta] == ["u1", "u2", "missing"]
+    assert atlanta[0]["courses"] == top_scored_courses(clubs, PROFILES["u1"], 5)
+    assert atlanta[2]["error"] == "Profile not found"
+    assert groups["98101"]["total"] == 50
+
+
+def test_failed_group_reports_error():
+    async def resolve_location(zip_code):
+        raise ValueError("unknown ZIP")
+
+    async def load_profiles(user_ids):
+        return {}
+
+    async def main():
+        return [group async for group in stream_batch_recommendations(
+            [{"user_id": "u1", "zip_code": "00000"}], resolve_location, None, load_profiles)]
+
+    [group] = asyncio.run(main())
+    assert group["error"] == "unknown ZIP"
+    assert group["results"] == [{"user_id": "u1"}]
+
+
+def test_profile_load_failure_reports_every_group():
+    async def load_profiles(user_ids):
+        raise ValueError("invalid input syntax for type uuid")
+
+    items = [
+        {"user_id": "u1", "zip_code": "30328"},
+        {"user_id": "u2", "zip_code": "30328"},
+        {"user_id": "u3", "zip_code": "98101"},
+    ]
+
+    async def main():
+        return [group async for group in stream_batch_recommendations(items, None, None, load_profiles)]
+
+    groups = asyncio.run(main())
+    assert [group["zip_code"] for group in groups] == ["30328", "98101"]
+    assert all(group["error"] == "invalid input syntax for type uuid" for group in groups)
+    assert groups[0]["results"] == [{"user_id": "u1"}, {"user_id": "u2"}]
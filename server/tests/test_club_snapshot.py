@@ -0,0 +1,190 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from utils.club_snapshot import (
+    BOOLEAN_FILTERS,
+    CHANGED_ROWS_QUERY,
+    DELETED_ROWS_QUERY,
+    SNAPSHOT_QUERY,
+    ClubSnapshot,
+    haversine_miles,
+)
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        row = {
+            'id': f'club-{i}',
+            'club_name': f'Club {i}',
+            'price_tier': rng.choice(['$', '$$', '$$$']),
+            'difficulty': rng.choice(['Easy', 'Medium', 'Hard']),
+            'number_of_holes': rng.choice(['9', '18']),
+            'club_membership': rng.choice(['Public', 'Private']),
+            # The snapshot stores float32 coordinates
+            'lat': float(np.float32(rng.uniform(25, 49))),
+            'lng': float(np.float32(rng.uniform(-124, -67))),
+        }
+        for field in BOOLEAN_FILTERS:
+            row[field] = rng.random() < 0.5
+        rows.append(row)
+    return rows
+
+
+def brute_force(rows, lat, lng, radius, **filters):
+    results = []
+    for row in rows:
+        distance = float(haversine_miles(lat, lng, [row['lat']], [row['lng']])[0])
+        if distance > radius:
+            continue
+        if any(row[field] != value for field, value in filters.items() if not isinstance(value, bool)):
+            continue
+        if any(row[field] is not True for field, value in filters.items() if value is True):
+            continue
+        results.append((distance, row['id']))
+    return [club_id for _, club_id in sorted(results)]
+
+
+@pytest.mark.parametrize('radius', [5, 25, 100, 1000, 5000])
+def test_radius_query_matches_brute_force(radius):
+    rows = make_rows(3000)
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    for lat, lng in [(33.93, -84.38), (47.6, -122.3), (40.7, -74.0)]:
+        results = snapshot.query(lat, lng, radius)
+        assert [r['id'] for r in results] == brute_force(rows, lat, lng, radius)
+        assert all('lat' not in r for r in results)
+
+
+def test_filters_and_limit():
+    rows = make_rows(3000, seed=1)
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    filters = {'price_tier': '$$', 'number_of_holes': '18', 'driving_range': True, 'restaurant': True}
+    expected = brute_force(rows, 39.0, -95.0, 800, **filters)
+    results = snapshot.query(39.0, -95.0, 800, limit=10, driving_range=True, restaurant=True,
+                             price_tier='$$', number_of_holes='18', golf_lessons=None)
+    assert [r['id'] for r in results] == expected[:10]
+
+
+def test_nearest():
+    rows = make_rows(500, seed=2)
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    results = snapshot.nearest(33.93, -84.38, 5)
+    assert [r['id'] for r in results] == brute_force(rows, 33.93, -84.38, 20000)[:5]
+
+
+def test_incremental_changes():
+    rows = make_rows(200, seed=5)
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    moved = {**rows[0], 'lat': 33.93, 'lng': -84.38, 'club_name': 'Moved Club', 'restaurant': None}
+    added = {**rows[1], 'id': 'club-new', 'lat': 33.94, 'lng': -84.39}
+    assert snapshot.apply_changes([moved, added], ['club-1']) == 3
+
+    results = {r['id']: r for r in snapshot.query(33.93, -84.38, 5)}
+    assert set(results) >= {'club-0', 'club-new'}
+    assert 'club-1' not in results
+    assert results['club-0']['club_name'] == 'Moved Club'
+    assert results['club-0']['restaurant'] is None
+    assert snapshot.stats()['clubs'] == 200
+
+
+class ChangeLogPool:
+    """Serves the snapshot queries from in-memory rows, filtered like the SQL."""
+
+    def __init__(self, rows, now):
+        self.rows = rows
+        self.changed = []
+        self.deleted = []
+        self.now = now
+
+    def fetchone(self, sql, params=None):
+        return {'now': self.now}
+
+    def fetchall(self, sql, params=None):
+        if sql == SNAPSHOT_QUERY:
+            return list(self.rows)
+        if sql == CHANGED_ROWS_QUERY:
+            return [row for row in self.changed if row['updated_at'] >= params[0]]
+        assert sql == DELETED_ROWS_QUERY
+        return [row for row in self.deleted if row['deleted_at'] >= params[0]]
+
+
+def test_refresh_rereads_overlap_once_and_drops_cleared_geom():
+    start = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    rows = make_rows(50, seed=8)
+    pool = ChangeLogPool(rows, start)
+    snapshot = ClubSnapshot(overlap_seconds=60)
+    snapshot.refresh(pool)
+
+    # Written by a transaction that started before the load but committed after it
+    late = {**rows[0], 'club_name': 'Late Commit', 'updated_at': start - timedelta(seconds=10)}
+    cleared = {**rows[1], 'lat': None, 'lng': None, 'updated_at': start + timedelta(seconds=5)}
+    pool.changed = [late, cleared]
+    pool.now = start + timedelta(seconds=30)
+    snapshot.refresh(pool)
+    results = {r['id']: r for r in snapshot.query(37, -95, 5000)}
+    assert results['club-0']['club_name'] == 'Late Commit'
+    assert 'club-1' not in results
+    assert snapshot.rows_applied == 2
+
+    # The next refresh re-reads both rows from the overlap window and skips them
+    columns = snapshot._columns
+    pool.now = start + timedelta(seconds=60)
+    snapshot.refresh(pool)
+    assert snapshot._columns is columns
+    assert snapshot.rows_applied == 2
+    assert snapshot.incremental_refreshes == 2
+
+
+def test_rows_round_trip():
+    rows = make_rows(50, seed=6)
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    for result in snapshot.query(37, -95, 5000):
+        original = next(row for row in rows if row['id'] == result['id'])
+        for field, value in original.items():
+            if field not in ('lat', 'lng'):
+                assert result[field] == value
+
+
+def test_snapshot_matches_sql(test_db_pool):
+    pool = test_db_pool
+    snapshot = ClubSnapshot()
+    snapshot.refresh(pool)
+    lat, lng, radius = 33.93, -84.38, 50
+    sql_rows = pool.fetchall("""
+        SELECT gc.global_id as id,
+            ST_Distance(gc.geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) / 1609.34 as distance_miles
+        FROM golfclub gc
+        WHERE ST_DWithin(gc.geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s * 1609.34)
+    """, (lng, lat, lng, lat, radius))
+    sql = {str(row['id']): row['distance_miles'] for row in sql_rows}
+    snap = {str(row['id']): row['distance_miles'] for row in snapshot.query(lat, lng, radius)}
+    # Spheroid vs sphere: only clubs within 0.5% of the edge may disagree
+    for club_id in set(sql) ^ set(snap):
+        distance = sql.get(club_id, snap.get(club_id))
+        assert abs(distance - radius) <= radius * 0.005
+    for club_id in set(sql) & set(snap):
+        assert snap[club_id] == pytest.approx(sql[club_id], rel=0.005)
+
+
+def test_keyset_pages_cover_radius_once():
+    rows = make_rows(2000, seed=7)
+    snapshot = ClubSnapshot()
+    snapshot.load(rows)
+    expected = [r['id'] for r in snapshot.query(39.0, -95.0, 600)]
+    seen, after = [], None
+    while True:
+        page = snapshot.query(39.0, -95.0, 600, limit=7, after=after)
+        if not page:
+            break
+        seen.extend(r['id'] for r in page)
+        after = (page[-1]['distance_miles'], page[-1]['id'])
+    assert seen == expected
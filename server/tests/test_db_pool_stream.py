@@ -0,0 +1,149 @@
+import asyncio
+
+from utils.db_pool import ConnectionPool
+
+
+class FakeNamedCursor:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.log.append("cursor closed")
+        return False
+
+    def execute(self, query, params=None):
+        self.log.append("execute")
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        self.log.append(f"fetch {len(chunk)}")
+        return chunk
+
+
+class FakeConnection:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+
+    def cursor(self, name=None, cursor_factory=None):
+        assert name, "streaming must use a named (server-side) cursor"
+        return FakeNamedCursor(list(self.rows), self.log)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool(ConnectionPool):
+    def __init__(self, rows):
+        self.log = []
+        self.rows = rows
+        super().__init__({}, max_size=2, pre_ping=False)
+
+    def _create_connection(self):
+        return FakeConnection(self.rows, self.log)
+
+
+def test_stream_yields_chunks_and_returns_connection():
+    pool = FakePool([{"id": i} for i in range(25)])
+
+    async def main():
+        return [rows async for rows in pool.stream("SELECT", chunk_size=10)]
+
+    chunks = asyncio.run(main())
+    assert [len(rows) for rows in chunks] == [10, 10, 5]
+    assert pool.log[-1] == "cursor closed"
+    assert pool.stats()["checked_out"] == 0
+    pool.dispose()
+
+
+def test_closing_stream_early_releases_cursor():
+    pool = FakePool([{"id": i} for i in range(100)])
+
+    async def main():
+        stream = pool.stream("SELECT", chunk_size=10)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first
+
+    assert len(asyncio.run(main())) == 10
+    assert pool.log.count("fetch 10") == 1
+    assert pool.log[-1] == "cursor closed"
+    assert pool.stats()["checked_out"] == 0
+    pool.dispose()
+
+
+class PingConnection:
+    def __init__(self, log):
+        self.log = log
+        self.autocommit = False
+        self.closed = 0
+
+    def cursor(self, name=None, cursor_factory=None):
+        log = self.log
+
+        class Cursor:
+            def execute(self, query, params=None):
+                log.append(query)
+
+            def close(self):
+                pass
+        return Cursor()
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class PingPool(ConnectionPool):
+    def __init__(self):
+        self.log = []
+        self.created = []
+        super().__init__({}, max_size=1, pre_ping=True, timeout=0.05)
+
+    def _create_connection(self):
+        conn = PingConnection(self.log)
+        self.created.append(conn)
+        return conn
+
+
+def test_pre_ping_reuses_pooled_connection():
+    pool = PingPool()
+    for _ in range(2):
+        with pool.connection():
+            pass
+    assert len(pool.created) == 1
+    assert pool.log == ["SELECT 1"]
+    assert pool.created[0].autocommit is False
+
+
+def test_only_pool_timeouts_count_as_checkout_timeouts():
+    pool = PingPool()
+    with pool.connection():
+        try:
+            with pool.connection():
+                pass
+        except Exception:
+            pass
+    assert pool.stats()["checkout_timeouts"] == 1
+
+    class BrokenPool(ConnectionPool):
+        def _create_connection(self):
+            raise RuntimeError("connection refused")
+
+    broken = BrokenPool({}, max_size=1, pre_ping=True)
+    try:
+        with broken.connection():
+            pass
+    except RuntimeError:
+        pass
+    assert broken.stats()["checkout_timeouts"] == 0
@@ -0,0 +1,54 @@
+import sqlite3
+
+from utils.geocode_cache import GeocodeCache
+
+
+def test_hit_after_set(tmp_path):
+    cache = GeocodeCache(path=tmp_path / "cache.sqlite3")
+    assert cache.get("zip:30328") is None
+    cache.set("zip:30328", [33.93, -84.38])
+    assert cache.get("zip:30328") == [33.93, -84.38]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = GeocodeCache(path=None, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = GeocodeCache(path=tmp_path / "cache.sqlite3", ttl_seconds=-1)
+    cache.set("zip:30328", [33.93, -84.38])
+    assert cache.get("zip:30328") is None
+
+
+def test_survives_restart(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    GeocodeCache(path=path).set("zip:30328", [33.93, -84.38])
+    cache = GeocodeCache(path=path)
+    assert cache.get("zip:30328") == [33.93, -84.38]
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_store_is_created_on_first_use(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = GeocodeCache(path=path)
+    assert not path.exists()
+    cache.get("zip:30328")
+    assert path.exists()
+
+
+def test_expired_rows_are_pruned_on_open(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    GeocodeCache(path=path, ttl_seconds=-1).set("zip:30328", [33.93, -84.38])
+    GeocodeCache(path=path).set("zip:98101", [47.61, -122.33])
+    with sqlite3.connect(str(path)) as db:
+        assert [row[0] for row in db.execute("SELECT key FROM geocode_cache")] == ["zip:98101"]
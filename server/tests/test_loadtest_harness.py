@@ -0,0 +1,40 @@
+import requests
+
+from benchmarks.loadtest.fakes import FakeAzureMaps, FakeSupabaseAuth
+from benchmarks.loadtest.run import percentile, summarize
+from utils.auth import TokenVerifier
+
+
+def test_fake_auth_tokens_verify_locally_through_jwks():
+    with FakeSupabaseAuth() as auth:
+        verifier = TokenVerifier(jwks_url=f"{auth.url}/auth/v1/.well-known/jwks.json")
+        user = verifier.verify_local(auth.mint_token("user-1", "golfer@example.com"))
+        assert (user.id, user.email) == ("user-1", "golfer@example.com")
+        assert verifier.stats()["jwks_keys"] == 1
+
+
+def test_fake_auth_user_endpoint():
+    with FakeSupabaseAuth() as auth:
+        token = auth.mint_token("user-2")
+        response = requests.get(f"{auth.url}/auth/v1/user", headers={"Authorization": f"Bearer {token}"})
+        assert response.json()["id"] == "user-2"
+        assert requests.get(f"{auth.url}/auth/v1/user", headers={"Authorization": "Bearer bad"}).status_code == 401
+
+
+def test_fake_azure_maps_answers_known_zips():
+    with FakeAzureMaps({"30328": (33.93, -84.38)}, latency_ms=0) as azure:
+        found = requests.get(azure.search_url, params={"query": "30328"}).json()["results"][0]
+        assert found["position"] == {"lat": 33.93, "lon": -84.38}
+        assert found["address"]["countryCode"] == "US"
+        assert requests.get(azure.search_url, params={"query": "99999"}).json() == {"results": []}
+        assert azure.requests == 2
+
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.50) == 0.050
+    assert percentile(values, 0.99) == 0.099
+    assert percentile([], 0.95) == 0.0
+    summary = summarize(values, errors=3, duration=10)
+    assert summary["requests"] == 100 and summary["throughput_rps"] == 10.0
+    assert summary["p95_ms"] == 95.0
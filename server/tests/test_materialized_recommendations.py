@@ -0,0 +1,139 @@
+import asyncio
+import json
+from contextlib import contextmanager
+
+from utils.materialized_recommendations import MaterializedRecommendations, rows_from_group
+
+
+class FakeCursor:
+    def __init__(self, log, rows=()):
+        self.log = log
+        self.rows = list(rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        self.log.append((query, params))
+
+    def executemany(self, query, rows):
+        self.log.extend((query, row) for row in rows)
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakePool:
+    """Just enough of ConnectionPool for the materializer."""
+
+    def __init__(self, fetchone=None, fetchall=()):
+        self._fetchone = fetchone
+        self._fetchall = list(fetchall)
+        self.executed = []
+
+    def fetchone(self, query, params):
+        self.executed.append((query, params))
+        return self._fetchone
+
+    def fetchall(self, query, params):
+        return self._fetchall
+
+    @contextmanager
+    def connection(self):
+        class Conn:
+            def cursor(conn, cursor_factory=None):
+                return FakeCursor(self.executed, self._fetchall)
+
+            def commit(conn):
+                pass
+        yield Conn()
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+
+def group(zip_code="30328", **extra):
+    result = {
+        "zip_code": zip_code, "radius": 25, "lat": 33.9, "lng": -84.4, "total": 2,
+        "results": [
+            {"user_id": "u1", "courses": [{"id": "c1", "score": 90.0}, {"id": "c2", "score": 80.0}]},
+            {"user_id": "u2", "error": "Profile not found"},
+        ],
+    }
+    result.update(extra)
+    return result
+
+
+def test_rows_carry_the_version_read_before_compute():
+    rows = rows_from_group(group(), {"u1": 3, "u2": 0}, 25)
+    assert [row[0] for row in rows] == ["u1", "u2"]
+    user_id, zip_code, radius, lat, lng, courses, club_ids, total, dirty, computed = rows[0]
+    assert json.loads(courses)[0]["id"] == "c1"
+    assert club_ids == ["c1", "c2"]
+    assert dirty == computed == 3
+    assert rows[1][6] == []
+
+
+def test_stored_courses_match_the_live_response():
+    masked = group(results=[{"user_id": "u1", "courses": [{"id": "c1", "score": 90.0, "feature_mask": 5}]}])
+    [row] = rows_from_group(masked, {"u1": 1}, 25)
+    assert json.loads(row[5]) == [{"id": "c1", "score": 90.0}]
+
+
+def test_failed_groups_are_not_stored():
+    assert rows_from_group({"zip_code": "00000", "error": "boom", "results": []}, {}, 25) == []
+
+
+def test_lookup_serves_fresh_list_prefix():
+    pool = FakePool(fetchone={"courses": [{"id": "c1"}, {"id": "c2"}], "total": 40})
+    store = MaterializedRecommendations(top_n=25, radius=25)
+    assert store.lookup(pool, "u1", "30328-1234", 25, 1) == {"courses": [{"id": "c1"}], "total": 40}
+    # Radius or limit outside what was materialized goes to live scoring
+    assert store.lookup(pool, "u1", "30328", 50, 1) is None
+    assert store.lookup(pool, "u1", "30328", 25, 100) is None
+    assert store.lookup(FakePool(), "u1", "30328", 25, 10) is None
+    assert store.stats()["hits"] == 1
+    assert store.stats()["misses"] == 3
+
+
+def test_lookup_uses_the_live_location_key():
+    pool = FakePool()
+    store = MaterializedRecommendations(top_n=25, radius=25)
+    for zip_code in ("30328-1234", " Atlanta,  GA ", "Atlantic City, NJ"):
+        store.lookup(pool, "u1", zip_code, 25, 10)
+    assert [params[1] for _, params in pool.executed] == ["30328", "atlanta, ga", "atlantic city, nj"]
+
+
+def test_refresh_recomputes_pending_users():
+    pool = FakePool(fetchall=[
+        {"user_id": "u1", "zip_code": "30328", "dirty_version": 2},
+        {"user_id": "u2", "zip_code": "30328", "dirty_version": 0},
+    ])
+    requested = []
+
+    async def compute(items, limit):
+        requested.extend(items)
+        yield group()
+
+    store = MaterializedRecommendations(top_n=10, radius=25)
+    assert asyncio.run(store.refresh(pool, compute)) == 2
+    assert requested == [
+        {"user_id": "u1", "zip_code": "30328", "radius": 25},
+        {"user_id": "u2", "zip_code": "30328", "radius": 25},
+    ]
+    claim, stores = pool.executed[:2], pool.executed[2:]
+    assert "SKIP LOCKED" in claim[1][0]
+    assert [params[0] for _, params in stores] == ["u1", "u2"]
+    assert all("claimed_until = NULL" in query for query, _ in stores)
+    assert store.stats()["recomputed"] == 2
+
+
+def test_refresh_with_nothing_pending():
+    async def compute(items, limit):
+        raise AssertionError("nothing to compute")
+        yield
+
+    assert asyncio.run(MaterializedRecommendations().refresh(FakePool(), compute)) == 0
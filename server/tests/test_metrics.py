@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from utils.metrics import MetricsRegistry, STAGE_DURATION, current_route, finish_after_body, route_template, stage
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "/a")
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'latency_seconds_sum{route="/a"} 4.05' in text
+    assert 'latency_seconds_count{route="/a"} 4' in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_gauge_and_collectors():
+    registry = MetricsRegistry()
+    gauge = registry.gauge("in_flight", "In flight.", ("route",))
+    gauge.inc("/a")
+    gauge.inc("/a")
+    gauge.dec("/a")
+    registry.add_collector(lambda: [("hits_total", "counter", "Hits.", [({"cache": 'say "hi"'}, 3)])])
+    text = registry.render()
+    assert 'in_flight{route="/a"} 1.0' in text
+    assert "# TYPE hits_total counter" in text
+    assert 'hits_total{cache="say \\"hi\\""} 3.0' in text
+
+
+def test_stage_records_against_current_route():
+    token = current_route.set("/api/test-stage")
+    try:
+        with stage("scoring"):
+            pass
+    finally:
+        current_route.reset(token)
+    assert 'request_stage_duration_seconds_count{route="/api/test-stage",stage="scoring"} 1' in "\n".join(
+        STAGE_DURATION.render()
+    )
+
+
+def test_route_template_uses_path_templates():
+    app = FastAPI()
+
+    @app.get("/api/clubs/{club_id}")
+    def club(club_id: str):
+        return {}
+
+    def scope(path):
+        return {"type": "http", "method": "GET", "path": path, "root_path": "", "headers": []}
+
+    assert route_template(app, scope("/api/clubs/123")) == "/api/clubs/{club_id}"
+    assert route_template(app, scope("/nowhere")) == "unmatched"
+
+
+def test_const_labels_are_added_to_every_sample():
+    registry = MetricsRegistry({"worker": "123"})
+    registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(1.0,)).observe(0.5, "/a")
+    registry.gauge("in_flight", "In flight.").set(2)
+    registry.add_collector(lambda: [("hits_total", "counter", "Hits.", [({"cache": "geo"}, 3)])])
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a",worker="123",le="1.0"} 1' in text
+    assert 'latency_seconds_count{route="/a",worker="123"} 1' in text
+    assert 'in_flight{worker="123"} 2' in text
+    assert 'hits_total{cache="geo",worker="123"} 3.0' in text
+
+
+def test_finish_after_body_waits_for_streamed_body():
+    async def lines():
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield f"{i}\n".encode()
+
+    finished = []
+    start = time.perf_counter()
+    response = finish_after_body(StreamingResponse(lines()), lambda status: finished.append(
+        (status, time.perf_counter() - start)
+    ))
+    assert finished == []
+
+    async def consume():
+        return [chunk async for chunk in response.body_iterator]
+
+    assert asyncio.run(consume()) == [b"0\n", b"1\n", b"2\n"]
+    assert finished[0][0] == 200
+    assert finished[0][1] >= 0.03
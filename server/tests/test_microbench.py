@@ -0,0 +1,18 @@
+from benchmarks.microbench import CASES, compare, time_case
+
+
+def test_compare_flags_only_slowdowns_past_threshold():
+    results = {"a": {"min_us": 125.0}, "b": {"min_us": 115.0}, "c": {"min_us": 50.0}, "new": {"min_us": 1.0}}
+    baseline = {"a": {"min_us": 100.0}, "b": {"min_us": 100.0}, "c": {"min_us": 100.0}}
+    rows = {name: (change, regressed) for name, _, _, change, regressed in compare(results, baseline, 0.2)}
+    assert rows["a"] == (0.25, True)
+    assert rows["b"][1] is False and rows["c"][1] is False
+    assert rows["new"] == (None, False)
+
+
+def test_every_case_runs():
+    for name, (factory, args) in CASES.items():
+        if "n=10000" in name:
+            continue
+        median, fastest = time_case(factory(*args), repeat=2, min_time=0)
+        assert 0 < fastest <= median, name
@@ -0,0 +1,22 @@
+import pytest
+
+from utils.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(12.345678901234567, '8f14e45f-ceea-467f-a0e6-3c8f2a1b9d10')
+    assert decode_cursor(token) == (12.345678901234567, '8f14e45f-ceea-467f-a0e6-3c8f2a1b9d10')
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-cursor', encode_cursor(1, 'x')[:-3]])
+def test_malformed_cursor(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_next_cursor():
+    rows = [{'id': str(i), 'distance_miles': float(i)} for i in range(4)]
+    page, cursor = next_cursor(rows, 3)
+    assert page == rows[:3]
+    assert decode_cursor(cursor) == (2.0, '2')
+    assert next_cursor(rows, 4) == (rows, None)
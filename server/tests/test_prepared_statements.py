@@ -0,0 +1,126 @@
+import re
+from contextlib import contextmanager
+
+import pytest
+
+from utils.find_clubs_query import FIND_CLUBS, FIND_CLUBS_AFTER, find_clubs_statement
+from utils.prepared_statements import PreparedStatement, PreparedStatementCache
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+        self.last = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        self.last = sql
+
+    def fetchone(self):
+        return {"QUERY PLAN": [{"Plan": {}, "Planning Time": 0.5}]}
+
+    def fetchall(self):
+        return [{"id": 1}]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.info = {}
+        self.executed = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self.executed)
+
+
+class FakePool:
+    def __init__(self, connections):
+        self.connections = connections
+        self.next = 0
+
+    @contextmanager
+    def connection(self):
+        conn = self.connections[self.next % len(self.connections)]
+        self.next += 1
+        yield conn
+
+
+STATEMENT = PreparedStatement("clubs_near", "SELECT * FROM golfclub WHERE id = $1", 1)
+
+
+def test_prepares_once_per_connection():
+    first, second = FakeConnection(), FakeConnection()
+    pool = FakePool([first, second])
+    cache = PreparedStatementCache()
+    for _ in range(6):
+        assert cache.fetchall(pool, STATEMENT, [1]) == [{"id": 1}]
+
+    for conn in (first, second):
+        assert sum(sql.startswith("PREPARE clubs_near") for sql in conn.executed) == 1
+        assert sum(sql.startswith("EXECUTE clubs_near") for sql in conn.executed) == 3
+    stats = cache.stats()
+    assert stats["prepares"] == 2
+    assert stats["hits"] == 4
+    # Planning time is measured once, for the first connection
+    assert sum(sql.startswith("EXPLAIN") for sql in first.executed + second.executed) == 1
+    assert stats["planning_ms_saved"] == pytest.approx(2.0)
+
+
+def test_reconnected_connection_prepares_again():
+    conn = FakeConnection()
+    pool = FakePool([conn])
+    cache = PreparedStatementCache()
+    cache.fetchall(pool, STATEMENT, [1])
+    conn.info.clear()  # what the pool does when it recycles the connection
+    cache.fetchall(pool, STATEMENT, [1])
+    assert cache.stats()["prepares"] == 2
+
+
+def test_wrong_param_count_is_rejected():
+    with pytest.raises(ValueError):
+        PreparedStatementCache().fetchall(FakePool([FakeConnection()]), STATEMENT, [1, 2])
+
+
+def test_find_clubs_shapes_are_canonical():
+    plain, params = find_clubs_statement(-84.38, 33.93, 25, 26)
+    assert plain is FIND_CLUBS
+    assert params == [-84.38, 33.93, 25, None, None, None, None, 0, 26, 0]
+
+    filtered, params = find_clubs_statement(
+        -84.38, 33.93, 25, 26, offset=50, price_tier="$$", number_of_holes="", required_mask=5
+    )
+    assert filtered is FIND_CLUBS
+    assert params == [-84.38, 33.93, 25, "$$", None, None, None, 5, 26, 50]
+
+    keyset, params = find_clubs_statement(-84.38, 33.93, 25, 26, offset=50, after=(3.2, "abc"))
+    assert keyset is FIND_CLUBS_AFTER
+    assert params[-3:] == [0, 3.2, "abc"]
+
+
+@pytest.mark.parametrize("statement", [FIND_CLUBS, FIND_CLUBS_AFTER])
+def test_placeholders_match_param_count(statement):
+    numbers = {int(n) for n in re.findall(r"\$(\d+)", statement.sql)}
+    assert numbers == set(range(1, statement.param_count + 1))
+    assert "%" not in statement.sql
+
+
+def test_find_clubs_prepared_matches_ad_hoc(test_db_pool):
+    cache = PreparedStatementCache()
+    statement, params = find_clubs_statement(-84.38, 33.93, 100, 50, required_mask=1)
+    prepared = cache.fetchall(test_db_pool, statement, params)
+    ad_hoc = test_db_pool.fetchall("""
+        SELECT gc.global_id as id
+        FROM golfclub gc
+        WHERE ST_DWithin(gc.geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s * 1609.34)
+        AND gc.driving_range = TRUE
+        ORDER BY ST_Distance(gc.geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography), gc.global_id
+        LIMIT 50
+    """, (-84.38, 33.93, 100, -84.38, 33.93))
+    assert [row["id"] for row in prepared] == [row["id"] for row in ad_hoc]
+    cache.fetchall(test_db_pool, statement, params)
+    assert cache.stats()["hits"] >= 1
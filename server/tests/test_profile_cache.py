@@ -0,0 +1,48 @@
+from utils.profile_cache import SCORING_PROFILE_COLUMNS, ProfileCache
+
+
+def profile_row(user_id="user-1", price="$$", difficulty="Medium"):
+    return {"id": user_id, "email": "golfer@example.com", "first_name": "Pat",
+            "preferred_price_range": price, "preferred_difficulty": difficulty}
+
+
+def test_fill_projects_scoring_columns():
+    cache = ProfileCache()
+    assert cache.get("user-1") is None
+    profile = cache.fill(profile_row())
+    assert set(profile) == set(SCORING_PROFILE_COLUMNS) | {"version"}
+    assert cache.get("user-1") is profile
+    assert cache.stats()["hits"] == 1
+
+
+def test_write_through_changes_version():
+    cache = ProfileCache()
+    before = cache.fill(profile_row())
+    after = cache.put(profile_row(price="$$$"))
+    assert after["version"] != before["version"]
+    assert cache.get("user-1")["preferred_price_range"] == "$$$"
+
+
+def test_version_is_the_same_in_every_process():
+    # Two workers (or a restart) loading the same row agree on its version
+    assert ProfileCache().fill(profile_row())["version"] == ProfileCache().fill(profile_row())["version"]
+    assert ProfileCache().fill(profile_row())["version"] != ProfileCache().fill(profile_row("user-2"))["version"]
+
+
+def test_fill_keeps_concurrent_write():
+    cache = ProfileCache()
+    written = cache.put(profile_row(price="$$$"))
+    # A read that loaded the old row before the write must not overwrite it
+    assert cache.fill(profile_row(price="$")) is written
+
+
+def test_expired_and_evicted_entries_miss():
+    cache = ProfileCache(ttl_seconds=-1)
+    cache.fill(profile_row())
+    assert cache.get("user-1") is None
+
+    cache = ProfileCache(max_entries=1)
+    cache.fill(profile_row("user-1"))
+    cache.fill(profile_row("user-2"))
+    assert cache.get("user-1") is None
+    assert cache.get("user-2") is not None
@@ -0,0 +1,64 @@
+import pytest
+
+from utils.club_queries import CANDIDATE_CLUBS_QUERY, SEARCH_CLUBS_AFTER, SEARCH_CLUBS_QUERY, scored_clubs_query
+from utils.find_clubs_query import FIND_CLUBS, FIND_CLUBS_AFTER, find_clubs_statement
+from utils.recommendation_engine import recommendation_score_sql
+
+LNG, LAT, RADIUS = -84.38, 33.93, 25
+SCORE_SQL, SCORE_PARAMS = recommendation_score_sql({'preferred_price_range': '$$', 'preferred_difficulty': 'Easy'})
+
+# (label, sql with %s placeholders, params)
+RADIUS_QUERIES = [
+    ("candidates", CANDIDATE_CLUBS_QUERY, [LNG, LAT, LNG, LAT, RADIUS]),
+    ("scored", scored_clubs_query(SCORE_SQL), SCORE_PARAMS + [LNG, LAT, LNG, LAT, RADIUS, 25]),
+    ("search", SEARCH_CLUBS_QUERY + " ORDER BY distance_miles ASC, id ASC",
+     [LNG, LAT, LNG, LAT, RADIUS]),
+    ("search page", SEARCH_CLUBS_QUERY + SEARCH_CLUBS_AFTER + " ORDER BY distance_miles ASC, id ASC LIMIT 26",
+     [LNG, LAT, LNG, LAT, RADIUS, LNG, LAT, 1.5, 0]),
+]
+
+
+@pytest.mark.parametrize("sql", [sql for _, sql, _ in RADIUS_QUERIES] + [FIND_CLUBS.sql, FIND_CLUBS_AFTER.sql])
+def test_radius_queries_filter_on_indexed_geography(sql):
+    assert "ST_DWithin(" in sql and "gc.geog" in sql
+    assert "geom::geography" not in sql
+    assert "ST_MakePoint(longitude, latitude)" not in sql
+
+
+def seq_scans(plan):
+    """Relations read with a sequential scan anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def explain(conn, sql, params):
+    with conn.cursor() as cursor:
+        # With seq scans priced out, one can only remain if no index can serve the filter
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        return cursor.fetchone()[0][0]["Plan"]
+
+
+@pytest.mark.parametrize("label, sql, params", RADIUS_QUERIES, ids=[label for label, _, _ in RADIUS_QUERIES])
+def test_radius_query_uses_index(test_db_pool, label, sql, params):
+    with test_db_pool.connection() as conn:
+        plan = explain(conn, sql, params)
+    assert "golfclub" not in seq_scans(plan), f"{label} scans golfclub sequentially"
+
+
+@pytest.mark.parametrize("after", [None, (1.5, "00000000-0000-0000-0000-000000000000")])
+def test_find_clubs_statements_use_index(test_db_pool, after):
+    statement, params = find_clubs_statement(LNG, LAT, RADIUS, 26, after=after, required_mask=1)
+    with test_db_pool.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"PREPARE plan_check AS {statement.sql}")
+        try:
+            plan = explain(conn, statement.execute_sql().replace(statement.name, "plan_check"), params)
+        finally:
+            with conn.cursor() as cursor:
+                cursor.execute("DEALLOCATE plan_check")
+    assert "golfclub" not in seq_scans(plan)
@@ -0,0 +1,117 @@
+import logging
+import re
+from pathlib import Path
+
+import pytest
+
+from utils.recommendation_engine import (
+    FEATURE_FIELDS,
+    PRUNE_MIN_COURSES,
+    ScoringDiagnostics,
+    calculate_recommendation_score,
+    feature_mask,
+    score_clubs,
+    score_courses,
+    scoring_diagnostics,
+    top_scored_courses,
+)
+
+
+@pytest.mark.parametrize('preferences', [
+    {'preferred_price_range': '$$', 'preferred_difficulty': 'hard'},
+    {'preferred_price_range': None, 'preferred_difficulty': 'Easy'},
+    {'preferred_price_range': '$', 'preferred_difficulty': None},
+    {'preferred_price_range': '', 'preferred_difficulty': ''},
+])
+def test_batch_scores_match_scalar(preferences, make_clubs):
+    clubs = make_clubs(5000)
+    expected = [calculate_recommendation_score(club, preferences) for club in clubs]
+    assert score_clubs(clubs, preferences).tolist() == expected
+
+
+def test_missing_distance_scores_zero(make_clubs):
+    clubs = make_clubs(3)
+    clubs[1]['distance_miles'] = None
+    preferences = {'preferred_price_range': '$$', 'preferred_difficulty': 'hard'}
+    scores = score_clubs(clubs, preferences)
+    assert scores[1] == calculate_recommendation_score(clubs[1], preferences) == 0
+
+
+def test_scoring_does_not_log_by_default(caplog, make_clubs):
+    caplog.set_level(logging.DEBUG, logger='utils.recommendation_engine')
+    preferences = {'id': 'u1', 'preferred_price_range': '$$', 'preferred_difficulty': 'hard'}
+    for club in make_clubs(50):
+        calculate_recommendation_score(club, preferences)
+    assert caplog.records == []
+
+
+def test_sampling_by_user_id_and_rate(caplog, make_clubs):
+    caplog.set_level(logging.INFO, logger='utils.recommendation_engine')
+    clubs = make_clubs(10)
+    try:
+        scoring_diagnostics.configure(user_ids=['u1'])
+        for club in clubs:
+            calculate_recommendation_score(club, {'id': 'u1', 'preferred_price_range': None, 'preferred_difficulty': None})
+            calculate_recommendation_score(club, {'id': 'u2', 'preferred_price_range': None, 'preferred_difficulty': None})
+        assert len(caplog.records) == 10
+
+        caplog.clear()
+        # The rate counts requests, not clubs: 2 of 10 requests log every club
+        scoring_diagnostics.configure(sample_every=5)
+        for _ in range(10):
+            score_courses(clubs, {'id': 'u2', 'preferred_price_range': None, 'preferred_difficulty': None})
+        assert len(caplog.records) == 2 * len(clubs)
+    finally:
+        scoring_diagnostics.configure()
+
+
+def test_score_courses_records_request_counters(make_clubs):
+    diagnostics = ScoringDiagnostics()
+    assert diagnostics.enabled is False
+    before = scoring_diagnostics.stats()
+    scored = score_courses(make_clubs(7), {'preferred_price_range': '$', 'preferred_difficulty': None})
+    after = scoring_diagnostics.stats()
+    assert all('score' in course for course in scored)
+    assert after['requests'] == before['requests'] + 1
+    assert after['clubs_scored'] == before['clubs_scored'] + 7
+
+
+@pytest.mark.parametrize('limit', [1, 5, 25, 500, 5000])
+def test_top_scored_courses_matches_full_sort(limit, make_clubs):
+    clubs = make_clubs(2000, seed=3)
+    preferences = {'preferred_price_range': '$$', 'preferred_difficulty': 'hard'}
+    expected = sorted(score_courses(clubs, preferences), key=lambda c: c['score'], reverse=True)[:limit]
+    assert top_scored_courses(clubs, preferences, limit) == expected
+
+
+def test_top_scored_courses_prunes_far_clubs(make_clubs):
+    clubs = make_clubs(2000, seed=4)
+    preferences = {'preferred_price_range': '$$', 'preferred_difficulty': 'hard'}
+    before = scoring_diagnostics.stats()['clubs_pruned']
+    top_scored_courses(clubs, preferences, 5)
+    assert scoring_diagnostics.stats()['clubs_pruned'] > before
+
+    # Short lists skip the bound, which costs about as much as a score
+    before = scoring_diagnostics.stats()['clubs_pruned']
+    top_scored_courses(clubs[:PRUNE_MIN_COURSES - 1], preferences, 5)
+    assert scoring_diagnostics.stats()['clubs_pruned'] == before
+
+
+def test_feature_mask_matches_migration_bit_order():
+    migration = (Path(__file__).resolve().parent.parent / "migrations" / "003_golfclub_feature_mask.sql").read_text()
+    bits = dict(re.findall(r"WHEN (\w+) THEN (\d+)", migration))
+    assert {field: 1 << bit for bit, field in enumerate(FEATURE_FIELDS)} == {f: int(v) for f, v in bits.items()}
+
+
+@pytest.mark.parametrize('preferences', [
+    {'preferred_price_range': '$$', 'preferred_difficulty': 'hard'},
+    {'preferred_price_range': None, 'preferred_difficulty': None},
+])
+def test_stored_feature_mask_scores_like_boolean_fields(preferences, make_clubs):
+    for club in make_clubs(300, seed=11):
+        stored = {**club, 'feature_mask': feature_mask(club)}
+        assert calculate_recommendation_score(stored, preferences) == calculate_recommendation_score(club, preferences)
+    clubs = make_clubs(300, seed=11)
+    with_masks = [{**club, 'feature_mask': feature_mask(club)} for club in clubs]
+    assert list(score_clubs(with_masks, preferences)) == list(score_clubs(clubs, preferences))
+
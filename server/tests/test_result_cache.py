@@ -0,0 +1,83 @@
+from utils.result_cache import QueryResultCache, bucket_radius
+
+
+def club(club_id, distance):
+    return {"id": club_id, "club_name": f"Club {club_id}", "distance_miles": distance}
+
+
+def test_bucket_radius():
+    assert bucket_radius(3) == 5
+    assert bucket_radius(25) == 25
+    assert bucket_radius(26) == 50
+    assert bucket_radius(5000) == 5000
+
+
+def test_key_normalization():
+    filters = {"driving_range": True, "putting_green": True, "restaurant": None}
+    a = QueryResultCache.key("30328", 20, 25, boolean_filters=filters)
+    b = QueryResultCache.key("30328-1234", 25, 25, boolean_filters={"putting_green": True, "driving_range": True})
+    assert a == b
+    assert a != QueryResultCache.key("30328", 20, 25, boolean_filters={"driving_range": True})
+    assert a != QueryResultCache.key("30328", 20, 25, price_tier="$$", boolean_filters=filters)
+
+
+def test_free_text_locations_get_their_own_keys():
+    atlanta = QueryResultCache.key("Atlanta, GA", 25, 25)
+    assert atlanta != QueryResultCache.key("Atlantic City, NJ", 25, 25)
+    assert atlanta == QueryResultCache.key("  atlanta,   GA ", 25, 25)
+    # Only real ZIP+4 input is cut to the 5-digit ZIP
+    assert QueryResultCache.key("303281", 25, 25) != QueryResultCache.key("30328", 25, 25)
+
+
+def test_hit_after_set():
+    cache = QueryResultCache()
+    key = QueryResultCache.key("30328", 25, 10)
+    assert cache.get(key) is None
+    cache.set(key, [club("a", 1.0)], 33.93, -84.38, 25)
+    assert cache.get(key) == [club("a", 1.0)]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_invalidate_club_drops_only_entries_containing_it():
+    cache = QueryResultCache()
+    cache.set("k1", [club("a", 1.0), club("b", 2.0)], 33.93, -84.38, 25)
+    cache.set("k2", [club("c", 1.0)], 33.93, -84.38, 25)
+    assert cache.invalidate_club("b") == 1
+    assert cache.get("k1") is None
+    assert cache.get("k2") == [club("c", 1.0)]
+
+
+def test_invalidate_location_drops_covering_entries():
+    cache = QueryResultCache()
+    cache.set("atlanta", [club("a", 1.0)], 33.93, -84.38, 25)
+    cache.set("seattle", [club("b", 1.0)], 47.61, -122.33, 25)
+    # A new club a few miles from the Atlanta center
+    assert cache.invalidate_location(33.98, -84.40) == 1
+    assert cache.get("atlanta") is None
+    assert cache.get("seattle") == [club("b", 1.0)]
+
+
+def test_byte_bound_evicts_least_recently_used():
+    rows = [club(str(i), float(i)) for i in range(20)]
+    probe = QueryResultCache()
+    probe.set("probe", rows, 0, 0, 5)
+    entry_bytes = probe.stats()["bytes"]
+
+    cache = QueryResultCache(max_bytes=entry_bytes * 2)
+    cache.set("k1", rows, 0, 0, 5)
+    cache.set("k2", rows, 0, 0, 5)
+    cache.get("k1")
+    cache.set("k3", rows, 0, 0, 5)
+    assert cache.get("k2") is None
+    assert cache.get("k1") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= entry_bytes * 2
+
+
+def test_expired_entries_miss():
+    cache = QueryResultCache(ttl_seconds=-1)
+    cache.set("k", [club("a", 1.0)], 0, 0, 5)
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,55 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import numpy as np
+import pytest
+
+from utils.club_queries import CLUB_DETAIL_LAYOUT, FIND_CLUBS_LAYOUT
+from utils.serialization import FastJSONResponse, RowLayout, dumps
+
+
+def test_dumps_handles_database_types():
+    club_id = uuid.uuid4()
+    content = {
+        "id": club_id,
+        "price": decimal.Decimal("42.50"),
+        "updated_at": datetime.datetime(2024, 5, 1, 12, 30),
+        "score": np.float64(87.25),
+        "scores": np.array([1.0, 2.0]),
+    }
+    assert json.loads(dumps(content)) == {
+        "id": str(club_id),
+        "price": 42.5,
+        "updated_at": "2024-05-01T12:30:00",
+        "score": 87.25,
+        "scores": [1.0, 2.0],
+    }
+
+
+def test_fast_json_response_body():
+    response = FastJSONResponse({"results": [{"id": 1}], "next_cursor": None})
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"results": [{"id": 1}], "next_cursor": None}
+
+
+def test_layout_projection():
+    layout = RowLayout(["id", "club_name", "distance_miles"])
+    assert layout.project(None) is layout
+    projected = layout.project("distance_miles, id,id")
+    assert projected.fields == ("distance_miles", "id")
+    assert projected.pick([{"id": 1, "club_name": "A", "distance_miles": 2.0}]) == [{"distance_miles": 2.0, "id": 1}]
+    with pytest.raises(ValueError, match="Unknown fields: geom"):
+        layout.project("id,geom")
+
+
+def test_tuple_rows_map_onto_layout():
+    layout = RowLayout(["id", "club_name"])
+    assert layout.to_dicts([(1, "A"), (2, "B")]) == [{"id": 1, "club_name": "A"}, {"id": 2, "club_name": "B"}]
+    assert layout.select_sql("gc") == "gc.id, gc.club_name"
+
+
+def test_club_layouts_have_cursor_fields_and_no_geometry():
+    assert {"id", "distance_miles"} <= set(FIND_CLUBS_LAYOUT.fields)
+    assert not {"geom", "geog"} & set(CLUB_DETAIL_LAYOUT.fields)
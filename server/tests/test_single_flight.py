@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    flight = SingleFlight("test")
+    upstream_calls = []
+
+    async def lookup(zip_code):
+        upstream_calls.append(zip_code)
+        await asyncio.sleep(0.01)
+        return zip_code * 2
+
+    async def main():
+        return await asyncio.gather(*(flight.do("30328", lookup, "30328") for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert results == ["3032830328"] * 10
+    assert upstream_calls == ["30328"]
+    assert flight.stats() == {"calls": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_key_released_after_completion():
+    flight = SingleFlight("test")
+
+    async def lookup():
+        return 1
+
+    async def main():
+        await flight.do("k", lookup)
+        await flight.do("k", lookup)
+
+    asyncio.run(main())
+    assert flight.stats()["calls"] == 2
+
+
+def test_errors_propagate_to_every_waiter():
+    flight = SingleFlight("test")
+
+    async def lookup():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", lookup) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    with pytest.raises(ValueError):
+        asyncio.run(flight.do("k", lookup))
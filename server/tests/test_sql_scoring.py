@@ -0,0 +1,33 @@
+from utils.recommendation_engine import calculate_recommendation_score, recommendation_score_sql
+
+PREFERENCES = [
+    {'preferred_price_range': '$$', 'preferred_difficulty': 'medium'},
+    {'preferred_price_range': None, 'preferred_difficulty': 'Hard'},
+    {'preferred_price_range': '$', 'preferred_difficulty': None},
+    {'preferred_price_range': '', 'preferred_difficulty': ''},
+]
+
+
+def test_sql_scores_match_python(test_db_pool):
+    lng, lat, radius = -84.38, 33.93, 100
+    for preferences in PREFERENCES:
+        score_sql, score_params = recommendation_score_sql(preferences)
+        rows = test_db_pool.fetchall(f"""
+            SELECT gc.*, {score_sql} AS score
+            FROM (
+                SELECT gc.*,
+                    ST_Distance(gc.geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) / 1609.34
+                        as distance_miles
+                FROM golfclub gc
+                WHERE ST_DWithin(gc.geom::geography, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s * 1609.34)
+            ) gc
+        """, score_params + [lng, lat, lng, lat, radius])
+        assert rows
+        for row in rows:
+            assert round(row['score'], 2) == calculate_recommendation_score(row, preferences)
+
+
+def test_sql_expression_params_follow_placeholders():
+    score_sql, score_params = recommendation_score_sql({'preferred_price_range': '$$', 'preferred_difficulty': 'Easy'})
+    assert score_sql.count('%s') == len(score_params) == 4
+    assert score_params == ['$$', '$$', 'Easy', 'Easy']
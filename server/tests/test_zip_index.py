@@ -0,0 +1,32 @@
+from utils.zip_index import ZipCentroidIndex, build_index, location_key
+
+
+def test_lookup(tmp_path):
+    path = tmp_path / "zips.bin"
+    count = build_index([("30328", 33.93, -84.38), ("00501", 40.81, -73.04), ("bogus", 0, 0)], path)
+    assert count == 2
+
+    index = ZipCentroidIndex(path)
+    assert len(index) == 2
+    lat, lng = index.lookup("30328")
+    assert abs(lat - 33.93) < 1e-4
+    assert abs(lng + 84.38) < 1e-4
+    assert index.lookup("00501-1234") is not None
+    assert index.lookup("99999") is None
+    assert index.lookup("abc") is None
+    # Only ZIP and ZIP+4 are looked up; anything else goes to the geocoder
+    assert index.lookup("303281") is None
+    assert index.lookup("30328abc") is None
+    assert index.lookup("30328-12") is None
+    assert index.lookup(" 30328 ") is not None
+
+
+def test_missing_index_returns_none(tmp_path):
+    assert ZipCentroidIndex.load_if_exists(tmp_path / "missing.bin") is None
+
+
+def test_location_key():
+    assert location_key(" 30328-1234 ") == "30328"
+    assert location_key("00501") == "00501"
+    assert location_key("Atlanta,  GA") == "atlanta, ga"
+    assert location_key("303281") == "303281"
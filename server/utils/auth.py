@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import requests
+from jose import jwt, jwk
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+logger = logging.getLogger(__name__)
+
+SYMMETRIC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+
+class InvalidToken(Exception):
+    """The token is definitely not valid (bad signature, expired, wrong audience)."""
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """The parts of a Supabase user the endpoints use, built from verified claims."""
+    id: str
+    email: str | None = None
+    claims: dict = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def from_claims(cls, claims):
+        return cls(id=claims["sub"], email=claims.get("email"), claims=claims)
+
+
+class TokenVerifier:
+    """
+    Verifies Supabase access tokens locally.
+    HS* tokens are checked against the project JWT secret and RS*/ES* tokens
+    against the project JWKS, which is fetched once and refreshed when an
+    unknown key id shows up, at most once per jwks_min_refresh_seconds so
+    tokens with made-up key ids cannot make every request fetch. Decoded users
+    are cached until the token expires. When a token cannot be checked locally
+    (no key configured, unknown key, JWKS unreachable) verify_local returns
+    None and the caller falls back to verify_remote, which asks Supabase.
+
+    The JWKS fetch is a blocking HTTP call: async callers use
+    verify_local(token, fetch_keys=False), which never fetches and returns
+    None when a fetch is due, and run verify() in a thread in that case.
+    """
+
+    def __init__(self, jwt_secret=None, jwks_url=None, audience="authenticated",
+                 remote=None, max_entries=10000, jwks_ttl_seconds=3600, leeway_seconds=0,
+                 jwks_min_refresh_seconds=60):
+        self.jwt_secret = jwt_secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.remote = remote
+        self.max_entries = max_entries
+        self.jwks_ttl_seconds = jwks_ttl_seconds
+        self.leeway_seconds = leeway_seconds
+        self.jwks_min_refresh_seconds = jwks_min_refresh_seconds
+        self._users = OrderedDict()
+        self._keys = {}
+        self._keys_fetched_at = 0.0
+        self._refresh_attempted_at = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._cache_hits = 0
+        self._local = 0
+        self._remote = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_env(cls, remote=None):
+        """Build the verifier from SUPABASE_JWT_SECRET / SUPABASE_JWKS_URL / SUPABASE_URL."""
+        supabase_url = os.getenv("SUPABASE_URL")
+        jwks_url = os.getenv("SUPABASE_JWKS_URL")
+        if not jwks_url and supabase_url:
+            jwks_url = f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        return cls(
+            jwt_secret=os.getenv("SUPABASE_JWT_SECRET") or None,
+            jwks_url=jwks_url,
+            audience=os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated"),
+            remote=remote,
+            max_entries=int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000")),
+        )
+
+    def verify_local(self, token, fetch_keys=True):
+        """
+        Return the AuthenticatedUser for token, or None when it can only be
+        checked remotely (or, with fetch_keys=False, when the JWKS needs a
+        fetch first). Raises InvalidToken for tokens that are definitely bad.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._users.get(token)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > now:
+                    self._users.move_to_end(token)
+                    self._cache_hits += 1
+                    return user
+                del self._users[token]
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            self._reject()
+            raise InvalidToken("Malformed token")
+
+        key = self._key_for(header, fetch_keys)
+        if key is None:
+            return None
+
+        try:
+            claims = jwt.decode(
+                token, key, algorithms=[header["alg"]], audience=self.audience,
+                options={"leeway": self.leeway_seconds},
+            )
+        except ExpiredSignatureError:
+            self._reject()
+            raise InvalidToken("Token has expired")
+        except (JWTClaimsError, JWTError) as e:
+            self._reject()
+            raise InvalidToken(str(e))
+
+        if "sub" not in claims or "exp" not in claims:
+            self._reject()
+            raise InvalidToken("Token is missing sub or exp")
+
+        user = AuthenticatedUser.from_claims(claims)
+        with self._lock:
+            self._local += 1
+            self._users[token] = (user, float(claims["exp"]))
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+        return user
+
+    def verify_remote(self, token):
+        """Ask Supabase for the user; used only when local verification is inconclusive."""
+        if self.remote is None:
+            self._reject()
+            raise InvalidToken("Token cannot be verified")
+        with self._lock:
+            self._remote += 1
+        try:
+            return self.remote(token)
+        except Exception as e:
+            self._reject()
+            raise InvalidToken(str(e))
+
+    def verify(self, token):
+        user = self.verify_local(token)
+        if user is None:
+            user = self.verify_remote(token)
+        return user
+
+    def _reject(self):
+        with self._lock:
+            self._rejected += 1
+
+    def _key_for(self, header, fetch_keys=True):
+        alg = header.get("alg")
+        if alg in SYMMETRIC_ALGORITHMS:
+            return self.jwt_secret
+        if alg not in ASYMMETRIC_ALGORITHMS or not self.jwks_url:
+            return None
+        kid = header.get("kid")
+        key = self._keys.get(kid)
+        stale = time.time() - self._keys_fetched_at > self.jwks_ttl_seconds
+        if (key is None or stale) and self._refresh_due():
+            if not fetch_keys:
+                return None
+            self._refresh_keys()
+            key = self._keys.get(kid)
+        # A stale key stays usable until the next refresh is allowed
+        return key
+
+    def _refresh_due(self):
+        return (self._refresh_attempted_at is None
+                or time.time() - self._refresh_attempted_at >= self.jwks_min_refresh_seconds)
+
+    def _refresh_keys(self):
+        with self._refresh_lock:
+            # Another thread may have refreshed while this one waited
+            if not self._refresh_due():
+                return
+            self._refresh_attempted_at = time.time()
+            self._fetch_keys()
+
+    def _fetch_keys(self):
+        try:
+            response = requests.get(self.jwks_url, timeout=5)
+            response.raise_for_status()
+            keys = {}
+            for key in response.json().get("keys", []):
+                try:
+                    keys[key.get("kid")] = jwk.construct(key)
+                except JWTError as e:
+                    logger.warning(f"Skipping unusable JWKS key {key.get('kid')}: {e}")
+            self._keys = keys
+            self._keys_fetched_at = time.time()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Could not fetch JWKS from {self.jwks_url}: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_users": len(self._users),
+                "cache_hits": self._cache_hits,
+                "local_verifications": self._local,
+                "remote_verifications": self._remote,
+                "rejected": self._rejected,
+                "jwks_keys": len(self._keys),
+            }
@@ -0,0 +1,84 @@
+"""
+Recommendations for many (user, ZIP) pairs at once.
+
+Requests are grouped by (location, radius); each group geocodes once, fetches its
+candidate clubs once, and scores every user in the group against that shared
+candidate set. Groups run concurrently and are yielded as they finish.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+
+from utils.recommendation_engine import top_scored_for_profiles
+from utils.zip_index import location_key
+
+logger = logging.getLogger(__name__)
+
+
+def group_requests(items, default_radius=25):
+    """Group {'user_id', 'zip_code', 'radius'} items by (location_key, radius), keeping order."""
+    groups = OrderedDict()
+    for item in items:
+        key = (location_key(item['zip_code']), int(item.get('radius') or default_radius))
+        groups.setdefault(key, []).append(str(item['user_id']))
+    return groups
+
+
+async def stream_batch_recommendations(items, resolve_location, fetch_candidates, load_profiles,
+                                       limit=25, concurrency=4, default_radius=25):
+    """
+    Async generator of one result per (location, radius) group, in completion order.
+
+    resolve_location(zip_code) -> (lat, lng)
+    fetch_candidates(lat, lng, radius) -> list of club dicts with distance_miles
+    load_profiles(user_ids) -> {user_id: scoring profile}
+    """
+    groups = group_requests(items, default_radius)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # Load every profile up front: one lookup for the whole batch
+    user_ids = list(OrderedDict.fromkeys(user_id for members in groups.values() for user_id in members))
+    try:
+        profiles = await load_profiles(user_ids)
+    except Exception as e:
+        # The response is already streaming, so report the failure per group
+        logger.error(f"Batch recommendations could not load profiles: {e}")
+        for (zip_code, radius), members in groups.items():
+            yield {"zip_code": zip_code, "radius": radius, "error": str(e),
+                   "results": [{"user_id": user_id} for user_id in members]}
+        return
+
+    async def run_group(zip_code, radius, members):
+        async with semaphore:
+            result = {"zip_code": zip_code, "radius": radius}
+            try:
+                lat, lng = await resolve_location(zip_code)
+                candidates = await fetch_candidates(lat, lng, radius)
+                found = [user_id for user_id in members if profiles.get(user_id)]
+                ranked = await asyncio.to_thread(
+                    top_scored_for_profiles, candidates, [profiles[user_id] for user_id in found], limit
+                )
+                by_user = dict(zip(found, ranked))
+                result["lat"], result["lng"] = lat, lng
+                result["total"] = len(candidates)
+                result["results"] = [
+                    {"user_id": user_id, "courses": by_user[user_id]} if user_id in by_user
+                    else {"user_id": user_id, "error": "Profile not found"}
+                    for user_id in members
+                ]
+            except Exception as e:
+                logger.error(f"Batch recommendations failed for {zip_code}/{radius}: {e}")
+                result["error"] = str(e)
+                result["results"] = [{"user_id": user_id} for user_id in members]
+            return result
+
+    tasks = [
+        asyncio.ensure_future(run_group(zip_code, radius, members))
+        for (zip_code, radius), members in groups.items()
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
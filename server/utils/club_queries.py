@@ -0,0 +1,97 @@
+"""
+Radius queries over golfclub.
+
+All of them filter with ST_DWithin on the stored, GiST-indexed gc.geog column
+(migrations/004_golfclub_geography.sql), so the index does a bounding-box
+prefilter and only nearby rows get an exact distance. Every query takes
+(lng, lat) for the distance, then (lng, lat, radius_miles) for the filter.
+"""
+from utils.serialization import RowLayout
+
+CLUB_FIELDS = """
+    gc.global_id as id,
+    gc.club_name,
+    gc.address,
+    gc.city,
+    gc.state,
+    gc.zip_code,
+    gc.price_tier,
+    gc.difficulty,
+    gc.number_of_holes,
+    gc.club_membership,
+    gc.driving_range,
+    gc.putting_green,
+    gc.chipping_green,
+    gc.practice_bunker,
+    gc.restaurant,
+    gc.lodging_on_site,
+    gc.motor_cart,
+    gc.pull_cart,
+    gc.golf_clubs_rental,
+    gc.club_fitting,
+    gc.golf_lessons"""
+
+DISTANCE_MILES = "ST_Distance(gc.geog, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography) / 1609.34"
+
+WITHIN_RADIUS = "ST_DWithin(gc.geog, ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography, %s * 1609.34)"
+
+# Clubs with the fields the scorer reads, nearest first
+CANDIDATE_CLUBS_QUERY = f"""
+    SELECT {CLUB_FIELDS},
+        gc.feature_mask,
+        {DISTANCE_MILES} as distance_miles
+    FROM golfclub gc
+    WHERE {WITHIN_RADIUS}
+    ORDER BY distance_miles ASC, id ASC
+"""
+
+
+def scored_clubs_query(score_sql):
+    """Top clubs by an SQL score expression; takes the score params first, then LIMIT last."""
+    return f"""
+        SELECT gc.*, {score_sql} AS score, COUNT(*) OVER () AS total_candidates
+        FROM (
+            SELECT {CLUB_FIELDS},
+                {DISTANCE_MILES} as distance_miles
+            FROM golfclub gc
+            WHERE {WITHIN_RADIUS}
+        ) gc
+        ORDER BY score DESC, distance_miles ASC
+        LIMIT %s
+    """
+
+
+SEARCH_CLUBS_QUERY = f"""
+    SELECT
+        gc.id, gc.club_name, gc.address, gc.latitude, gc.longitude,
+        {DISTANCE_MILES} as distance_miles
+    FROM golfclub gc
+    WHERE {WITHIN_RADIUS}
+"""
+
+# Keyset condition for SEARCH_CLUBS_QUERY; takes (lng, lat, after_distance, after_id)
+SEARCH_CLUBS_AFTER = f"""
+    AND ({DISTANCE_MILES}, gc.id) > (%s, %s)
+"""
+
+
+# Row layouts for `fields=` projection
+FIND_CLUBS_LAYOUT = RowLayout([
+    "id", "club_name", "address", "city", "state", "zip_code",
+    "price_tier", "difficulty", "number_of_holes", "club_membership",
+    "driving_range", "putting_green", "chipping_green", "practice_bunker", "restaurant", "lodging_on_site",
+    "motor_cart", "pull_cart", "golf_clubs_rental", "club_fitting", "golf_lessons",
+    "distance_miles",
+])
+
+SEARCH_CLUBS_LAYOUT = RowLayout(["id", "club_name", "address", "latitude", "longitude", "distance_miles"])
+
+# get_club_by_id: the golfclub columns clients use (GolfClubResponse in the UI),
+# without the geometry columns SELECT * used to ship
+CLUB_DETAIL_LAYOUT = RowLayout([
+    "global_id", "id", "club_name", "address", "city", "state", "zip_code",
+    "price_tier", "difficulty", "number_of_holes", "club_membership",
+    "driving_range", "putting_green", "chipping_green", "practice_bunker", "restaurant", "lodging_on_site",
+    "motor_cart", "pull_cart", "golf_clubs_rental", "club_fitting", "golf_lessons",
+    "latitude", "longitude",
+])
@@ -0,0 +1,433 @@
+import copy
+import logging
+import math
+import sys
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+
+from utils.recommendation_engine import FEATURE_FIELDS, required_feature_mask
+
+logger = logging.getLogger(__name__)
+
+METERS_PER_MILE = 1609.34
+EARTH_RADIUS_METERS = 6371008.8
+# Same bit layout as golfclub.feature_mask
+BOOLEAN_FILTERS = FEATURE_FIELDS
+TEXT_FIELDS = ['club_name', 'address', 'city', 'state', 'zip_code']
+CODED_FIELDS = ['price_tier', 'difficulty', 'number_of_holes', 'club_membership']
+CLUB_COLUMNS = TEXT_FIELDS + CODED_FIELDS + BOOLEAN_FILTERS
+
+SNAPSHOT_QUERY = f"""
+    SELECT
+        gc.global_id as id,
+        {', '.join('gc.' + column for column in CLUB_COLUMNS)},
+        ST_Y(gc.geom::geometry) as lat,
+        ST_X(gc.geom::geometry) as lng
+    FROM golfclub gc
+    WHERE gc.geom IS NOT NULL
+"""
+
+# Incremental refresh needs migrations/001_golfclub_change_tracking.sql.
+# Rows whose geom was cleared come back with NULL lat/lng and are dropped
+# from the snapshot, matching the full load's geom IS NOT NULL filter.
+CHANGED_ROWS_QUERY = f"""
+    SELECT
+        gc.global_id as id,
+        {', '.join('gc.' + column for column in CLUB_COLUMNS)},
+        ST_Y(gc.geom::geometry) as lat,
+        ST_X(gc.geom::geometry) as lng,
+        gc.updated_at
+    FROM golfclub gc
+    WHERE gc.updated_at >= %s
+"""
+DELETED_ROWS_QUERY = """
+    SELECT global_id as id, deleted_at FROM golfclub_deleted WHERE deleted_at >= %s
+"""
+
+
+def haversine_miles(lat, lng, lats, lngs):
+    """Great-circle distance in miles from one point to arrays of points."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0))) / METERS_PER_MILE
+
+
+class GridIndex:
+    """
+    Fixed-size lat/lng grid over point arrays. A radius query only measures
+    the points in cells overlapping the query's bounding box.
+    """
+
+    def __init__(self, lats, lngs, cell_degrees=0.5):
+        self.cell_degrees = cell_degrees
+        self.lats = lats
+        self.lngs = lngs
+        rows = np.floor(lats / cell_degrees).astype(np.int64)
+        cols = np.floor(lngs / cell_degrees).astype(np.int64)
+        order = np.lexsort((cols, rows))
+        self._order = order
+        self._cells = {}
+        if len(order):
+            keys = np.stack((rows[order], cols[order]), axis=1)
+            boundaries = np.flatnonzero(np.any(np.diff(keys, axis=0) != 0, axis=1)) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.concatenate((boundaries, [len(order)]))
+            for start, end in zip(starts, ends):
+                self._cells[(int(keys[start, 0]), int(keys[start, 1]))] = (int(start), int(end))
+
+    def candidates(self, lat, lng, radius_miles):
+        """Indices of points in the cells covering the radius' bounding box."""
+        # 1% margin so rounding never drops a point right at the edge
+        lat_delta = radius_miles * 1.01 * METERS_PER_MILE / EARTH_RADIUS_METERS * 180 / math.pi
+        min_lat, max_lat = lat - lat_delta, lat + lat_delta
+        narrowest = min(math.cos(math.radians(min_lat)), math.cos(math.radians(max_lat)))
+        if min_lat <= -90 or max_lat >= 90 or lat_delta / max(narrowest, 1e-9) >= 180:
+            min_lng, max_lng = -180.0, 180.0
+        else:
+            lng_delta = lat_delta / narrowest
+            min_lng, max_lng = lng - lng_delta, lng + lng_delta
+
+        row_range = range(math.floor(min_lat / self.cell_degrees), math.floor(max_lat / self.cell_degrees) + 1)
+        cell_lngs = []
+        if min_lng < -180:
+            cell_lngs.append((min_lng + 360, 180.0))
+            min_lng = -180.0
+        if max_lng > 180:
+            cell_lngs.append((-180.0, max_lng - 360))
+            max_lng = 180.0
+        cell_lngs.append((min_lng, max_lng))
+
+        chunks = []
+        for row in row_range:
+            for low, high in cell_lngs:
+                for col in range(math.floor(low / self.cell_degrees), math.floor(high / self.cell_degrees) + 1):
+                    span = self._cells.get((row, col))
+                    if span:
+                        chunks.append(self._order[span[0]:span[1]])
+        if not chunks:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(chunks)
+
+
+class ClubColumns:
+    """
+    Compact columnar copy of golfclub rows: float32 coordinates, int8 codes
+    for the categorical fields, uint16 amenity/service bitmasks (bit i =
+    BOOLEAN_FILTERS[i]) plus a mask of which flags are non-NULL, and plain
+    lists for the free-text fields. Rows are addressed by position; deleted
+    rows are tombstoned in `live` until the next full rebuild.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.positions = {}
+        self.lat = np.empty(0, dtype=np.float32)
+        self.lng = np.empty(0, dtype=np.float32)
+        self.codes = {field: np.empty(0, dtype=np.int8) for field in CODED_FIELDS}
+        # Per-field vocabulary; code 0 is NULL
+        self.values = {field: [None] for field in CODED_FIELDS}
+        self.value_codes = {field: {} for field in CODED_FIELDS}
+        self.flags = np.empty(0, dtype=np.uint16)
+        self.known = np.empty(0, dtype=np.uint16)
+        self.live = np.empty(0, dtype=bool)
+        self.text = {field: [] for field in TEXT_FIELDS}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def live_count(self):
+        return int(self.live.sum())
+
+    def code_for(self, field, value):
+        """Code of an existing value, or None if no row has it."""
+        if value is None:
+            return 0
+        return self.value_codes[field].get(str(value))
+
+    def _encode(self, field, value):
+        code = self.code_for(field, value)
+        if code is None:
+            code = len(self.values[field])
+            if code > np.iinfo(np.int8).max:
+                raise ValueError(f"Too many distinct {field} values for the snapshot")
+            self.values[field].append(value)
+            self.value_codes[field][str(value)] = code
+        return code
+
+    def upsert(self, rows):
+        """Insert or overwrite rows in place; new rows are appended."""
+        rows = [row for row in rows if row.get('lat') is not None and row.get('lng') is not None]
+        updates = [row for row in rows if str(row['id']) in self.positions]
+        inserts = [row for row in rows if str(row['id']) not in self.positions]
+
+        if inserts:
+            count = len(inserts)
+            self.lat = np.concatenate((self.lat, np.empty(count, dtype=np.float32)))
+            self.lng = np.concatenate((self.lng, np.empty(count, dtype=np.float32)))
+            for field in CODED_FIELDS:
+                self.codes[field] = np.concatenate((self.codes[field], np.empty(count, dtype=np.int8)))
+            self.flags = np.concatenate((self.flags, np.empty(count, dtype=np.uint16)))
+            self.known = np.concatenate((self.known, np.empty(count, dtype=np.uint16)))
+            self.live = np.concatenate((self.live, np.empty(count, dtype=bool)))
+            for row in inserts:
+                self.positions[str(row['id'])] = len(self.ids)
+                self.ids.append(str(row['id']))
+                for field in TEXT_FIELDS:
+                    self.text[field].append(None)
+
+        for row in updates + inserts:
+            i = self.positions[str(row['id'])]
+            self.lat[i] = row['lat']
+            self.lng[i] = row['lng']
+            for field in CODED_FIELDS:
+                self.codes[field][i] = self._encode(field, row.get(field))
+            flags = known = 0
+            for bit, field in enumerate(BOOLEAN_FILTERS):
+                value = row.get(field)
+                if value is not None:
+                    known |= 1 << bit
+                    if value:
+                        flags |= 1 << bit
+            self.flags[i] = flags
+            self.known[i] = known
+            self.live[i] = True
+            for field in TEXT_FIELDS:
+                self.text[field][i] = row.get(field)
+        return len(rows)
+
+    def delete(self, ids):
+        deleted = 0
+        for club_id in ids:
+            i = self.positions.get(str(club_id))
+            if i is not None and self.live[i]:
+                self.live[i] = False
+                deleted += 1
+        return deleted
+
+    def row(self, i):
+        """Decode position i back into a find_clubs-shaped dict."""
+        result = {'id': self.ids[i]}
+        for field in TEXT_FIELDS:
+            result[field] = self.text[field][i]
+        for field in CODED_FIELDS:
+            result[field] = self.values[field][self.codes[field][i]]
+        flags, known = int(self.flags[i]), int(self.known[i])
+        for bit, field in enumerate(BOOLEAN_FILTERS):
+            result[field] = bool(flags >> bit & 1) if known >> bit & 1 else None
+        return result
+
+    def memory_bytes(self):
+        """Approximate resident size of the snapshot, including id and text strings."""
+        arrays = [self.lat, self.lng, self.flags, self.known, self.live, *self.codes.values()]
+        total = sum(array.nbytes for array in arrays)
+        total += sys.getsizeof(self.ids) + sum(sys.getsizeof(club_id) for club_id in self.ids)
+        total += sys.getsizeof(self.positions)
+        for values in self.text.values():
+            total += sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values if value is not None)
+        return total
+
+
+class ClubSnapshot:
+    """
+    In-process copy of the golfclub table in compact columns (ClubColumns)
+    with a grid index. The first refresh loads everything; later refreshes
+    only apply rows changed or deleted since the last one. updated_at and
+    deleted_at are set to the writing transaction's start time, so a write
+    that commits after a refresh can carry a timestamp before that refresh's
+    watermark; every refresh re-reads the last overlap_seconds and skips the
+    rows it has already applied. Answers
+    find_clubs-style radius and nearest-N queries without a database round
+    trip. Distances are great-circle; they can differ from PostGIS'
+    spheroidal geography distances by up to ~0.5%, which only matters for
+    clubs right at the radius edge.
+    """
+
+    def __init__(self, refresh_seconds=300, rebuild_dead_ratio=0.1, overlap_seconds=60):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_dead_ratio = rebuild_dead_ratio
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.loaded_at = None
+        self.watermark = None
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+        self.rows_applied = 0
+        # (kind, id) -> change timestamp applied within the overlap window
+        self._applied = {}
+        self._lock = threading.Lock()
+        self._columns = ClubColumns()
+        self._index = GridIndex(np.empty(0), np.empty(0))
+        self._live = np.empty(0, dtype=np.int64)
+        self._sorted_ids = np.empty(0, dtype=str)
+        self._id_rank = np.empty(0, dtype=np.int64)
+
+    @property
+    def ready(self):
+        return self.loaded_at is not None
+
+    @property
+    def stale(self):
+        return not self.ready or time.time() - self.loaded_at > self.refresh_seconds
+
+    def _publish(self, columns):
+        live = np.flatnonzero(columns.live)
+        index = GridIndex(columns.lat[live].astype(np.float64), columns.lng[live].astype(np.float64))
+        # Rank of each id in sort order, for (distance, id) keyset ordering
+        ids = np.array(columns.ids, dtype=str)
+        sorted_ids = np.sort(ids)
+        id_rank = np.searchsorted(sorted_ids, ids)
+        with self._lock:
+            self._columns, self._index, self._live = columns, index, live
+            self._sorted_ids, self._id_rank = sorted_ids, id_rank
+            self.loaded_at = time.time()
+
+    def load(self, rows):
+        """Replace the snapshot with rows carrying 'lat' and 'lng' keys."""
+        columns = ClubColumns()
+        columns.upsert(rows)
+        self._publish(columns)
+        self.full_refreshes += 1
+        logger.info(f"Club snapshot loaded with {len(columns)} clubs")
+
+    def apply_changes(self, changed_rows, deleted_ids):
+        """Apply changed and deleted rows to a copy of the current columns."""
+        if not changed_rows and not deleted_ids:
+            with self._lock:
+                self.loaded_at = time.time()
+            self.incremental_refreshes += 1
+            return 0
+        with self._lock:
+            current = self._columns
+        columns = copy.deepcopy(current)
+        applied = columns.upsert(changed_rows) + columns.delete(deleted_ids)
+        if len(columns) and 1 - columns.live_count / len(columns) > self.rebuild_dead_ratio:
+            # Too many tombstones: compact by rebuilding from the live rows
+            compacted = ClubColumns()
+            compacted.upsert([{**columns.row(i), 'lat': columns.lat[i], 'lng': columns.lng[i]}
+                              for i in np.flatnonzero(columns.live)])
+            columns = compacted
+        self._publish(columns)
+        self.incremental_refreshes += 1
+        self.rows_applied += applied
+        return applied
+
+    def refresh(self, pool):
+        """
+        Bring the snapshot up to date through the connection pool: a full
+        load the first time (or if change tracking is unavailable), then
+        only rows changed since the previous refresh.
+        """
+        started = pool.fetchone("SELECT now() as now")['now']
+        if self.watermark is not None:
+            try:
+                since = self.watermark - self.overlap
+                changed = self._unapplied('changed', pool.fetchall(CHANGED_ROWS_QUERY, (since,)), 'updated_at')
+                deleted = self._unapplied('deleted', pool.fetchall(DELETED_ROWS_QUERY, (since,)), 'deleted_at')
+                # A club deleted and re-inserted since the watermark is alive
+                changed_ids = {str(row['id']) for row in changed}
+                deleted_ids = [row['id'] for row in deleted if str(row['id']) not in changed_ids]
+                # A cleared geom takes the club out of the snapshot
+                located = [row for row in changed if row['lat'] is not None and row['lng'] is not None]
+                deleted_ids += [row['id'] for row in changed if row['lat'] is None or row['lng'] is None]
+                applied = self.apply_changes(located, deleted_ids)
+                self._remember('changed', changed, 'updated_at', started)
+                self._remember('deleted', deleted, 'deleted_at', started)
+                self.watermark = started
+                if applied:
+                    logger.info(f"Club snapshot applied {applied} changed rows")
+                return
+            except Exception as e:
+                logger.error(f"Incremental club snapshot refresh failed, reloading: {str(e)}")
+        self.load(pool.fetchall(SNAPSHOT_QUERY))
+        self._applied = {}
+        self.watermark = started
+
+    def _unapplied(self, kind, rows, stamp):
+        """Drop rows re-read from the overlap window that were applied already."""
+        return [row for row in rows if self._applied.get((kind, str(row['id']))) != row[stamp]]
+
+    def _remember(self, kind, rows, stamp, started):
+        for row in rows:
+            self._applied[(kind, str(row['id']))] = row[stamp]
+        # Only the next refresh's overlap window can return these rows again
+        horizon = started - self.overlap
+        self._applied = {key: value for key, value in self._applied.items() if value >= horizon}
+
+    def query(self, lat, lng, radius, limit=None, after=None, price_tier=None, difficulty=None,
+              number_of_holes=None, club_membership=None, **boolean_filters):
+        """
+        Clubs within `radius` miles in (distance, id) order, with the same
+        filters as find_clubs. `after` is a (distance_miles, id) keyset
+        position from a previous page. Returns find_clubs-shaped dicts with
+        distance_miles.
+        """
+        with self._lock:
+            columns, index, live = self._columns, self._index, self._live
+            sorted_ids, id_rank = self._sorted_ids, self._id_rank
+        candidates = index.candidates(lat, lng, radius)
+        if not len(candidates):
+            return []
+        distances = haversine_miles(lat, lng, index.lats[candidates], index.lngs[candidates])
+        positions = live[candidates]
+
+        keep = distances <= radius
+        exact_filters = {
+            'price_tier': price_tier,
+            'difficulty': difficulty,
+            'number_of_holes': number_of_holes,
+            'club_membership': club_membership,
+        }
+        for field, value in exact_filters.items():
+            if value:
+                code = columns.code_for(field, value)
+                if code is None:
+                    return []
+                keep &= columns.codes[field][positions] == code
+        required = required_feature_mask(boolean_filters)
+        if required:
+            keep &= (columns.flags[positions] & required) == required
+
+        ranks = id_rank[positions]
+        if after is not None:
+            after_distance, after_id = after
+            after_rank = np.searchsorted(sorted_ids, str(after_id), side='right')
+            keep &= (distances > after_distance) | ((distances == after_distance) & (ranks >= after_rank))
+
+        positions, distances, ranks = positions[keep], distances[keep], ranks[keep]
+        order = np.lexsort((ranks, distances))
+        if limit is not None:
+            order = order[:limit]
+
+        results = []
+        for i in order:
+            result = columns.row(positions[i])
+            result['distance_miles'] = float(distances[i])
+            results.append(result)
+        return results
+
+    def nearest(self, lat, lng, count, max_radius=12500, **filters):
+        """The `count` nearest clubs matching filters, widening the search radius as needed."""
+        radius = 10
+        while True:
+            results = self.query(lat, lng, radius, limit=count, **filters)
+            if len(results) >= count or radius >= max_radius:
+                return results
+            radius = min(radius * 4, max_radius)
+
+    def stats(self):
+        with self._lock:
+            columns = self._columns
+        return {
+            "ready": self.ready,
+            "clubs": columns.live_count,
+            "loaded_at": self.loaded_at,
+            "refresh_seconds": self.refresh_seconds,
+            "full_refreshes": self.full_refreshes,
+            "incremental_refreshes": self.incremental_refreshes,
+            "rows_applied": self.rows_applied,
+            "memory_bytes": columns.memory_bytes(),
+        }
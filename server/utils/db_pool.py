@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from sqlalchemy.dialects.postgresql.psycopg2 import PGDialect_psycopg2
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from utils.metrics import POOL_CHECKOUT_WAIT
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Managed pool of psycopg2 connections shared by every endpoint.
+    Wraps SQLAlchemy's QueuePool for sizing, idle recycling and pre-ping,
+    and records how long callers wait to check out a connection.
+
+    Async handlers go through run(), which executes blocking database work
+    on an executor bounded to the pool size, so the event loop never waits
+    on psycopg2 and threads never queue behind an exhausted pool.
+    """
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10, recycle=1800,
+                 timeout=10, pre_ping=True):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = QueuePool(
+            self._create_connection,
+            pool_size=max_size,
+            max_overflow=0,
+            timeout=timeout,
+            recycle=recycle,
+            pre_ping=pre_ping,
+            # pre_ping pings through the dialect (SELECT 1 in autocommit)
+            dialect=PGDialect_psycopg2(dbapi=psycopg2),
+        )
+        self._lock = threading.Lock()
+        self._checkouts = 0
+        self._checkout_wait_total = 0.0
+        self._checkout_wait_max = 0.0
+        self._checkout_timeouts = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix="db")
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from the DB_* environment variables."""
+        connect_kwargs = {
+            "dbname": os.getenv("DB_NAME"),
+            "user": os.getenv("DB_USER"),
+            "password": os.getenv("DB_PASSWORD"),
+            "host": os.getenv("DB_HOST"),
+            "port": os.getenv("DB_PORT"),
+        }
+        return cls(
+            connect_kwargs,
+            min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+            max_size=int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            recycle=int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10")),
+            pre_ping=os.getenv("DB_POOL_PRE_PING", "true").lower() == "true",
+        )
+
+    def _create_connection(self):
+        return psycopg2.connect(**self.connect_kwargs)
+
+    def warm(self):
+        """Open min_size connections up front so the first requests skip the handshake."""
+        connections = []
+        try:
+            for _ in range(min(self.min_size, self.max_size)):
+                connections.append(self._pool.connect())
+        finally:
+            for conn in connections:
+                conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Check out a pooled connection; it is rolled back and returned on exit."""
+        start = time.perf_counter()
+        try:
+            conn = self._pool.connect()
+        except PoolTimeoutError:
+            with self._lock:
+                self._checkout_timeouts += 1
+            raise
+        waited = time.perf_counter() - start
+        POOL_CHECKOUT_WAIT.observe(waited)
+        with self._lock:
+            self._checkouts += 1
+            self._checkout_wait_total += waited
+            self._checkout_wait_max = max(self._checkout_wait_max, waited)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def fetchall(self, query, params=None):
+        """Run a query on a pooled connection and return every row as a dict."""
+        with self.connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+    def fetchall_tuples(self, query, params=None):
+        """Run a query on a pooled connection and return plain tuple rows."""
+        with self.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall()
+
+    def fetchone(self, query, params=None):
+        """Run a query on a pooled connection and return the first row as a dict."""
+        with self.connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchone()
+
+    def iter_chunks(self, query, params=None, chunk_size=1000):
+        """
+        Yield lists of up to chunk_size rows (as dicts) from a server-side
+        (named) cursor, so only one chunk is held in memory at a time.
+        The pooled connection stays checked out until the generator finishes
+        or is closed.
+        """
+        with self.connection() as conn:
+            with conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor) as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+
+    async def stream(self, query, params=None, chunk_size=1000):
+        """Async iterator over iter_chunks, fetching each chunk on the pool's executor."""
+        chunks = self.iter_chunks(query, params, chunk_size)
+        pending = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(self.run(next, chunks, None))
+                # Shielded so a disconnecting client cannot close the cursor mid-fetch
+                rows = await asyncio.shield(pending)
+                pending = None
+                if rows is None:
+                    break
+                yield rows
+        finally:
+            if pending is not None:
+                await asyncio.wait([pending])
+            await self.run(chunks.close)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run blocking database work on the pool's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def stats(self):
+        """Pool occupancy and checkout-wait counters."""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "checked_out": self._pool.checkedout(),
+                "idle": self._pool.checkedin(),
+                "checkouts": checkouts,
+                "checkout_timeouts": self._checkout_timeouts,
+                "checkout_wait_avg_ms": (self._checkout_wait_total / checkouts * 1000) if checkouts else 0.0,
+                "checkout_wait_max_ms": self._checkout_wait_max * 1000,
+            }
+
+    def dispose(self):
+        """Close every idle connection held by the pool and stop the executor."""
+        self._executor.shutdown(wait=False)
+        self._pool.dispose()
@@ -0,0 +1,82 @@
+"""
+Canonical statement shapes for find_clubs.
+
+Every combination of optional filters maps onto one of two prepared
+statements (first page / keyset page). Absent text filters are passed as
+NULL and absent boolean filters as a zero feature mask, so the SQL text and
+its plan are shared by every request. The radius filter is ST_DWithin on the
+indexed gc.geog column.
+"""
+from utils.prepared_statements import PreparedStatement
+
+_SELECT = """
+    SELECT DISTINCT
+        gc.global_id as id,
+        gc.club_name,
+        gc.address,
+        gc.city,
+        gc.state,
+        gc.zip_code,
+        gc.price_tier,
+        gc.difficulty,
+        gc.number_of_holes,
+        gc.club_membership,
+        gc.driving_range,
+        gc.putting_green,
+        gc.chipping_green,
+        gc.practice_bunker,
+        gc.restaurant,
+        gc.lodging_on_site,
+        gc.motor_cart,
+        gc.pull_cart,
+        gc.golf_clubs_rental,
+        gc.club_fitting,
+        gc.golf_lessons,
+        ST_Distance(
+            gc.geog,
+            ST_SetSRID(ST_MakePoint($1::float8, $2::float8), 4326)::geography
+        ) / 1609.34 as distance_miles
+    FROM golfclub gc
+    WHERE ST_DWithin(
+        gc.geog,
+        ST_SetSRID(ST_MakePoint($1::float8, $2::float8), 4326)::geography,
+        $3::float8 * 1609.34
+    )
+    AND ($4::text IS NULL OR gc.price_tier::text = $4)
+    AND ($5::text IS NULL OR gc.difficulty::text = $5)
+    AND ($6::text IS NULL OR gc.number_of_holes::text = $6)
+    AND ($7::text IS NULL OR gc.club_membership::text = $7)
+    AND (gc.feature_mask & $8::integer) = $8
+"""
+
+_ORDER = """
+    ORDER BY distance_miles ASC, id ASC
+    LIMIT $9::integer OFFSET $10::integer
+"""
+
+_AFTER = """
+    AND (
+        ST_Distance(
+            gc.geog,
+            ST_SetSRID(ST_MakePoint($1::float8, $2::float8), 4326)::geography
+        ) / 1609.34,
+        gc.global_id
+    ) > ($11::float8, $12)
+"""
+
+FIND_CLUBS = PreparedStatement("find_clubs_v1", _SELECT + _ORDER, 10)
+FIND_CLUBS_AFTER = PreparedStatement("find_clubs_after_v1", _SELECT + _AFTER + _ORDER, 12)
+
+
+def find_clubs_statement(lng, lat, radius, limit, offset=0, after=None, price_tier=None, difficulty=None,
+                         number_of_holes=None, club_membership=None, required_mask=0):
+    """Return (statement, params) for a find_clubs page; empty filters become NULL."""
+    params = [
+        lng, lat, radius,
+        price_tier or None, difficulty or None, number_of_holes or None, club_membership or None,
+        required_mask, limit,
+    ]
+    if after is None:
+        return FIND_CLUBS, params + [offset or 0]
+    # Keyset pages ignore the legacy offset
+    return FIND_CLUBS_AFTER, params + [0, after[0], after[1]]
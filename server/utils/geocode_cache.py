@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / ".geocode_cache.sqlite3"
+
+
+class GeocodeCache:
+    """
+    Two-level cache for geocoding results.
+    An in-memory LRU with TTL sits in front of a SQLite file, so entries
+    survive restarts and a cold process only pays the disk read.
+    The file is opened on first use, expired rows are deleted when it is
+    opened and then every prune_interval_seconds, and SQLite reads and
+    writes happen outside the lock that guards the in-memory entries.
+    Values must be JSON-serializable.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=50000, ttl_seconds=30 * 24 * 3600,
+                 prune_interval_seconds=3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.prune_interval_seconds = prune_interval_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._pruned = 0
+        # One connection shared by all threads, so SQLite access is serialized separately
+        self._db = None
+        self._db_unavailable = False
+        self._db_lock = threading.Lock()
+        self._next_prune = 0.0
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from GEOCODE_CACHE_* environment variables."""
+        return cls(
+            path=os.getenv("GEOCODE_CACHE_PATH", str(DEFAULT_CACHE_PATH)) or None,
+            max_entries=int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "50000")),
+            ttl_seconds=int(os.getenv("GEOCODE_CACHE_TTL_SECONDS", str(30 * 24 * 3600))),
+        )
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+
+        row = None
+        with self._db_lock:
+            db = self._store()
+            if db is not None:
+                try:
+                    row = db.execute(
+                        "SELECT value, expires_at FROM geocode_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to read geocode cache entry: {e}")
+
+        with self._lock:
+            if row and row[1] > now:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self._disk_hits += 1
+                return value
+            self._misses += 1
+            return None
+
+    def set(self, key, value):
+        """Store value in memory and in the persistent store."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, value, expires_at)
+        with self._db_lock:
+            db = self._store()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO geocode_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), expires_at),
+                    )
+                    db.commit()
+                    self._prune(db)
+                except sqlite3.Error as e:
+                    logger.error(f"Failed to persist geocode cache entry: {e}")
+
+    def _store(self):
+        """The SQLite connection, opened on first use; None in memory-only mode. Call with _db_lock held."""
+        if self._db is None and self.path and not self._db_unavailable:
+            try:
+                db = sqlite3.connect(str(self.path), check_same_thread=False)
+                db.execute("""
+                    CREATE TABLE IF NOT EXISTS geocode_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+                db.commit()
+                self._prune(db)
+                self._db = db
+            except sqlite3.Error as e:
+                logger.error(f"Geocode cache store unavailable, using memory only: {e}")
+                self._db_unavailable = True
+        return self._db
+
+    def _prune(self, db):
+        """Delete expired rows, at most once per prune_interval_seconds. Call with _db_lock held."""
+        now = time.time()
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.prune_interval_seconds
+        deleted = db.execute("DELETE FROM geocode_cache WHERE expires_at < ?", (now,)).rowcount
+        db.commit()
+        with self._lock:
+            self._pruned += deleted
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def stats(self):
+        """Hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "pruned": self._pruned,
+                "hit_ratio": (self._hits + self._disk_hits) / lookups if lookups else 0.0,
+            }
+
+
+# Shared by app.get_lat_lng and maps.geocode_address; the SQLite file is created on first use
+geocode_cache = GeocodeCache.from_env()
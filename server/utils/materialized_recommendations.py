@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import time
+
+from psycopg2.extras import RealDictCursor
+
+from utils.zip_index import location_key
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_QUERY = """
+    SELECT courses, total
+    FROM user_recommendations
+    WHERE user_id = %s AND zip_code = %s AND radius = %s
+      AND computed_version = dirty_version
+      AND computed_at > now() - make_interval(secs => %s)
+"""
+
+MARK_USERS_STALE = """
+    INSERT INTO user_recommendations (user_id, radius)
+    SELECT user_id, %s FROM unnest(%s::uuid[]) AS user_id
+    ON CONFLICT (user_id) DO UPDATE SET dirty_version = user_recommendations.dirty_version + 1
+"""
+
+MARK_CLUBS_STALE = """
+    UPDATE user_recommendations
+    SET dirty_version = dirty_version + 1
+    WHERE club_ids && %s::text[]
+"""
+
+MARK_LOCATION_STALE = """
+    UPDATE user_recommendations
+    SET dirty_version = dirty_version + 1
+    WHERE ST_DWithin(
+        ST_SetSRID(ST_MakePoint(lng, lat), 4326)::geography,
+        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
+        %s * 1609.34
+    )
+    AND ST_DWithin(
+        ST_SetSRID(ST_MakePoint(lng, lat), 4326)::geography,
+        ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography,
+        radius * 1609.34
+    )
+"""
+
+# Rows for users with a home ZIP who have never been materialized
+ENSURE_ROWS_QUERY = """
+    INSERT INTO user_recommendations (user_id, radius)
+    SELECT p.id, %s
+    FROM profiles p
+    WHERE COALESCE(p.home_zip, '') <> ''
+      AND NOT EXISTS (SELECT 1 FROM user_recommendations r WHERE r.user_id = p.id)
+    LIMIT %s
+    ON CONFLICT (user_id) DO NOTHING
+"""
+
+# zip_code is stored as zip_index.location_key(home_zip); this is the same
+# normalization in SQL, so a ZIP+4 or free-text home_zip is not always stale
+HOME_LOCATION = r"btrim(regexp_replace(p.home_zip, '\s+', ' ', 'g'))"
+HOME_LOCATION_KEY = (
+    f"CASE WHEN {HOME_LOCATION} ~ '^\\d{{5}}(-\\d{{4}})?$' THEN left({HOME_LOCATION}, 5) "
+    f"ELSE lower({HOME_LOCATION}) END"
+)
+
+# Lease a batch of stale, missing or expired rows to this worker. SKIP LOCKED
+# plus claimed_until keeps concurrent workers on disjoint users.
+CLAIM_QUERY = f"""
+    UPDATE user_recommendations r
+    SET claimed_until = now() + make_interval(secs => %s)
+    FROM (
+        SELECT r.user_id
+        FROM user_recommendations r
+        JOIN profiles p ON p.id = r.user_id
+        WHERE COALESCE(p.home_zip, '') <> ''
+          AND (r.claimed_until IS NULL OR r.claimed_until < now())
+          AND (
+            r.computed_version < r.dirty_version
+            OR r.zip_code IS DISTINCT FROM ({HOME_LOCATION_KEY})
+            OR r.radius <> %s
+            OR r.computed_at IS NULL
+            OR r.computed_at < now() - make_interval(secs => %s)
+          )
+        LIMIT %s
+        FOR UPDATE OF r SKIP LOCKED
+    ) claimed, profiles p
+    WHERE r.user_id = claimed.user_id AND p.id = r.user_id
+    RETURNING r.user_id::text AS user_id, p.home_zip AS zip_code, r.dirty_version
+"""
+
+# A write that lands while a user is being recomputed bumps dirty_version past
+# the version read by CLAIM_QUERY, so the row stays stale and is redone.
+STORE_QUERY = """
+    INSERT INTO user_recommendations
+        (user_id, zip_code, radius, lat, lng, courses, club_ids, total, dirty_version, computed_version, computed_at)
+    VALUES (%s, %s, %s, %s, %s, %s::jsonb, %s::text[], %s, %s, %s, now())
+    ON CONFLICT (user_id) DO UPDATE SET
+        zip_code = EXCLUDED.zip_code,
+        radius = EXCLUDED.radius,
+        lat = EXCLUDED.lat,
+        lng = EXCLUDED.lng,
+        courses = EXCLUDED.courses,
+        club_ids = EXCLUDED.club_ids,
+        total = EXCLUDED.total,
+        computed_version = EXCLUDED.computed_version,
+        computed_at = EXCLUDED.computed_at,
+        claimed_until = NULL
+"""
+
+
+def rows_from_group(group, dirty_versions, radius):
+    """
+    STORE_QUERY parameters for each user in a batch_recommendations group.
+    Courses are stored as get_recommendations returns them, without the
+    feature_mask the scorer read.
+    """
+    if "error" in group:
+        return []
+    rows = []
+    for result in group["results"]:
+        courses = [
+            {key: value for key, value in course.items() if key != "feature_mask"}
+            for course in result.get("courses", [])
+        ]
+        version = dirty_versions[result["user_id"]]
+        rows.append((
+            result["user_id"], group["zip_code"], radius, group.get("lat"), group.get("lng"),
+            json.dumps(courses, default=str), [str(course["id"]) for course in courses],
+            group["total"], version, version,
+        ))
+    return rows
+
+
+class MaterializedRecommendations:
+    """
+    Precomputed top-N recommendations for users with a home ZIP, stored in
+    user_recommendations (migrations 002 and 005).
+    Profile and club writes mark the affected users stale; refresh() recomputes
+    only stale, missing or expired rows through the batch recommendation path.
+    Each refresh leases its batch first, so the loops running in every worker
+    split the work instead of repeating it. lookup() serves a list only while
+    it is fresh.
+    """
+
+    def __init__(self, top_n=25, radius=25, max_age_seconds=24 * 3600, batch_size=500, refresh_seconds=30,
+                 lease_seconds=600):
+        self.top_n = top_n
+        self.radius = radius
+        self.max_age_seconds = max_age_seconds
+        self.batch_size = batch_size
+        self.refresh_seconds = refresh_seconds
+        self.lease_seconds = lease_seconds
+        self._hits = 0
+        self._misses = 0
+        self._recomputed = 0
+        self._last_refresh_seconds = None
+
+    @classmethod
+    def from_env(cls):
+        """Build from MATERIALIZED_RECOMMENDATIONS_* environment variables."""
+        return cls(
+            top_n=int(os.getenv("MATERIALIZED_RECOMMENDATIONS_TOP_N", "25")),
+            radius=int(os.getenv("MATERIALIZED_RECOMMENDATIONS_RADIUS", "25")),
+            max_age_seconds=int(os.getenv("MATERIALIZED_RECOMMENDATIONS_MAX_AGE_SECONDS", str(24 * 3600))),
+            batch_size=int(os.getenv("MATERIALIZED_RECOMMENDATIONS_BATCH_SIZE", "500")),
+            refresh_seconds=int(os.getenv("MATERIALIZED_RECOMMENDATIONS_REFRESH_SECONDS", "30")),
+            lease_seconds=int(os.getenv("MATERIALIZED_RECOMMENDATIONS_LEASE_SECONDS", "600")),
+        )
+
+    def lookup(self, pool, user_id, zip_code, radius, limit):
+        """Return {"courses", "total"} from a fresh materialized list, or None."""
+        if limit > self.top_n or radius != self.radius:
+            self._misses += 1
+            return None
+        row = pool.fetchone(LOOKUP_QUERY, (user_id, location_key(zip_code), radius, self.max_age_seconds))
+        if row is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        return {"courses": row["courses"][:limit], "total": row["total"]}
+
+    def mark_users_stale(self, pool, user_ids):
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(MARK_USERS_STALE, (self.radius, [str(user_id) for user_id in user_ids]))
+            conn.commit()
+
+    def mark_clubs_stale(self, pool, club_ids, lat=None, lng=None):
+        """Users whose list holds one of the clubs, or whose area covers (lat, lng)."""
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                if club_ids:
+                    cursor.execute(MARK_CLUBS_STALE, ([str(club_id) for club_id in club_ids],))
+                if lat is not None and lng is not None:
+                    cursor.execute(MARK_LOCATION_STALE, (lng, lat, self.radius, lng, lat))
+            conn.commit()
+
+    async def refresh(self, pool, compute):
+        """
+        Recompute one batch of pending users. compute(items) is an async
+        iterator of batch_recommendations groups. Returns the number stored.
+        """
+        start = time.perf_counter()
+        pending = await pool.run(self._claim, pool)
+        if not pending:
+            return 0
+        dirty_versions = {row["user_id"]: row["dirty_version"] for row in pending}
+        items = [{"user_id": row["user_id"], "zip_code": row["zip_code"], "radius": self.radius} for row in pending]
+        stored = 0
+        async for group in compute(items, self.top_n):
+            rows = rows_from_group(group, dirty_versions, self.radius)
+            if rows:
+                await pool.run(self._store, pool, rows)
+                stored += len(rows)
+        self._recomputed += stored
+        self._last_refresh_seconds = time.perf_counter() - start
+        logger.info(f"Recomputed recommendations for {stored} of {len(pending)} pending users")
+        return stored
+
+    def _claim(self, pool):
+        with pool.connection() as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(ENSURE_ROWS_QUERY, (self.radius, self.batch_size))
+                cursor.execute(CLAIM_QUERY, (self.lease_seconds, self.radius, self.max_age_seconds, self.batch_size))
+                rows = cursor.fetchall()
+            conn.commit()
+        return rows
+
+    @staticmethod
+    def _store(pool, rows):
+        with pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.executemany(STORE_QUERY, rows)
+            conn.commit()
+
+    def stats(self):
+        lookups = self._hits + self._misses
+        return {
+            "top_n": self.top_n,
+            "radius": self.radius,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": self._hits / lookups if lookups else 0.0,
+            "recomputed": self._recomputed,
+            "last_refresh_seconds": self._last_refresh_seconds,
+        }
@@ -0,0 +1,228 @@
+"""
+In-process metrics in the Prometheus text exposition format (served at /metrics).
+
+Histograms and gauges are labelled by route template, so the series count
+stays bounded. stage() times one step of a request (auth, profile,
+geocode, sql, scoring, serialization) against the route the metrics
+middleware stored in current_route. Collectors registered with
+add_collector() are called at scrape time and turn the existing stats()
+counters (caches, pool, coalescing) into samples.
+
+The registry lives in one process. Under `uvicorn --workers N` each worker
+keeps its own series and a scrape is answered by whichever worker accepts
+the connection, so every sample carries a worker="<pid>" label: the series
+of different workers never overwrite each other (which would look like
+counter resets), and dashboards aggregate with sum without (worker).
+Series of a worker that is not the one answering are missing from that
+scrape rather than reset; rate() over a few scrapes smooths this out.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.routing import Match
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seconds; request and stage latencies
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds; pool checkout waits are usually far below a millisecond
+WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+# Route template of the request being handled, set by the metrics middleware
+current_route = ContextVar("current_route", default="none")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label combination."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labelvalues):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labelvalues)
+
+    def render(self, extra=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(values, list(counts), total, count) for values, (counts, total, count) in self._series.items()]
+        for values, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.labelnames, values, list(extra) + [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, values, extra)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """Gauge with one value per label combination."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues, amount=1):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value, *labelvalues):
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def render(self, extra=()):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues, extra)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Owns the metrics and scrape-time collectors rendered at /metrics.
+    const_labels are added to every sample (the worker pid in production).
+    """
+
+    def __init__(self, const_labels=None):
+        self.const_labels = dict(const_labels or {})
+        self._metrics = []
+        self._collectors = []
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """
+        Register collect(), called on every scrape. It returns
+        (name, type, documentation, samples) families, where samples are
+        (labels dict, value) pairs.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        extra = list(self.const_labels.items())
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(extra))
+        for collect in self._collectors:
+            for name, metric_type, documentation, samples in collect():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(labels.keys(), labels.values(), extra)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry({"worker": str(os.getpid())})
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds", "Time to produce the whole response body, by route.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = metrics.gauge(
+    "http_requests_in_flight", "Requests currently being handled, by route.", ("method", "route")
+)
+STAGE_DURATION = metrics.histogram(
+    "request_stage_duration_seconds", "Time spent in each stage of a request, by route.", ("route", "stage")
+)
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection.", buckets=WAIT_BUCKETS
+)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage `name` of the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - start, current_route.get(), name)
+
+
+def route_template(app, scope):
+    """The path template of the route a request will hit ("unmatched" if none)."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+def finish_after_body(response, finish):
+    """
+    Call finish(status_code) once the response body has been sent rather
+    than when the headers are: streamed responses (NDJSON batches) do their
+    work while the body is iterated.
+    """
+    body = response.body_iterator
+
+    async def timed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            finish(response.status_code)
+
+    response.body_iterator = timed_body()
+    return response
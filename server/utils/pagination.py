@@ -0,0 +1,30 @@
+import base64
+import json
+
+
+def encode_cursor(distance_miles, club_id):
+    """Opaque token for the page after the club at (distance_miles, club_id)."""
+    payload = json.dumps([float(distance_miles), str(club_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (distance_miles, club_id) from a cursor token; ValueError if it is malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        distance_miles, club_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(distance_miles), str(club_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+def next_cursor(rows, limit, id_field='id'):
+    """
+    Given up to limit + 1 rows in (distance_miles, id) order, return the
+    page and the cursor for the next one (None on the last page).
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(last['distance_miles'], last[id_field])
@@ -0,0 +1,94 @@
+import json
+import logging
+import threading
+import time
+
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger(__name__)
+
+# Key in the pooled connection's .info dict (cleared by the pool on reconnect)
+INFO_KEY = "prepared_statements"
+
+
+class PreparedStatement:
+    """A fixed SQL shape with $1..$n placeholders, prepared server-side by name."""
+
+    def __init__(self, name, sql, param_count):
+        self.name = name
+        self.sql = sql
+        self.param_count = param_count
+
+    def execute_sql(self):
+        return f"EXECUTE {self.name} ({', '.join(['%s'] * self.param_count)})"
+
+
+class PreparedStatementCache:
+    """
+    Prepares each statement once per pooled connection and reuses it.
+    Which statements a connection has prepared is kept in its pool .info,
+    so a recycled or reconnected connection prepares again.
+
+    The first time a shape is prepared its planning time is measured with
+    EXPLAIN (SUMMARY); every later execution on a connection that already
+    holds the statement counts as a hit and adds that much to
+    planning_ms_saved. Postgres still builds custom plans for the first few
+    executions of a prepared statement, so the saving is an upper bound.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._planning_ms = {}
+        self._prepares = 0
+        self._hits = 0
+        self._planning_ms_saved = 0.0
+
+    def fetchall(self, pool, statement, params):
+        """Execute statement on a pooled connection and return every row as a dict."""
+        if len(params) != statement.param_count:
+            raise ValueError(f"{statement.name} takes {statement.param_count} parameters, got {len(params)}")
+        with pool.connection() as conn:
+            prepared = conn.info.setdefault(INFO_KEY, set())
+            with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                if statement.name in prepared:
+                    with self._lock:
+                        self._hits += 1
+                        self._planning_ms_saved += self._planning_ms.get(statement.name, 0.0)
+                else:
+                    cursor.execute(f"PREPARE {statement.name} AS {statement.sql}")
+                    prepared.add(statement.name)
+                    with self._lock:
+                        self._prepares += 1
+                        measure = statement.name not in self._planning_ms
+                    if measure:
+                        self._measure_planning(cursor, statement, params)
+                cursor.execute(statement.execute_sql(), params)
+                return cursor.fetchall()
+
+    def _measure_planning(self, cursor, statement, params):
+        # Savepoint so a failed EXPLAIN does not abort the real query
+        cursor.execute("SAVEPOINT measure_planning")
+        try:
+            cursor.execute(f"EXPLAIN (SUMMARY, FORMAT JSON) {statement.execute_sql()}", params)
+            plan = next(iter(cursor.fetchone().values()))
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            planning_ms = float(plan[0].get("Planning Time", 0.0))
+            cursor.execute("RELEASE SAVEPOINT measure_planning")
+        except Exception as e:
+            logger.warning(f"Could not measure planning time for {statement.name}: {e}")
+            cursor.execute("ROLLBACK TO SAVEPOINT measure_planning")
+            planning_ms = 0.0
+        with self._lock:
+            self._planning_ms[statement.name] = planning_ms
+
+    def stats(self):
+        with self._lock:
+            executions = self._hits + self._prepares
+            return {
+                "statements": dict(self._planning_ms),
+                "prepares": self._prepares,
+                "hits": self._hits,
+                "hit_ratio": self._hits / executions if executions else 0.0,
+                "planning_ms_saved": round(self._planning_ms_saved, 3),
+            }
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# The profile fields the recommendation scorer reads ('id' is used for sampling)
+SCORING_PROFILE_COLUMNS = ("id", "preferred_price_range", "preferred_difficulty")
+SCORING_PROFILE_QUERY = f"SELECT {', '.join(SCORING_PROFILE_COLUMNS)} FROM profiles WHERE id = %s"
+
+
+def profile_version(profile):
+    """Digest of the scoring fields; changes exactly when the preferences do."""
+    fields = json.dumps([str(profile.get(column)) for column in SCORING_PROFILE_COLUMNS])
+    return hashlib.blake2b(fields.encode(), digest_size=8).hexdigest()
+
+
+class ProfileCache:
+    """
+    Write-through cache of the scoring fields of user profiles.
+    Profile writes call put() with the updated row; reads that miss load the
+    row and call fill(), which keeps an entry a concurrent write already put.
+
+    The cache is per process: put() only updates the worker that handled the
+    write, so other workers can serve the old preferences until their entry
+    expires. ttl_seconds (PROFILE_CACHE_TTL_SECONDS, default 60) bounds that.
+    Each profile's 'version' is a digest of its scoring fields, identical in
+    every worker and across restarts, so a cache keyed on (user id, version)
+    only matches an entry computed from the same preferences.
+    Cached profiles are shared and must not be mutated.
+    """
+
+    def __init__(self, max_entries=50000, ttl_seconds=60):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from PROFILE_CACHE_* environment variables."""
+        return cls(
+            max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "50000")),
+            ttl_seconds=int(os.getenv("PROFILE_CACHE_TTL_SECONDS", "60")),
+        )
+
+    def get(self, user_id):
+        """Return the cached scoring profile, or None on a miss or expired entry."""
+        key = str(user_id)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                profile, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return profile
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, row):
+        """Store a freshly written profile row, replacing any cached one."""
+        with self._lock:
+            self._writes += 1
+            return self._store(row)
+
+    def fill(self, row):
+        """Store a profile row loaded after a miss, unless a write got there first."""
+        key = str(row["id"])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            return self._store(row)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def _store(self, row):
+        profile = {column: row.get(column) for column in SCORING_PROFILE_COLUMNS}
+        profile["version"] = profile_version(profile)
+        key = str(profile["id"])
+        self._entries[key] = (profile, time.time() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return profile
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+            }
@@ -1,28 +1,113 @@
+import heapq
 import logging
+import os
+import threading
+import time
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
-def calculate_recommendation_score(club, user_preferences):
+WEIGHTS = {
+    'distance': 0.25,
+    'price': 0.25,
+    'difficulty': 0.20,
+    'amenities': 0.15,
+    'services': 0.15
+}
+MAX_DISTANCE = 100  # miles
+AMENITY_FIELDS = ['driving_range', 'putting_green', 'chipping_green', 'practice_bunker', 'restaurant', 'lodging_on_site']
+SERVICE_FIELDS = ['motor_cart', 'pull_cart', 'golf_clubs_rental', 'club_fitting', 'golf_lessons']
+
+# Bit i of golfclub.feature_mask is FEATURE_FIELDS[i] (migrations/003_golfclub_feature_mask.sql)
+FEATURE_FIELDS = AMENITY_FIELDS + SERVICE_FIELDS
+AMENITY_MASK = (1 << len(AMENITY_FIELDS)) - 1
+SERVICE_SHIFT = len(AMENITY_FIELDS)
+_POPCOUNT = [bin(i).count('1') for i in range(1 << len(FEATURE_FIELDS))]
+# top_scored_courses only checks score_upper_bound on lists at least this
+# long (benchmarks/bench_top_scored.py measures where it starts to win)
+PRUNE_MIN_COURSES = 250
+
+class ScoringDiagnostics:
+    """
+    Runtime-switchable sampling for scoring diagnostics plus aggregate counters.
+    Scoring logs nothing by default; enable 1-in-N sampling or specific user
+    IDs to get per-club detail for just those calls.
+    """
+
+    def __init__(self, sample_every=0, user_ids=()):
+        self._lock = threading.Lock()
+        self._calls = 0
+        self.requests = 0
+        self.clubs_scored = 0
+        self.clubs_pruned = 0
+        self.scoring_seconds = 0.0
+        self.max_clubs_per_request = 0
+        self.configure(sample_every, user_ids)
+
+    @classmethod
+    def from_env(cls):
+        """Read SCORING_SAMPLE_EVERY and SCORING_SAMPLE_USER_IDS (comma separated)."""
+        user_ids = [u.strip() for u in os.getenv("SCORING_SAMPLE_USER_IDS", "").split(",") if u.strip()]
+        return cls(int(os.getenv("SCORING_SAMPLE_EVERY", "0")), user_ids)
+
+    def configure(self, sample_every=0, user_ids=()):
+        """Change sampling at runtime; sample_every=0 and no user IDs turns it off."""
+        self.sample_every = max(0, int(sample_every or 0))
+        self.user_ids = frozenset(str(u) for u in user_ids or ())
+        self.enabled = bool(self.sample_every or self.user_ids)
+
+    def should_sample(self, user_preferences):
+        """Decide once per scoring request whether to log its per-club detail."""
+        if not self.enabled:
+            return False
+        if self.user_ids and str(user_preferences.get('id')) in self.user_ids:
+            return True
+        if self.sample_every:
+            with self._lock:
+                self._calls += 1
+                return self._calls % self.sample_every == 0
+        return False
+
+    def record(self, clubs_scored, seconds, clubs_pruned=0):
+        """Add one request's scoring work to the aggregate counters."""
+        with self._lock:
+            self.requests += 1
+            self.clubs_scored += clubs_scored
+            self.clubs_pruned += clubs_pruned
+            self.scoring_seconds += seconds
+            self.max_clubs_per_request = max(self.max_clubs_per_request, clubs_scored)
+
+    def stats(self):
+        with self._lock:
+            requests = self.requests
+            return {
+                "sample_every": self.sample_every,
+                "sample_user_ids": sorted(self.user_ids),
+                "requests": requests,
+                "clubs_scored": self.clubs_scored,
+                "clubs_pruned": self.clubs_pruned,
+                "clubs_per_request_avg": self.clubs_scored / requests if requests else 0.0,
+                "clubs_per_request_max": self.max_clubs_per_request,
+                "scoring_ms_total": self.scoring_seconds * 1000,
+                "scoring_ms_avg": self.scoring_seconds / requests * 1000 if requests else 0.0,
+            }
+
+scoring_diagnostics = ScoringDiagnostics.from_env()
+
+def calculate_recommendation_score(club, user_preferences, sample=None):
     """
     Calculate a recommendation score for a golf club based on user preferences.
-    Returns a score from 0-100.
+    Returns a score from 0-100. Request-level callers pass the sampling
+    decision they made once for the request; a standalone call (sample=None)
+    counts as its own request.
     """
     try:
         score = 0
-        weights = {
-            'distance': 0.25,
-            'price': 0.25,
-            'difficulty': 0.20,
-            'amenities': 0.15,
-            'services': 0.15
-        }
-
-        # Log inputs for debugging
-        logger.info(f"Calculating score for club: {club.get('name')}")
-        logger.info(f"User preferences: {user_preferences}")
-        
+        weights = WEIGHTS
+
         # Distance score (inverse relationship)
-        max_distance = 100  # miles
+        max_distance = MAX_DISTANCE
         distance = min(club['distance_miles'], max_distance)
         distance_score = (1 - (distance / max_distance)) * 100
         score += weights['distance'] * distance_score
@@ -37,21 +122,258 @@ def calculate_recommendation_score(club, user_preferences):
             difficulty_score = 100 if user_preferences['preferred_difficulty'].lower() == club['difficulty'].lower() else 0
             score += weights['difficulty'] * difficulty_score
 
-        # Amenities score
-        amenities = ['driving_range', 'putting_green', 'chipping_green', 'practice_bunker', 'restaurant', 'lodging_on_site']
-        amenity_count = sum(1 for amenity in amenities if club.get(amenity))
-        amenity_score = (amenity_count / len(amenities)) * 100
+        # Amenities and services: popcount of the packed feature mask
+        mask = feature_mask(club)
+        amenity_count = _POPCOUNT[mask & AMENITY_MASK]
+        amenity_score = (amenity_count / len(AMENITY_FIELDS)) * 100
         score += weights['amenities'] * amenity_score
 
-        # Services score
-        services = ['motor_cart', 'pull_cart', 'golf_clubs_rental', 'club_fitting', 'golf_lessons']
-        service_count = sum(1 for service in services if club.get(service))
-        service_score = (service_count / len(services)) * 100
+        service_count = _POPCOUNT[mask >> SERVICE_SHIFT]
+        service_score = (service_count / len(SERVICE_FIELDS)) * 100
         score += weights['services'] * service_score
 
-        logger.info(f"Final score for {club.get('name')}: {score}")
+        if sample is None:
+            sample = scoring_diagnostics.should_sample(user_preferences)
+        if sample:
+            logger.info(
+                "Sampled score for club %s: %s (distance=%s, price=%s, difficulty=%s, amenities=%s, services=%s, preferences=%s)",
+                club.get('name') or club.get('club_name'), score, distance_score, club['price_tier'],
+                club['difficulty'], amenity_count, service_count, user_preferences
+            )
         return round(score, 2)
 
     except Exception as e:
         logger.error(f"Error calculating recommendation score: {str(e)}")
         return 0
+
+class CodeTable:
+    """
+    Maps categorical strings (price tier, difficulty) to small int codes.
+    Code 0 is reserved for missing/empty values, which never match.
+    """
+
+    def __init__(self, case_insensitive=False):
+        self.case_insensitive = case_insensitive
+        self.codes = {}
+
+    def code(self, value):
+        if not value:
+            return 0
+        if self.case_insensitive:
+            value = value.lower()
+        return self.codes.setdefault(value, len(self.codes) + 1)
+
+def pack_flags(club, fields):
+    """Pack the truthy boolean fields of a club into a bitmask (bit i = fields[i])."""
+    mask = 0
+    for bit, field in enumerate(fields):
+        if club.get(field):
+            mask |= 1 << bit
+    return mask
+
+def feature_mask(club):
+    """The club's FEATURE_FIELDS bitmask: the stored feature_mask column when selected, else packed here."""
+    mask = club.get('feature_mask')
+    if mask is None:
+        mask = pack_flags(club, FEATURE_FIELDS)
+    return mask
+
+def required_feature_mask(filters):
+    """Bitmask of the FEATURE_FIELDS filters that are set to True."""
+    return sum(1 << bit for bit, field in enumerate(FEATURE_FIELDS) if filters.get(field) is True)
+
+def encode_clubs(clubs, price_codes, difficulty_codes):
+    """
+    Convert club dicts into the columnar arrays taken by
+    calculate_recommendation_scores. Missing distances become NaN.
+    """
+    count = len(clubs)
+    distance = np.empty(count, dtype=np.float64)
+    price_tier = np.empty(count, dtype=np.int16)
+    difficulty = np.empty(count, dtype=np.int16)
+    amenities = np.empty(count, dtype=np.uint8)
+    services = np.empty(count, dtype=np.uint8)
+    for i, club in enumerate(clubs):
+        d = club.get('distance_miles')
+        distance[i] = np.nan if d is None else d
+        price_tier[i] = price_codes.code(club.get('price_tier'))
+        difficulty[i] = difficulty_codes.code(club.get('difficulty'))
+        mask = feature_mask(club)
+        amenities[i] = mask & AMENITY_MASK
+        services[i] = mask >> SERVICE_SHIFT
+    return {
+        'distance': distance,
+        'price_tier': price_tier,
+        'difficulty': difficulty,
+        'amenities': amenities,
+        'services': services,
+    }
+
+_AMENITY_POPCOUNT = np.array([bin(i).count('1') for i in range(1 << len(AMENITY_FIELDS))], dtype=np.float64)
+_SERVICE_POPCOUNT = np.array([bin(i).count('1') for i in range(1 << len(SERVICE_FIELDS))], dtype=np.float64)
+
+def calculate_recommendation_scores(distance, price_tier, difficulty, amenities, services,
+                                    preferred_price=0, preferred_difficulty=0):
+    """
+    Vectorized calculate_recommendation_score over columnar club data.
+    price_tier/difficulty are CodeTable codes (0 = missing), amenities/services
+    are bitmasks in AMENITY_FIELDS/SERVICE_FIELDS order, and the preferences
+    are codes from the same tables. Returns a float64 score vector matching
+    the scalar function; clubs with no distance score 0.
+    """
+    distance = np.asarray(distance, dtype=np.float64)
+    price_tier = np.asarray(price_tier)
+    difficulty = np.asarray(difficulty)
+
+    # Same operation order as the scalar function so results are bit-identical
+    clipped = np.minimum(distance, MAX_DISTANCE)
+    score = WEIGHTS['distance'] * ((1 - (clipped / MAX_DISTANCE)) * 100)
+
+    if preferred_price:
+        score += np.where(price_tier == preferred_price, WEIGHTS['price'] * 100, 0.0)
+
+    if preferred_difficulty:
+        score += np.where(difficulty == preferred_difficulty, WEIGHTS['difficulty'] * 100, 0.0)
+
+    amenity_count = _AMENITY_POPCOUNT[np.asarray(amenities, dtype=np.intp) & ((1 << len(AMENITY_FIELDS)) - 1)]
+    score += WEIGHTS['amenities'] * ((amenity_count / len(AMENITY_FIELDS)) * 100)
+
+    service_count = _SERVICE_POPCOUNT[np.asarray(services, dtype=np.intp) & ((1 << len(SERVICE_FIELDS)) - 1)]
+    score += WEIGHTS['services'] * ((service_count / len(SERVICE_FIELDS)) * 100)
+
+    score = np.round(score, 2)
+    score[np.isnan(distance)] = 0
+    return score
+
+def score_courses(courses, user_preferences):
+    """
+    Score every course dict for one request and record the request in
+    scoring_diagnostics. Returns new dicts with a 'score' key, unsorted.
+    """
+    start = time.perf_counter()
+    sample = scoring_diagnostics.should_sample(user_preferences)
+    scored_courses = [
+        {**course, 'score': calculate_recommendation_score(course, user_preferences, sample)}
+        for course in courses
+    ]
+    scoring_diagnostics.record(len(scored_courses), time.perf_counter() - start)
+    return scored_courses
+
+def recommendation_score_sql(user_preferences, distance_expr='distance_miles', table_alias='gc'):
+    """
+    SQL expression computing calculate_recommendation_score (before rounding)
+    inside Postgres, so a query can ORDER BY score and LIMIT there.
+    Returns (sql, params) with %s placeholders for the caller's preferences.
+    Float operations happen in the same order as the Python function, so
+    rounding the result with round(score, 2) gives identical scores.
+    """
+    def weight(name):
+        return f"{WEIGHTS[name]!r}::float8"
+
+    def flag_count(fields):
+        return ' + '.join(f"COALESCE({table_alias}.{field}, FALSE)::int" for field in fields)
+
+    sql = f"""(((((
+        {weight('distance')} * ((1 - (LEAST({distance_expr}, {MAX_DISTANCE}) / {MAX_DISTANCE}::float8)) * 100))
+        + CASE WHEN COALESCE(%s, '') <> '' AND COALESCE({table_alias}.price_tier, '') <> ''
+                    AND {table_alias}.price_tier = %s
+               THEN {weight('price')} * 100 ELSE 0::float8 END)
+        + CASE WHEN COALESCE(%s, '') <> '' AND COALESCE({table_alias}.difficulty, '') <> ''
+                    AND lower({table_alias}.difficulty) = lower(%s)
+               THEN {weight('difficulty')} * 100 ELSE 0::float8 END)
+        + {weight('amenities')} * ((({flag_count(AMENITY_FIELDS)})::float8 / {len(AMENITY_FIELDS)}) * 100))
+        + {weight('services')} * ((({flag_count(SERVICE_FIELDS)})::float8 / {len(SERVICE_FIELDS)}) * 100))"""
+    preferred_price = user_preferences.get('preferred_price_range')
+    preferred_difficulty = user_preferences.get('preferred_difficulty')
+    params = [preferred_price, preferred_price, preferred_difficulty, preferred_difficulty]
+    return sql, params
+
+def score_upper_bound(club, user_preferences):
+    """
+    Highest score a club could get: the exact distance, price and difficulty
+    terms plus full amenity and service credit. Never below the real score.
+    """
+    distance = min(club['distance_miles'], MAX_DISTANCE)
+    bound = WEIGHTS['distance'] * ((1 - (distance / MAX_DISTANCE)) * 100)
+    preferred_price = user_preferences.get('preferred_price_range')
+    if preferred_price and club['price_tier'] and preferred_price == club['price_tier']:
+        bound += WEIGHTS['price'] * 100
+    preferred_difficulty = user_preferences.get('preferred_difficulty')
+    if preferred_difficulty and club['difficulty'] and preferred_difficulty.lower() == club['difficulty'].lower():
+        bound += WEIGHTS['difficulty'] * 100
+    bound += WEIGHTS['amenities'] * 100
+    bound += WEIGHTS['services'] * 100
+    return round(bound, 2)
+
+def top_scored_courses(courses, user_preferences, limit):
+    """
+    Return the best `limit` courses with a 'score' key, highest first.
+    Keeps a bounded min-heap instead of sorting every scored course, and
+    skips clubs whose upper bound cannot beat the current k-th score.
+    Ties keep input order, matching a stable sort on score.
+    """
+    start = time.perf_counter()
+    if limit <= 0:
+        return []
+    sample = scoring_diagnostics.should_sample(user_preferences)
+    # The bound costs about as much as a score, so it only pays off when
+    # most of a large candidate list can be skipped
+    prune = len(courses) >= PRUNE_MIN_COURSES
+    heap = []
+    scored = pruned = 0
+    for index, course in enumerate(courses):
+        if prune and len(heap) == limit:
+            try:
+                # A later course only wins a tie if it scores strictly higher
+                if score_upper_bound(course, user_preferences) <= heap[0][0]:
+                    pruned += 1
+                    continue
+            except Exception:
+                pass
+        score = calculate_recommendation_score(course, user_preferences, sample)
+        scored += 1
+        entry = (score, -index, course)
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+    heap.sort(key=lambda entry: entry[:2], reverse=True)
+    scoring_diagnostics.record(scored, time.perf_counter() - start, pruned)
+    return [{**course, 'score': score} for score, _, course in heap]
+
+def score_clubs(clubs, user_preferences):
+    """Score a list of club dicts in one batch; same results as the scalar function."""
+    price_codes = CodeTable()
+    difficulty_codes = CodeTable(case_insensitive=True)
+    preferred_price = price_codes.code(user_preferences.get('preferred_price_range'))
+    preferred_difficulty = difficulty_codes.code(user_preferences.get('preferred_difficulty'))
+    columns = encode_clubs(clubs, price_codes, difficulty_codes)
+    return calculate_recommendation_scores(
+        preferred_price=preferred_price,
+        preferred_difficulty=preferred_difficulty,
+        **columns
+    )
+
+def top_scored_for_profiles(clubs, profiles, limit):
+    """
+    Rank one shared candidate set for several users. Clubs are encoded once
+    and each profile is scored with calculate_recommendation_scores; returns
+    one list per profile of the best `limit` clubs with a 'score' key, in the
+    same order top_scored_courses would give.
+    """
+    start = time.perf_counter()
+    price_codes = CodeTable()
+    difficulty_codes = CodeTable(case_insensitive=True)
+    columns = encode_clubs(clubs, price_codes, difficulty_codes)
+    ranked = []
+    for user_preferences in profiles:
+        scores = calculate_recommendation_scores(
+            preferred_price=price_codes.code(user_preferences.get('preferred_price_range')),
+            preferred_difficulty=difficulty_codes.code(user_preferences.get('preferred_difficulty')),
+            **columns
+        )
+        # Stable sort on -score keeps input order for ties
+        order = np.argsort(-scores, kind='stable')[:max(limit, 0)]
+        ranked.append([{**clubs[i], 'score': float(scores[i])} for i in order])
+    scoring_diagnostics.record(len(clubs) * len(profiles), time.perf_counter() - start)
+    return ranked
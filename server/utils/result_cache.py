@@ -0,0 +1,167 @@
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from utils.zip_index import location_key
+
+logger = logging.getLogger(__name__)
+
+# Radii are rounded up to one of these so nearby radius values share an entry
+RADIUS_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000]
+METERS_PER_MILE = 1609.34
+EARTH_RADIUS_MILES = 6371008.8 / METERS_PER_MILE
+
+
+def bucket_radius(radius):
+    """Smallest bucket that covers radius (radius itself above the largest bucket)."""
+    for bucket in RADIUS_BUCKETS:
+        if radius <= bucket:
+            return bucket
+    return radius
+
+
+def _approx_size(rows):
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+    return size
+
+
+def _miles_between(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1.0)))
+
+
+class QueryResultCache:
+    """
+    Bounded, TTL'd cache of radius-query results keyed on a normalized query.
+    Each entry remembers its center, radius and the club ids it holds, so a
+    write can drop exactly the entries it could affect: those containing the
+    club, and those whose search area covers the club's (new) location.
+
+    The cache lives in one process: a write only invalidates the worker that
+    handled it, and the other uvicorn workers keep serving their copies
+    until the TTL runs out. Keep the TTL short; it bounds that staleness.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl_seconds=60):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._by_club = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from RESULT_CACHE_* environment variables."""
+        return cls(
+            max_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            ttl_seconds=int(os.getenv("RESULT_CACHE_TTL_SECONDS", "60")),
+        )
+
+    @staticmethod
+    def key(zip_code, radius, limit, cursor=None, offset=0, boolean_filters=None, **exact_filters):
+        """Normalized key: location_key, bucketed radius, only set filters, order-independent."""
+        required = tuple(sorted(field for field, value in (boolean_filters or {}).items() if value is True))
+        exact = tuple(sorted((field, str(value)) for field, value in exact_filters.items() if value))
+        return (location_key(zip_code), bucket_radius(radius), limit, cursor, offset or 0, required, exact)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires_at'] <= now:
+                if entry is not None:
+                    self._drop(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry['rows']
+
+    def set(self, key, rows, lat, lng, radius):
+        """Cache rows for a query centered at (lat, lng) covering `radius` miles."""
+        size = _approx_size(rows)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            club_ids = {str(row['id']) for row in rows}
+            self._entries[key] = {
+                'rows': rows,
+                'lat': lat,
+                'lng': lng,
+                'radius': radius,
+                'club_ids': club_ids,
+                'size': size,
+                'expires_at': time.time() + self.ttl_seconds,
+            }
+            for club_id in club_ids:
+                self._by_club.setdefault(club_id, set()).add(key)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['size']
+        for club_id in entry['club_ids']:
+            keys = self._by_club.get(club_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_club[club_id]
+
+    def invalidate_club(self, club_id):
+        """Drop every entry that contains the club."""
+        with self._lock:
+            keys = list(self._by_club.get(str(club_id), ()))
+            for key in keys:
+                self._drop(key)
+            self._invalidations += len(keys)
+        return len(keys)
+
+    def invalidate_location(self, lat, lng):
+        """Drop every entry whose search area covers (lat, lng)."""
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if _miles_between(entry['lat'], entry['lng'], lat, lng) <= entry['radius']
+            ]
+            for key in keys:
+                self._drop(key)
+            self._invalidations += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_club.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,77 @@
+"""
+Fast response serialization.
+
+FastJSONResponse encodes with orjson. Handlers that return it directly also
+skip FastAPI's jsonable_encoder pass over the content. RowLayout maps plain
+cursor tuples onto a fixed field order and applies `fields=` projections, so
+rows are built once with only the columns the caller asked for.
+"""
+import decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from utils.metrics import stage
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+
+def dumps(content):
+    """orjson encoding with the fallbacks our rows need (Decimal, bytes, sets)."""
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content):
+        with stage("serialization"):
+            return dumps(content)
+
+
+class RowLayout:
+    """A fixed field order for tuple rows, with optional projection onto a subset."""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self._positions = {field: i for i, field in enumerate(self.fields)}
+
+    def project(self, fields=None):
+        """
+        Layout for a comma-separated `fields=` value (or list); None or empty
+        keeps every field. Raises ValueError naming any unknown field.
+        """
+        if not fields:
+            return self
+        if isinstance(fields, str):
+            fields = [field.strip() for field in fields.split(",")]
+        fields = [field for field in dict.fromkeys(fields) if field]
+        unknown = [field for field in fields if field not in self._positions]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return RowLayout(fields)
+
+    def select_sql(self, table_alias=None):
+        """Column list for a SELECT in this layout's order."""
+        prefix = f"{table_alias}." if table_alias else ""
+        return ", ".join(prefix + field for field in self.fields)
+
+    def to_dicts(self, rows):
+        """Map tuple rows (in this layout's order) to dicts."""
+        fields = self.fields
+        return [dict(zip(fields, row)) for row in rows]
+
+    def pick(self, rows):
+        """Project dict rows onto this layout's fields."""
+        fields = self.fields
+        return [{field: row.get(field) for field in fields} for row in rows]
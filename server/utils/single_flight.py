@@ -0,0 +1,48 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical async calls.
+    The first caller for a key starts the work; callers that arrive while it
+    is in flight await the same future and receive the same result (or
+    exception). The key is released as soon as the call finishes, so nothing
+    is cached beyond the in-flight window.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._inflight = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs), sharing the call with any in-flight caller for key."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self._coalesced += 1
+        else:
+            self._calls += 1
+            future = asyncio.ensure_future(fn(*args, **kwargs))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._release(key, f))
+        # Shield so one cancelled caller does not cancel the shared call
+        return await asyncio.shield(future)
+
+    def _release(self, key, future):
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+        if not future.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            future.exception()
+
+    def stats(self):
+        """Upstream calls made versus calls coalesced onto an in-flight one."""
+        return {
+            "calls": self._calls,
+            "coalesced": self._coalesced,
+            "in_flight": len(self._inflight),
+        }
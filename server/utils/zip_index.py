@@ -0,0 +1,132 @@
+"""
+Offline ZIP -> (lat, lng) centroid index.
+
+The index is a flat binary file that is memory-mapped at startup:
+
+    b"ZIPC" | uint32 count | uint32 zips[count] | float32 lats[count] | float32 lngs[count]
+
+ZIPs are stored sorted as integers so lookups are a binary search over the
+mapped array; nothing is parsed or copied at load time.
+
+Build it from the Census Gazetteer ZCTA file (public domain):
+
+    python -m utils.zip_index 2023_Gaz_zcta_national.txt data/zip_centroids.bin
+
+The Docker image builds it this way (see server/Dockerfile); local runs
+without the file fall back to Azure Maps.
+"""
+import bisect
+import csv
+import logging
+import mmap
+import re
+import struct
+import sys
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"ZIPC"
+HEADER = struct.Struct("<4sI")
+ZIP_PATTERN = re.compile(r"^\d{5}(-\d{4})?$")
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parent.parent / "data" / "zip_centroids.bin"
+
+
+def normalize_zip(zip_code):
+    """Return the 5-digit ZIP as an int, or None unless the input is a ZIP or ZIP+4."""
+    zip_code = str(zip_code).strip()
+    if not ZIP_PATTERN.match(zip_code):
+        return None
+    return int(zip_code[:5])
+
+
+def location_key(location):
+    """
+    Normalized form of a location the geocoder accepts, for cache and
+    grouping keys: the 5-digit ZIP for ZIP and ZIP+4 input, otherwise the
+    whole text lowercased with whitespace collapsed.
+    """
+    text = " ".join(str(location).split())
+    zip5 = normalize_zip(text)
+    if zip5 is not None:
+        return f"{zip5:05d}"
+    return text.lower()
+
+
+class ZipCentroidIndex:
+    """Read-only, memory-mapped ZIP centroid lookup."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a ZIP centroid index")
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._zips = view[offset:offset + 4 * count].cast("I")
+        offset += 4 * count
+        self._lats = view[offset:offset + 4 * count].cast("f")
+        offset += 4 * count
+        self._lngs = view[offset:offset + 4 * count].cast("f")
+        self._count = count
+
+    @classmethod
+    def load_if_exists(cls, path=DEFAULT_INDEX_PATH):
+        """Open the index, or return None (logged) when it has not been built."""
+        if not Path(path).exists():
+            logger.warning(f"ZIP centroid index not found at {path}; geocoding will use Azure Maps")
+            return None
+        index = cls(path)
+        logger.info(f"Loaded {len(index)} ZIP centroids from {path}")
+        return index
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, zip_code):
+        """Return (lat, lng) for a ZIP code, or None if it is not in the index."""
+        key = normalize_zip(zip_code)
+        if key is None:
+            return None
+        i = bisect.bisect_left(self._zips, key)
+        if i < self._count and self._zips[i] == key:
+            return float(self._lats[i]), float(self._lngs[i])
+        return None
+
+
+def build_index(rows, path):
+    """Write an index file from an iterable of (zip_code, lat, lng)."""
+    entries = {}
+    for zip_code, lat, lng in rows:
+        key = normalize_zip(zip_code)
+        if key is not None:
+            entries[key] = (float(lat), float(lng))
+    zips = sorted(entries)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(zips)))
+        f.write(struct.pack(f"<{len(zips)}I", *zips))
+        f.write(struct.pack(f"<{len(zips)}f", *(entries[z][0] for z in zips)))
+        f.write(struct.pack(f"<{len(zips)}f", *(entries[z][1] for z in zips)))
+    return len(zips)
+
+
+def read_gazetteer(path):
+    """Yield (zip, lat, lng) from a Census Gazetteer ZCTA file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter="\t")
+        header = [column.strip() for column in next(reader)]
+        geoid, lat, lng = header.index("GEOID"), header.index("INTPTLAT"), header.index("INTPTLONG")
+        for row in reader:
+            yield row[geoid].strip(), row[lat].strip(), row[lng].strip()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python -m utils.zip_index <gazetteer_zcta.txt> <output.bin>")
+        sys.exit(1)
+    count = build_index(read_gazetteer(sys.argv[1]), sys.argv[2])
+    print(f"Wrote {count} ZIP centroids to {sys.argv[2]}")